@@ -74,7 +74,7 @@ def run_migrations_online() -> None:
     with connectable.connect() as connection:
         context.configure(
             connection=connection, target_metadata=target_metadata,
-            render_item=render_with_imports
+            render_item=render_with_imports, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -86,6 +86,11 @@ def render_with_imports(type_, obj, autogen_context):
     autogen_context.imports.add("import sqlmodel")
     return False
 
+# Postgres-only trigram indexes are created by hand in migrations and
+# have no model counterpart, keep autogenerate from dropping them
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "index" and reflected and compare_to is None and name.endswith("_trgm"))
+
 if context.is_offline_mode():
     run_migrations_offline()
 else:
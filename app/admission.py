@@ -0,0 +1,134 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.metrics import admission_total
+
+
+@dataclass
+class AdmissionController:
+    """
+        Bounds how many requests of one lane (e.g. logins) run at once. Requests beyond
+        `max_concurrency` wait in a FIFO queue of at most `queue_depth`; a full queue is
+        rejected with 429, and a request whose estimated wait (from a moving average of
+        service time) exceeds `queue_timeout_seconds` is rejected with 503 up front rather
+        than after it has waited. Both carry a Retry-After. Routes outside the lane never
+        pass through here, so they are not slowed by whatever is queued in it.
+        Meant to be used from the event loop thread only.
+    """
+    lane: str
+    max_concurrency: int
+    queue_depth: int = 32
+    queue_timeout_seconds: float = 2.0
+    retry_after_seconds: int = 1
+    _active: int = field(default=0, init=False, repr=False)
+    _waiters: deque = field(default_factory=deque, init=False, repr=False)
+    _service_seconds: Optional[float] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self._admitted = admission_total.labels(self.lane, "admitted")
+        self._queued = admission_total.labels(self.lane, "queued")
+        self._rejected_full = admission_total.labels(self.lane, "rejected_queue_full")
+        self._rejected_deadline = admission_total.labels(self.lane, "rejected_deadline")
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self, position: int) -> float:
+        """
+            Seconds until the request at `position` in the queue would start
+        """
+        if self._service_seconds is None:
+            return 0.0
+        return math.ceil(position / self.max_concurrency) * self._service_seconds
+
+    @asynccontextmanager
+    async def admit(self):
+        await self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record(time.monotonic() - started)
+            self._release()
+
+    async def _acquire(self):
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self._admitted.inc()
+            return
+        if len(self._waiters) >= self.queue_depth:
+            self._rejected_full.inc()
+            raise self._reject(
+                status.HTTP_429_TOO_MANY_REQUESTS, self.estimated_wait(len(self._waiters) + 1)
+            )
+        estimated = self.estimated_wait(len(self._waiters) + 1)
+        if estimated > self.queue_timeout_seconds:
+            self._rejected_deadline.inc()
+            raise self._reject(status.HTTP_503_SERVICE_UNAVAILABLE, estimated)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queued.inc()
+        try:
+            # _release hands its slot straight to the first waiter
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout_seconds)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # granted at the same moment we gave up, pass the slot on
+                self._release()
+            else:
+                waiter.cancel()
+                # a _release between the timeout and here may already have skipped it
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._rejected_deadline.inc()
+                raise self._reject(status.HTTP_503_SERVICE_UNAVAILABLE, self.estimated_wait(len(self._waiters) + 1))
+            raise
+        self._admitted.inc()
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def _record(self, elapsed: float):
+        # exponentially weighted, recent logins count most
+        if self._service_seconds is None:
+            self._service_seconds = elapsed
+        else:
+            self._service_seconds += 0.2 * (elapsed - self._service_seconds)
+
+    def _reject(self, status_code: int, estimated_wait: float) -> HTTPException:
+        retry_after = max(self.retry_after_seconds, math.ceil(estimated_wait))
+        return HTTPException(
+            status_code=status_code,
+            detail=f"Too many concurrent {self.lane} requests, please retry",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+login_admission = AdmissionController(
+    lane="login",
+    max_concurrency=settings.LOGIN_MAX_CONCURRENCY or settings.HASHING_WORKERS or os.cpu_count() or 1,
+    queue_depth=settings.LOGIN_QUEUE_DEPTH,
+    queue_timeout_seconds=settings.LOGIN_QUEUE_TIMEOUT_SECONDS,
+    retry_after_seconds=settings.LOGIN_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,10 @@
+from app.cache.backends import CacheBackend, MemoryCacheBackend, RespCacheBackend, SQLiteCacheBackend
+from app.cache.ttl import TTLCache
+
+__all__ = [
+    'CacheBackend',
+    'MemoryCacheBackend',
+    'RespCacheBackend',
+    'SQLiteCacheBackend',
+    'TTLCache',
+]
\ No newline at end of file
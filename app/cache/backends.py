@@ -0,0 +1,342 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Mapping, Optional, Protocol, Sequence
+from urllib.parse import urlparse
+
+from app.cache.resp import RespError, encode_command, read_reply
+
+
+class CacheBackend(Protocol):
+    """
+        Key/value state shared by whoever uses the same backend: values are bytes, keys
+        may expire, counters are atomic and messages published on a channel reach every
+        subscriber. Multi-key calls cost one round trip.
+    """
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        ...
+
+    async def set_many(self, items: Mapping[str, bytes], ttl: Optional[float] = None):
+        ...
+
+    async def delete(self, *keys: str) -> int:
+        ...
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """
+            Adds to the counter and returns the new value; `ttl` applies when this call creates it
+        """
+        ...
+
+    async def publish(self, channel: str, message: bytes):
+        ...
+
+    def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        """
+            Messages published on `channel` from the moment iteration starts
+        """
+        ...
+
+    async def close(self):
+        ...
+
+
+class MemoryCacheBackend:
+    """
+        Within this process only. Meant for a single worker and for tests.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._entries: dict[str, tuple[bytes, Optional[float]]] = {}
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= self.clock():
+            del self._entries[key]
+            return None
+        return entry[0]
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        return [self._get(key) for key in keys]
+
+    async def set_many(self, items: Mapping[str, bytes], ttl: Optional[float] = None):
+        expires_at = self.clock() + ttl if ttl is not None else None
+        for key, value in items.items():
+            self._entries[key] = (value, expires_at)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._entries.pop(key, None) is not None for key in keys)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        current = self._get(key)
+        if current is None:
+            expires_at = self.clock() + ttl if ttl is not None else None
+        else:
+            expires_at = self._entries[key][1]
+        value = int(current or 0) + amount
+        self._entries[key] = (str(value).encode(), expires_at)
+        return value
+
+    async def publish(self, channel: str, message: bytes):
+        for queue in self._subscribers[channel]:
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        queue = asyncio.Queue()
+        self._subscribers[channel].add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].discard(queue)
+
+    async def close(self):
+        self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """
+        A local SQLite file shared by every worker process on the host. Calls run in a
+        thread; subscribers poll a message table every `poll_seconds`, and messages are
+        kept for `message_retention_seconds`.
+    """
+
+    def __init__(self, path: str, poll_seconds: float = 0.2, message_retention_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.message_retention_seconds = message_retention_seconds
+        self.clock = clock
+        self._pid = os.getpid()
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL) WITHOUT ROWID"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, message BLOB NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # a connection must not cross a fork, workers forked from a preloaded app open their own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        rows = self._connection().execute(
+            f"SELECT key, value FROM cache_entries WHERE key IN ({', '.join('?' * len(keys))})"
+            " AND (expires_at IS NULL OR expires_at > ?)",
+            (*keys, self.clock()),
+        )
+        # counters are stored as integers, read back as bytes like every other value
+        values = {key: value if isinstance(value, bytes) else str(value).encode() for key, value in rows}
+        return [values.get(key) for key in keys]
+
+    def _set_many(self, items: Mapping[str, bytes], ttl: Optional[float]):
+        expires_at = self.clock() + ttl if ttl is not None else None
+        self._connection().executemany(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            [(key, value, expires_at) for key, value in items.items()],
+        )
+
+    def _delete(self, keys: Sequence[str]) -> int:
+        return self._connection().execute(
+            f"DELETE FROM cache_entries WHERE key IN ({', '.join('?' * len(keys))})", keys
+        ).rowcount
+
+    def _incr(self, key: str, amount: int, ttl: Optional[float]) -> int:
+        now = self.clock()
+        expires_at = now + ttl if ttl is not None else None
+        # an expired counter starts over, with a fresh expiry
+        (value,) = self._connection().execute(
+            "INSERT INTO cache_entries (key, value, expires_at) VALUES (?1, ?2, ?3)"
+            " ON CONFLICT (key) DO UPDATE SET"
+            " value = CASE WHEN expires_at <= ?4 THEN ?2 ELSE CAST(value AS INTEGER) + ?2 END,"
+            " expires_at = CASE WHEN expires_at <= ?4 THEN ?3 ELSE expires_at END"
+            " RETURNING value",
+            (key, amount, expires_at, now),
+        ).fetchone()
+        return value
+
+    def _publish(self, channel: str, message: bytes):
+        connection = self._connection()
+        now = self.clock()
+        connection.execute(
+            "INSERT INTO cache_messages (channel, message, created_at) VALUES (?, ?, ?)", (channel, message, now)
+        )
+        connection.execute(
+            "DELETE FROM cache_messages WHERE created_at < ?", (now - self.message_retention_seconds,)
+        )
+
+    def _latest_message(self) -> int:
+        return self._connection().execute("SELECT COALESCE(MAX(id), 0) FROM cache_messages").fetchone()[0]
+
+    def _messages_after(self, channel: str, after: int) -> list[tuple[int, bytes]]:
+        return self._connection().execute(
+            "SELECT id, message FROM cache_messages WHERE id > ? AND channel = ? ORDER BY id", (after, channel)
+        ).fetchall()
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def set_many(self, items: Mapping[str, bytes], ttl: Optional[float] = None):
+        await asyncio.to_thread(self._set_many, items, ttl)
+
+    async def delete(self, *keys: str) -> int:
+        return await asyncio.to_thread(self._delete, keys)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return await asyncio.to_thread(self._incr, key, amount, ttl)
+
+    async def publish(self, channel: str, message: bytes):
+        await asyncio.to_thread(self._publish, channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        after = await asyncio.to_thread(self._latest_message)
+        while True:
+            for after, message in await asyncio.to_thread(self._messages_after, channel, after):
+                yield message
+            await asyncio.sleep(self.poll_seconds)
+
+    async def close(self):
+        pass
+
+
+class RespCacheBackend:
+    """
+        Any server speaking the Redis protocol (Redis, Valkey, KeyDB or the bundled
+        `app.cache.resp_server`). Commands share one connection, each call pipelining its
+        commands in a single write; every subscription gets a connection of its own.
+    """
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._connection: Optional[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _open(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        try:
+            if setup:
+                await self._exchange(reader, writer, setup)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    @staticmethod
+    async def _round_trip(reader, writer, commands: Sequence[tuple]) -> list:
+        writer.write(b"".join(encode_command(*command) for command in commands))
+        await writer.drain()
+        return [await read_reply(reader) for _ in commands]
+
+    @staticmethod
+    def _raise_errors(replies: list) -> list:
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    async def _exchange(self, reader, writer, commands: Sequence[tuple]) -> list:
+        return self._raise_errors(await self._round_trip(reader, writer, commands))
+
+    async def execute(self, *commands: tuple) -> list:
+        """
+            Sends the commands back to back and reads every reply, one round trip in all
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._connection is None:
+                self._connection = await self._open()
+            try:
+                replies = await self._round_trip(*self._connection, commands)
+            except BaseException:
+                # failed or cancelled mid-exchange: replies left unread would answer the
+                # next call, so reconnect on the next call instead
+                self._connection[1].close()
+                self._connection = None
+                raise
+        # error replies come after every reply was read, the connection is still in step
+        return self._raise_errors(replies)
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        if not keys:
+            return []
+        (values,) = await self.execute(("MGET", *keys))
+        return values
+
+    async def set_many(self, items: Mapping[str, bytes], ttl: Optional[float] = None):
+        if not items:
+            return
+        if ttl is None:
+            await self.execute(("MSET", *(part for item in items.items() for part in item)))
+        else:
+            await self.execute(*(("SET", key, value, "PX", int(ttl * 1000)) for key, value in items.items()))
+
+    async def delete(self, *keys: str) -> int:
+        (deleted,) = await self.execute(("DEL", *keys))
+        return deleted
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        if ttl is None:
+            (value,) = await self.execute(("INCRBY", key, amount))
+        else:
+            # NX only sets an expiry on a counter that has none, i.e. the one just created
+            value, _ = await self.execute(("INCRBY", key, amount), ("PEXPIRE", key, int(ttl * 1000), "NX"))
+        return value
+
+    async def publish(self, channel: str, message: bytes):
+        await self.execute(("PUBLISH", channel, message))
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        reader, writer = await self._open()
+        try:
+            await self._exchange(reader, writer, [("SUBSCRIBE", channel)])
+            while True:
+                reply = await read_reply(reader)
+                if isinstance(reply, list) and reply[0] == b"message":
+                    yield reply[2]
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self._connection is not None:
+            self._connection[1].close()
+            self._connection = None
+
+
+def create_backend(name: str, sqlite_path: str, redis_url: str) -> CacheBackend:
+    if name == "sqlite":
+        return SQLiteCacheBackend(sqlite_path)
+    if name == "redis":
+        return RespCacheBackend(redis_url)
+    return MemoryCacheBackend()
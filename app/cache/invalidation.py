@@ -0,0 +1,60 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+from uuid import uuid4
+
+from app.cache.backends import CacheBackend
+from app.cache.users import UserCache
+from app.logger import logger
+
+
+@dataclass
+class CacheInvalidator:
+    """
+        Keeps the in-process UserCache of every node in step: a node that writes a user
+        publishes it on `channel`, and every other node's subscriber drops its cached
+        copy, so the next lookup reads the row. A node ignores its own messages, its
+        cache was updated by the write itself.
+    """
+    backend: CacheBackend
+    cache: UserCache
+    channel: str
+    retry_seconds: float = 1.0
+    node: str = field(default_factory=lambda: uuid4().hex)
+    _task: Optional[asyncio.Task] = field(default=None, init=False, repr=False)
+
+    async def publish(self, key: str, value):
+        message = json.dumps({"node": self.node, "key": key, "value": str(value)}).encode()
+        try:
+            await self.backend.publish(self.channel, message)
+        except Exception as e:
+            # the write itself succeeded; other nodes catch up when their entries expire
+            logger.warning(f'Failed to publish cache invalidation for {key}={value}: {e}')
+
+    def apply(self, message: bytes):
+        invalidation = json.loads(message)
+        if invalidation["node"] != self.node:
+            self.cache.invalidate(invalidation["key"], invalidation["value"])
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                async for message in self.backend.subscribe(self.channel):
+                    self.apply(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # messages published while disconnected are lost, entries still expire by TTL
+                logger.warning(f'Cache invalidation subscription failed, retrying: {e}')
+            await asyncio.sleep(self.retry_seconds)
@@ -0,0 +1,86 @@
+import asyncio
+from typing import Union
+
+# RESP2, the Redis wire protocol: commands go out as arrays of bulk strings, replies
+# come back as simple strings, errors, integers, bulk strings or arrays of those
+
+Reply = Union[None, int, bytes, str, list]
+
+
+class RespError(Exception):
+    """
+        Error reply from the server, e.g. a wrong type or unknown command
+    """
+
+
+def to_bytes(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+def encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = to_bytes(arg)
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def encode_reply(value: Reply) -> bytes:
+    """
+        Server side: str is a simple string, bytes a bulk string, None a null bulk string
+    """
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Reply:
+    """
+        Client side: error replies are returned as RespError rather than raised, so a
+        pipeline can read every reply before failing
+    """
+    line = await reader.readuntil(b"\r\n")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RespError(f"unexpected reply {line!r}")
+
+
+async def read_command(reader: asyncio.StreamReader) -> list[bytes]:
+    """
+        Server side: one command as its arguments, or an inline command such as PING
+    """
+    line = await reader.readuntil(b"\r\n")
+    if line[:1] != b"*":
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = await reader.readuntil(b"\r\n")
+        args.append((await reader.readexactly(int(header[1:-2]) + 2))[:-2])
+    return args
@@ -0,0 +1,195 @@
+"""
+Local stand-in for a Redis server, speaking enough of RESP for the cache backend: strings
+with expiry, MGET/MSET, counters, pub/sub and AUTH. Single process and in memory, meant for
+development and tests rather than production.
+
+    python -m app.cache.resp_server --port 6379 [--requirepass secret]
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://:secret@localhost:6379/0 ...
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, Optional
+
+from app.cache.resp import Reply, RespError, encode_reply, read_command
+
+
+class RespServer:
+    """
+        Commands run one at a time on the event loop, so INCRBY and friends are atomic.
+        A connection that subscribes only receives messages from then on. With a
+        `password`, connections must AUTH before any other command, as with requirepass.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time, password: Optional[str] = None):
+        self.clock = clock
+        self.password = password
+        # key -> (value, expires_at or None)
+        self.data: dict[bytes, tuple[bytes, Optional[float]]] = {}
+        self.channels: dict[bytes, set[asyncio.StreamWriter]] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 6379) -> int:
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscribed: set[bytes] = set()
+        authenticated = self.password is None
+        try:
+            while True:
+                try:
+                    args = await read_command(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                if not args:
+                    continue
+                name = args[0].upper()
+                if name == b"QUIT":
+                    writer.write(encode_reply("OK"))
+                    return
+                if name == b"AUTH":
+                    reply = self.authenticate(args[1:])
+                    authenticated = authenticated or reply == "OK"
+                    writer.write(encode_reply(reply))
+                elif not authenticated:
+                    writer.write(encode_reply(RespError("NOAUTH Authentication required.")))
+                elif name in (b"SUBSCRIBE", b"UNSUBSCRIBE"):
+                    for channel in args[1:]:
+                        if name == b"SUBSCRIBE":
+                            subscribed.add(channel)
+                            self.channels.setdefault(channel, set()).add(writer)
+                        else:
+                            subscribed.discard(channel)
+                            self.channels.get(channel, set()).discard(writer)
+                        writer.write(encode_reply([name.lower(), channel, len(subscribed)]))
+                else:
+                    writer.write(encode_reply(self.execute(name, args[1:])))
+                await writer.drain()
+        finally:
+            for channel in subscribed:
+                self.channels.get(channel, set()).discard(writer)
+            writer.close()
+
+    def execute(self, name: bytes, args: list[bytes]) -> Reply:
+        command = getattr(self, f"command_{name.decode().lower()}", None)
+        if command is None:
+            return RespError(f"ERR unknown command '{name.decode()}'")
+        try:
+            return command(*args)
+        except (TypeError, ValueError):
+            return RespError(f"ERR wrong arguments for '{name.decode()}'")
+
+    def authenticate(self, args: list[bytes]) -> Reply:
+        # AUTH <password>, or AUTH default <password> in the Redis 6 form
+        if self.password is None:
+            return RespError("ERR AUTH called without any password configured for the default user")
+        if len(args) not in (1, 2):
+            return RespError("ERR wrong number of arguments for 'auth' command")
+        if args[-1] != self.password.encode() or (len(args) == 2 and args[0] != b"default"):
+            return RespError("WRONGPASS invalid username-password pair or user is disabled.")
+        return "OK"
+
+    def lookup(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= self.clock():
+            del self.data[key]
+            return None
+        return entry[0]
+
+    def command_ping(self, message: bytes = None) -> Reply:
+        return message if message is not None else "PONG"
+
+    def command_select(self, db: bytes) -> Reply:
+        return "OK"
+
+    def command_get(self, key: bytes) -> Reply:
+        return self.lookup(key)
+
+    def command_mget(self, *keys: bytes) -> Reply:
+        return [self.lookup(key) for key in keys]
+
+    def command_set(self, key: bytes, value: bytes, *options: bytes) -> Reply:
+        expires_at = None
+        if options:
+            unit, amount = options[0].upper(), float(options[1])
+            expires_at = self.clock() + (amount if unit == b"EX" else amount / 1000)
+        self.data[key] = (value, expires_at)
+        return "OK"
+
+    def command_mset(self, *pairs: bytes) -> Reply:
+        for key, value in zip(pairs[::2], pairs[1::2]):
+            self.data[key] = (value, None)
+        return "OK"
+
+    def command_del(self, *keys: bytes) -> Reply:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def command_incrby(self, key: bytes, amount: bytes) -> Reply:
+        current = self.lookup(key)
+        if current is not None and not current.lstrip(b"-").isdigit():
+            return RespError("ERR value is not an integer or out of range")
+        value = int(current or 0) + int(amount)
+        expires_at = self.data[key][1] if current is not None else None
+        self.data[key] = (str(value).encode(), expires_at)
+        return value
+
+    def command_incr(self, key: bytes) -> Reply:
+        return self.command_incrby(key, b"1")
+
+    def command_pexpire(self, key: bytes, milliseconds: bytes, *options: bytes) -> Reply:
+        value = self.lookup(key)
+        if value is None:
+            return 0
+        if options and options[0].upper() == b"NX" and self.data[key][1] is not None:
+            return 0
+        self.data[key] = (value, self.clock() + int(milliseconds) / 1000)
+        return 1
+
+    def command_expire(self, key: bytes, seconds: bytes, *options: bytes) -> Reply:
+        return self.command_pexpire(key, str(int(seconds) * 1000).encode(), *options)
+
+    def command_pttl(self, key: bytes) -> Reply:
+        if self.lookup(key) is None:
+            return -2
+        expires_at = self.data[key][1]
+        return -1 if expires_at is None else int((expires_at - self.clock()) * 1000)
+
+    def command_publish(self, channel: bytes, message: bytes) -> Reply:
+        subscribers = self.channels.get(channel, set())
+        for writer in subscribers:
+            writer.write(encode_reply([b"message", channel, message]))
+        return len(subscribers)
+
+    def command_flushdb(self, *options: bytes) -> Reply:
+        self.data.clear()
+        return "OK"
+
+    command_flushall = command_flushdb
+
+
+async def serve(host: str, port: int, password: Optional[str] = None):
+    server = RespServer(password=password)
+    port = await server.start(host, port)
+    print(f"listening on {host}:{port}", flush=True)
+    await server.server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--requirepass", help="password clients must AUTH with")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.requirepass))
+    except KeyboardInterrupt:
+        pass
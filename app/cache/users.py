@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from app.cache.ttl import TTLCache
+
+
+class CachedUser:
+    """
+        Compact read-only copy of a users row for the lookup cache.
+        Deliberately carries no hashed_password.
+    """
+    __slots__ = (
+        "id",
+        "email",
+        "username",
+        "full_name",
+        "is_active",
+        "verified_email",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(
+            self,
+            id: UUID,
+            email: str,
+            username: str,
+            full_name: str,
+            is_active: bool,
+            verified_email: bool,
+            created_at: datetime,
+            updated_at: datetime,
+        ):
+        self.id = id
+        self.email = email
+        self.username = username
+        self.full_name = full_name
+        self.is_active = is_active
+        self.verified_email = verified_email
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        return cls(**{name: getattr(user, name) for name in cls.__slots__})
+
+    @classmethod
+    def from_row(cls, row) -> "CachedUser":
+        # a result row selecting exactly the users columns named in __slots__
+        return cls(**row._mapping)
+
+    def __repr__(self) -> str:
+        return f"CachedUser(id={self.id!r}, username={self.username!r})"
+
+
+class UserCache:
+    """
+        TTL + LRU cache of users addressable by id, username or email.
+        Each user is one entry, keyed by id, so it is evicted and invalidated as a
+        whole; username and email resolve to the id through aliases that leave with it.
+    """
+    KEYS = ("id", "username", "email")
+    ALIASES = ("username", "email")
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=self._forget)
+        self.aliases: dict[tuple[str, str], UUID] = {}
+
+    def _id(self, key: str, value) -> Optional[UUID]:
+        if key != "id":
+            return self.aliases.get((key, value))
+        if isinstance(value, UUID):
+            return value
+        try:
+            # ids arrive as strings from routes and invalidation messages
+            return UUID(str(value))
+        except ValueError:
+            return None
+
+    def _forget(self, id: UUID, record: CachedUser):
+        for key in self.ALIASES:
+            alias = (key, getattr(record, key))
+            # the name may have moved on to another user since
+            if self.aliases.get(alias) == id:
+                del self.aliases[alias]
+
+    def get(self, key: str, value) -> Optional[CachedUser]:
+        return self.entries.get(self._id(key, value))
+
+    def put(self, user) -> CachedUser:
+        record = user if isinstance(user, CachedUser) else CachedUser.from_user(user)
+        id = self._id("id", record.id)
+        previous = self.entries.pop(id)
+        if previous is not None:
+            # a changed username or email must not keep resolving here
+            self._forget(id, previous)
+        self.entries.set(id, record)
+        for key in self.ALIASES:
+            self.aliases[(key, getattr(record, key))] = id
+        return record
+
+    def invalidate(self, key: str, value):
+        id = self._id(key, value)
+        record = self.entries.pop(id) if id is not None else None
+        if record is not None:
+            self._forget(id, record)
+        elif key != "id":
+            self.aliases.pop((key, value), None)
+
+    def clear(self):
+        self.entries.clear()
+        self.aliases.clear()
+
+    def stats(self) -> dict:
+        return self.entries.stats()
@@ -1,19 +1,44 @@
 from app.controllers.auth import AuthController
 from app.controllers.user import UserController
-from app.controllers.email import EmailController
-from app.db.dao import user_dao
-from sendgrid import SendGridAPIClient
+from app.controllers.email import EmailController, FakeEmailClient, LazySendGridClient
+from app.cache import TTLCache
+from app.config import settings
+from app.db.dao import user_dao, email_outbox_dao, refresh_token_dao
+from app.db.session import async_session_maker
+from app.admission import login_admission
+from app.hashing import password_hasher
+from app.revocation import revocation_list
+from app.workers import EmailOutboxWorker
+from datetime import timedelta
 import os
 
 email_controller = EmailController(
-    client = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
+    client = FakeEmailClient() if settings.EMAIL_TRANSPORT == "fake" else LazySendGridClient(os.environ.get('SENDGRID_API_KEY'))
+)
+
+email_outbox_worker = EmailOutboxWorker(
+    outbox_dao=email_outbox_dao,
+    email_controller=email_controller,
+    session_maker=async_session_maker,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_seconds=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    backoff_seconds=settings.EMAIL_OUTBOX_BACKOFF_SECONDS,
+    backoff_max_seconds=settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS,
+    lease_seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS,
 )
 
 user_controller = UserController(
     user_dao=user_dao,
-    email_controller=email_controller
+    email_outbox=email_outbox_worker,
+    password_hasher=password_hasher,
+    login_admission=login_admission
 )
 
 auth_controller = AuthController(
-    user_dao=user_dao
+    user_dao=user_dao,
+    consumed_verification_tokens=TTLCache(maxsize=settings.VERIFICATION_REPLAY_CACHE_SIZE),
+    refresh_token_dao=refresh_token_dao,
+    revocation_list=revocation_list,
+    refresh_token_ttl=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 )
\ No newline at end of file
@@ -1,18 +1,33 @@
+import hashlib
+import secrets
+import time
 from dataclasses import dataclass
-from app.db.dao import UserDao
-from app.dependencies.auth import SECRET_KEY, ALGORITHM
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+from app.cache import TTLCache
+from app.db.dao import AsyncUserDao, RefreshTokenDao
+from app.models.refresh_token import RefreshToken
+from app.models.users import User
+from app.dependencies.auth import decode_access_token, jwt_decode_seconds
+from app.revocation import RevocationList
+from app.signing import key_ring
 
-import jwt
 from jwt.exceptions import InvalidTokenError
 from fastapi import HTTPException, status
-from app.db.dao import user_dao
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 @dataclass
 class AuthController:
-    user_dao: UserDao
+    user_dao: AsyncUserDao
+    # verification tokens already used, by jti, until they expire
+    consumed_verification_tokens: TTLCache
+    refresh_token_dao: RefreshTokenDao
+    revocation_list: RevocationList
+    refresh_token_ttl: timedelta = timedelta(days=30)
 
-    def verify_email(
+    async def verify_email(
             self,
+            session: AsyncSession,
             token: str
         ):
         credentials_exception = HTTPException(
@@ -20,14 +35,100 @@ class AuthController:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+        started = time.perf_counter()
         try:
-            payload: dict = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload: dict = key_ring.decode(token)
             email_address: str = payload.get("sub", {}).get("email_address_verification")
             if email_address is None:
                 raise credentials_exception
         except InvalidTokenError:
             raise credentials_exception
-        user = user_dao.mark_email_address_verified(email_address=email_address)
+        finally:
+            jwt_decode_seconds.observe(time.perf_counter() - started)
+        # single-use: a replayed link gets the first answer without touching the database
+        jti = payload.get("jti")
+        if jti is not None:
+            user = self.consumed_verification_tokens.get(jti)
+            if user is not None:
+                return user
+        user = await self.user_dao.mark_email_address_verified(session, email_address=email_address)
         if user is None:
             raise credentials_exception
+        if jti is not None:
+            self.consumed_verification_tokens.set(jti, user, expires_at=payload.get("exp"))
         return user
+
+    async def issue_refresh_token(self, session: AsyncSession, user: User) -> tuple[str, UUID]:
+        """
+            Starts a new refresh token family, one per login, and returns the token and
+            the family id to tie the login's access tokens to
+        """
+        token, record = self.new_refresh_token(user.id, family_id=uuid4())
+        await self.refresh_token_dao.create(session, token=record)
+        return token, record.family_id
+
+    async def refresh(self, session: AsyncSession, token: str) -> tuple[User, str, UUID]:
+        """
+            Exchanges a refresh token for its user, the next token of the family and the family id.
+            Costs one indexed lookup by hash and one write, no bcrypt. Presenting a
+            token that was already rotated revokes the whole family.
+        """
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        record = await self.refresh_token_dao.get_by_hash(session, token_hash=self.hash_refresh_token(token))
+        if record is None or record.revoked_at is not None:
+            raise credentials_exception
+        if record.used_at is not None:
+            # replayed: the token leaked or a client raced itself, cut off every descendant
+            await self.refresh_token_dao.revoke_family(session, family_id=record.family_id)
+            raise credentials_exception
+        if record.expires_at <= datetime.utcnow():
+            raise credentials_exception
+        user = await self.user_dao.get_one_by_id(session, id=record.user_id)
+        if user is None or not user.is_active:
+            await self.refresh_token_dao.revoke_family(session, family_id=record.family_id)
+            raise credentials_exception
+        next_token, replacement = self.new_refresh_token(record.user_id, family_id=record.family_id)
+        if not await self.refresh_token_dao.rotate(session, current=record, replacement=replacement):
+            # lost the race to a concurrent refresh with the same token
+            await self.refresh_token_dao.revoke_family(session, family_id=record.family_id)
+            raise credentials_exception
+        return user, next_token, record.family_id
+
+    def new_refresh_token(self, user_id: UUID, family_id: UUID) -> tuple[str, RefreshToken]:
+        token = secrets.token_urlsafe(32)
+        record = RefreshToken(
+            token_hash=self.hash_refresh_token(token),
+            family_id=family_id,
+            user_id=user_id,
+            expires_at=datetime.utcnow() + self.refresh_token_ttl,
+        )
+        return token, record
+
+    @staticmethod
+    def hash_refresh_token(token: str) -> str:
+        # 256 random bits need no salt or slow hash, a plain digest keeps lookups indexable
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    async def revoke_access_token(self, session: AsyncSession, token: str):
+        """
+            Revokes an access token for the rest of its lifetime. Tokens issued before
+            access tokens carried a jti cannot be revoked and simply run out.
+        """
+        payload = decode_access_token(token)
+        jti = payload.get("jti")
+        if jti is not None:
+            await self.revocation_list.revoke(session, jti=jti, expires_at=datetime.utcfromtimestamp(payload["exp"]))
+
+    async def logout(self, session: AsyncSession, token: str):
+        """
+            Ends the login an access token belongs to: the token is revoked and so is the
+            refresh token family named by its sid claim, so the login cannot be renewed.
+        """
+        await self.revoke_access_token(session, token=token)
+        family_id = decode_access_token(token).get("sid")
+        if family_id is not None:
+            await self.refresh_token_dao.revoke_family(session, family_id=UUID(family_id))
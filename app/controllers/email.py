@@ -1,22 +1,52 @@
 from app.params import SendEmailParams
 
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-
 from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Optional, Union
 import os
 
+if TYPE_CHECKING:
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
+
+class FakeEmailClient:
+    """
+        Local stand-in for SendGridAPIClient that records messages instead of sending them
+    """
+    def __init__(self):
+        self.sent: list["Mail"] = []
+
+    def send(self, message: "Mail"):
+        self.sent.append(message)
+        return SimpleNamespace(status_code=202, body=b"", headers={})
+
+class LazySendGridClient:
+    """
+        Builds the SendGridAPIClient on the first send, so starting the app does not load the SDK
+    """
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+        self._client: Optional["SendGridAPIClient"] = None
+
+    def send(self, message: "Mail"):
+        if self._client is None:
+            from sendgrid import SendGridAPIClient
+            self._client = SendGridAPIClient(self.api_key)
+        return self._client.send(message)
+
 @dataclass
 class EmailController:
-    client: SendGridAPIClient
+    client: Union[LazySendGridClient, FakeEmailClient]
     from_email: str = os.environ.get('ADMIN_EMAIL')
 
     def send_email(self, params: SendEmailParams):
         # using SendGrid's Python Library
         # https://github.com/sendgrid/sendgrid-python
+        from sendgrid.helpers.mail import Mail
+
         message = Mail(
             from_email=self.from_email,
             to_emails=params.to,
             subject=params.subject,
             html_content=params.content)
-        return self.client.send(message)
\ No newline at end of file
+        return self.client.send(message)
@@ -1,50 +1,63 @@
 from dataclasses import dataclass
+import base64
+import json
 import os
-from app.controllers.email import EmailController
-from app.db.dao import UserDao
-from app.dependencies.auth import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, pwd_context
+import time
+from app.db.dao import AsyncUserDao, UserConflictError
+from app.config import settings
+from app.dependencies.auth import ACCESS_TOKEN_EXPIRE_MINUTES, identity_claims, jwt_encode_seconds
+from app.signing import key_ring
+from app.admission import AdmissionController
+from app.hashing import PasswordHasher
+from app.logger import logger
+from app.metrics import password_logins_total, password_rehashes_total
+from app.workers.email_outbox import EmailOutboxWorker
 
-import jwt
-from typing import Union
+from typing import Optional, Union
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta, timezone
-from app.models.users import User, UserRegistrationParameters
+from uuid import UUID, uuid4
+from app.models.users import User, UserDirectoryPage, UserRegistrationParameters
 from app.params import SendEmailParams
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 @dataclass
 class UserController:
-    user_dao: UserDao
-    email_controller: EmailController
+    user_dao: AsyncUserDao
+    email_outbox: EmailOutboxWorker
+    password_hasher: PasswordHasher
+    login_admission: AdmissionController
 
-    def register(self, params: UserRegistrationParameters) -> User:
-        # create user in database
-        existing_user = self.user_dao.get_one_by_username(params.username)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"username {params.username} already taken"
-            )
-        existing_user = self.user_dao.get_one_by_email_address(params.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"user with email {params.username} already exists"
-            )
+    async def register(self, session: AsyncSession, params: UserRegistrationParameters) -> User:
+        # create user in database, duplicates are detected by the insert itself
         user = User(
             email=params.email,
             username=params.username,
-            hashed_password=self.get_password_hash(params.password),
+            hashed_password=await self.get_password_hash(params.password),
             full_name=params.full_name
         )
-        return self.user_dao.create_one(
-            user=user
-        )
+        try:
+            return await self.user_dao.create_one(
+                session,
+                user=user
+            )
+        except UserConflictError as e:
+            if e.column == "email":
+                detail = f"user with email {params.email} already exists"
+            else:
+                detail = f"username {params.username} already taken"
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=detail
+            )
     
-    def trigger_email_verification(self, user: User):
+    async def trigger_email_verification(self, session: AsyncSession, user: User):
+        # only enqueued here, the outbox worker does the delivery
         verification_link = self.generate_email_verification_link(user=user)
         application_hostname = os.environ.get("APPLICATION_HOSTNAME")
-        return self.email_controller.send_email(
+        return await self.email_outbox.enqueue(
+            session,
             params=SendEmailParams(
                 to=user.email,
                 subject=f'Email verification for {application_hostname}',
@@ -58,14 +71,24 @@ class UserController:
     def generate_email_verification_link(self, user: User) -> str:
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         token = self.create_token(
-            data={"sub": {"email_address_verification": user.email}}, expires_delta=access_token_expires
+            data={"sub": {"email_address_verification": user.email}, "jti": uuid4().hex},
+            expires_delta=access_token_expires
         )
         application_hostname = os.environ.get('APPLICATION_HOSTNAME')
         return f'{application_hostname}/api/auth/verify_email?token={token}'
     
-    def authenticate(self, username: str, password: str) -> str:
-        user: User = self.user_dao.get_one_by_username(username=username)
-        valid_user = user and self.verify_password(password, user.hashed_password)
+    async def authenticate(self, session: AsyncSession, username: str, password: str) -> str:
+        # queued logins hold no connection; admitted ones give theirs back before hashing, so
+        # a login burst cannot starve other routes of the pool
+        async with self.login_admission.admit():
+            # the only lookup that reads the password hash
+            user: User = await self.user_dao.get_one_by_username(session, username=username, with_password=True)
+            await session.commit()
+            valid_user = False
+            if user:
+                valid_user, new_hash = await self.password_hasher.verify_and_update(password, user.hashed_password)
+                if valid_user:
+                    await self.upgrade_password_hash(session, user, new_hash)
         if not valid_user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -80,10 +103,17 @@ class UserController:
             )
         return user
     
-    def generate_access_token_for_user(self, user: User):
+    def generate_access_token_for_user(self, user: User, family_id: Optional[UUID] = None):
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        # the jti lets this token be revoked before it expires
+        data = {"sub": {"username": user.username}, "jti": uuid4().hex}
+        if family_id is not None:
+            # the refresh token family of the login, revoked with this token on logout
+            data["sid"] = family_id.hex
+        if settings.STATELESS_ACCESS_TOKENS:
+            data.update(usr=identity_claims(user), iat=datetime.now(timezone.utc))
         access_token = self.create_token(
-            data={"sub": {"username": user.username}}, expires_delta=access_token_expires
+            data=data, expires_delta=access_token_expires
         )
         return access_token
 
@@ -94,12 +124,64 @@ class UserController:
 
         to_encode = data.copy()
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+        started = time.perf_counter()
+        encoded_jwt = key_ring.encode(to_encode)
+        jwt_encode_seconds.observe(time.perf_counter() - started)
         return encoded_jwt
 
-    def verify_password(self, plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
+    async def upgrade_password_hash(self, session: AsyncSession, user: User, new_hash: Optional[str]):
+        """
+            Persists the replacement for a stale hash; a failure here never fails the login
+        """
+        if new_hash is None:
+            password_logins_total.labels("current").inc()
+            return
+        password_logins_total.labels("stale").inc()
+        try:
+            updated = await self.user_dao.update_password_hash(
+                session, id=user.id, current_hash=user.hashed_password, new_hash=new_hash
+            )
+        except Exception as e:
+            logger.warning(f'Failed to rehash password for {user.username}: {e}')
+            await session.rollback()
+            password_rehashes_total.labels("failed").inc()
+            return
+        password_rehashes_total.labels("updated" if updated else "conflict").inc()
+
+    async def list_users(self, session: AsyncSession, cursor: Optional[str], limit: int, **filters) -> UserDirectoryPage:
+        """
+            Admin directory page; filters are passed through to the DAO
+        """
+        if filters.get("match") == "substring" and len(filters.get("q") or "") < 3:
+            # shorter patterns have no trigrams to look up and would scan the table
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Substring search needs at least 3 characters",
+            )
+        before = self.decode_directory_cursor(cursor) if cursor else None
+        # one extra row tells whether another page follows
+        rows = await self.user_dao.directory(session, before=before, limit=limit + 1, **filters)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_directory_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        return UserDirectoryPage(users=rows, next_cursor=next_cursor)
+
+    @staticmethod
+    def encode_directory_cursor(created_at: datetime, id: UUID) -> str:
+        return base64.urlsafe_b64encode(json.dumps([created_at.isoformat(), str(id)]).encode()).decode()
+
+    @staticmethod
+    def decode_directory_cursor(cursor: str) -> tuple[datetime, UUID]:
+        try:
+            created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(created_at), UUID(id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    async def verify_password(self, plain_password, hashed_password):
+        return await self.password_hasher.verify(plain_password, hashed_password)
     
-    def get_password_hash(self, password):
-        return pwd_context.hash(password)
+    async def get_password_hash(self, password):
+        return await self.password_hasher.hash(password)
     
\ No newline at end of file
@@ -1,3 +1,29 @@
-from app.db.dao.user import UserDao
+from app.cache.backends import create_backend
+from app.cache.invalidation import CacheInvalidator
+from app.cache.users import UserCache
+from app.config import settings
+from app.db.dao.email_outbox import EmailOutboxDao
+from app.db.dao.refresh_token import RefreshTokenDao
+from app.db.dao.revoked_token import RevokedTokenDao
+from app.db.dao.user import UserDao, AsyncUserDao, UserConflictError
 
-user_dao = UserDao()
\ No newline at end of file
+# state shared with the other processes and nodes using the same backend
+cache_backend = create_backend(settings.CACHE_BACKEND, settings.CACHE_SQLITE_PATH, settings.CACHE_REDIS_URL)
+
+user_cache = UserCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+) if settings.USER_CACHE_ENABLED else None
+
+user_cache_invalidator = CacheInvalidator(
+    backend=cache_backend,
+    cache=user_cache,
+    channel=settings.CACHE_INVALIDATION_CHANNEL
+) if user_cache is not None else None
+
+# request path; UserDao stays available for scripts
+user_dao = AsyncUserDao(cache=user_cache, invalidator=user_cache_invalidator)
+
+email_outbox_dao = EmailOutboxDao()
+refresh_token_dao = RefreshTokenDao()
+revoked_token_dao = RevokedTokenDao()
\ No newline at end of file
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.email import OutboxEmail
+from app.params import SendEmailParams
+
+class EmailOutboxDao:
+    async def enqueue(self, session: AsyncSession, params: SendEmailParams) -> OutboxEmail:
+        email = OutboxEmail(to=params.to, subject=params.subject, content=params.content)
+        session.add(email)
+        await session.commit()
+        return email
+
+    async def claim_due(self, session: AsyncSession, limit: int, lease: timedelta) -> list[OutboxEmail]:
+        """
+            Claims up to `limit` due emails by pushing their next attempt out by `lease`,
+            so a crashed worker's batch is picked up again once the lease runs out.
+            SKIP LOCKED lets several workers claim disjoint batches on Postgres.
+        """
+        now = datetime.utcnow()
+        statement = (
+            select(OutboxEmail)
+            .where(OutboxEmail.status == "pending", OutboxEmail.next_attempt_at <= now)
+            .order_by(OutboxEmail.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        emails = (await session.exec(statement)).all()
+        for email in emails:
+            email.next_attempt_at = now + lease
+        await session.commit()
+        return emails
+
+    async def mark_sent(self, session: AsyncSession, email: OutboxEmail):
+        email.status = "sent"
+        email.attempts += 1
+        email.sent_at = datetime.utcnow()
+        email.last_error = None
+        session.add(email)
+        await session.commit()
+
+    async def mark_attempt_failed(
+            self,
+            session: AsyncSession,
+            email: OutboxEmail,
+            error: str,
+            retry_at: datetime = None
+        ):
+        """
+            Records a failed delivery, retrying at `retry_at` or giving up when it is None
+        """
+        email.attempts += 1
+        email.last_error = error
+        if retry_at is None:
+            email.status = "failed"
+        else:
+            email.next_attempt_at = retry_at
+        session.add(email)
+        await session.commit()
+
+    async def count_by_status(self, session: AsyncSession, status: str) -> int:
+        statement = select(func.count()).select_from(OutboxEmail).where(OutboxEmail.status == status)
+        return (await session.exec(statement)).one()
@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from sqlmodel import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.refresh_token import RefreshToken
+
+class RefreshTokenDao:
+    async def create(self, session: AsyncSession, token: RefreshToken) -> RefreshToken:
+        session.add(token)
+        await session.commit()
+        return token
+
+    async def get_by_hash(self, session: AsyncSession, token_hash: str) -> Optional[RefreshToken]:
+        statement = select(RefreshToken).where(RefreshToken.token_hash == token_hash).limit(1)
+        return (await session.exec(statement)).first()
+
+    async def rotate(self, session: AsyncSession, current: RefreshToken, replacement: RefreshToken) -> bool:
+        """
+            Marks `current` used and stores `replacement` in one transaction. The guarded
+            UPDATE lets exactly one of several concurrent refreshes with the same token win;
+            the others get False and should treat it as reuse.
+        """
+        statement = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.id == current.id,
+                RefreshToken.used_at == None,  # noqa: E711
+                RefreshToken.revoked_at == None,  # noqa: E711
+            )
+            .values(used_at=datetime.utcnow())
+        )
+        result = await session.exec(statement)
+        if result.rowcount != 1:
+            await session.rollback()
+            return False
+        session.add(replacement)
+        await session.commit()
+        return True
+
+    async def revoke_family(self, session: AsyncSession, family_id: UUID) -> int:
+        statement = (
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at == None)  # noqa: E711
+            .values(revoked_at=datetime.utcnow())
+        )
+        result = await session.exec(statement)
+        await session.commit()
+        return result.rowcount
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.revoked_token import RevokedToken
+
+class RevokedTokenDao:
+    async def revoke(self, session: AsyncSession, jti: str, expires_at: datetime) -> RevokedToken:
+        token = RevokedToken(jti=jti, expires_at=expires_at)
+        session.add(token)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # already revoked
+            await session.rollback()
+        return token
+
+    async def revoked_since(self, session: AsyncSession, since: Optional[datetime], now: datetime) -> list[RevokedToken]:
+        """
+            Revocations of tokens still unexpired at `now`, only those recorded at or after
+            `since` when given
+        """
+        statement = select(RevokedToken).where(RevokedToken.expires_at > now)
+        if since is not None:
+            statement = statement.where(RevokedToken.revoked_at >= since)
+        return list((await session.exec(statement)).all())
+
+    async def prune(self, session: AsyncSession, now: datetime) -> int:
+        result = await session.exec(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await session.commit()
+        return result.rowcount
@@ -1,39 +1,327 @@
+import time
+from datetime import datetime
+from typing import Iterator, Optional, Union
+from uuid import UUID
+from sqlalchemy import func, insert, or_, tuple_
+from passlib.context import CryptContext
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select, update
-from app.db.session import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.cache.invalidation import CacheInvalidator
+from app.cache.users import CachedUser, UserCache
+from app.db.session import session_scope
+from app.hashing import describe_hash
+from app.metrics import db_query_seconds
 
 from app.models.users import User
 
+class UserConflictError(Exception):
+    """
+        Raised when a write collides with the unique username or email index
+    """
+    def __init__(self, column: Optional[str]):
+        super().__init__(f"user with this {column or 'key'} already exists")
+        self.column = column
+
+
+def conflict_column(error: IntegrityError) -> Optional[str]:
+    """
+        Maps a unique violation to the users column it hit, from the constraint name
+        (psycopg2 and asyncpg report e.g. ix_users_username) or SQLite's
+        "UNIQUE constraint failed: users.username" message
+    """
+    orig = error.orig
+    constraint = (
+        getattr(getattr(orig, "diag", None), "constraint_name", None)
+        or getattr(orig.__cause__, "constraint_name", None)
+    )
+    text = constraint or str(orig)
+    for column in ("username", "email"):
+        if f"users_{column}" in text or f"users.{column}" in text:
+            return column
+    return None
+
+
+# every users column but the password hash, for bulk reads
+PUBLIC_COLUMNS = tuple(column for column in User.__table__.columns if column.name != "hashed_password")
+
+
+def verify_email_statement(email_address: str):
+    """
+        Marks the address verified and returns its public columns, matching nothing
+        when it already is, so a repeated verification does not write
+    """
+    return (
+        update(User)
+        .where(User.email == email_address, User.verified_email == False)  # noqa: E712
+        .values(verified_email=True, updated_at=datetime.utcnow())
+        .returning(*PUBLIC_COLUMNS)
+    )
+
+
+def lookup_statement(key: str, value, with_password: bool = False):
+    """
+        One user by id, username or email. Only with_password selects the whole row;
+        otherwise just the public columns are read and the hash never leaves the database
+    """
+    statement = select(User) if with_password else select(*PUBLIC_COLUMNS)
+    return statement.where(getattr(User, key) == value).limit(1)
+
+
+def page_after_statement(after: Optional[UUID], limit: int):
+    """
+        Keyset page: the next `limit` users in id order after `after`, an index
+        seek that costs the same on the last page as on the first
+    """
+    statement = select(*PUBLIC_COLUMNS).order_by(User.id).limit(limit)
+    if after is not None:
+        statement = statement.where(User.id > after)
+    return statement
+
+
+def directory_statement(
+        q: Optional[str] = None,
+        match: str = "prefix",
+        is_active: Optional[bool] = None,
+        verified_email: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        before: Optional[tuple[datetime, UUID]] = None,
+        limit: int = 50,
+    ):
+    """
+        Users newest first, filtered, continuing below the (created_at, id) keyset
+        `before`. `q` matches username, email or full name case-insensitively, as a
+        prefix or anywhere, which Postgres serves from the trigram indexes.
+    """
+    statement = (
+        select(*PUBLIC_COLUMNS)
+        .order_by(User.created_at.desc(), User.id.desc())
+        .limit(limit)
+    )
+    if q:
+        pattern = q.lower()
+        columns = (func.lower(User.username), func.lower(User.email), func.lower(User.full_name))
+        if match == "substring":
+            statement = statement.where(or_(*(column.contains(pattern, autoescape=True) for column in columns)))
+        else:
+            statement = statement.where(or_(*(column.startswith(pattern, autoescape=True) for column in columns)))
+    if is_active is not None:
+        statement = statement.where(User.is_active == is_active)
+    if verified_email is not None:
+        statement = statement.where(User.verified_email == verified_email)
+    if created_after is not None:
+        statement = statement.where(User.created_at >= created_after)
+    if created_before is not None:
+        statement = statement.where(User.created_at < created_before)
+    if before is not None:
+        statement = statement.where(tuple_(User.created_at, User.id) < tuple_(*before))
+    return statement
+
+
 class UserDao:
+    def count_password_hashes(self, context: CryptContext) -> dict[tuple[str, bool], int]:
+        """
+            Users per (hash scheme and cost, current under `context`), streamed so
+            the report stays flat in memory on large tables
+        """
+        counts: dict[tuple[str, bool], int] = {}
+        with session_scope() as session:
+            statement = select(User.hashed_password).execution_options(yield_per=1000)
+            for hashed_password in session.exec(statement):
+                key = describe_hash(context, hashed_password)
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def iter_pages(self, page_size: int) -> Iterator[list[dict]]:
+        """
+            Every user without password hashes, one keyset page at a time; each page
+            uses a fresh session so no transaction stays open for the whole table
+        """
+        after = None
+        while True:
+            with session_scope() as session:
+                page = [dict(row._mapping) for row in session.exec(page_after_statement(after, page_size))]
+            if not page:
+                return
+            yield page
+            after = page[-1]["id"]
+
     def create_one(self, user: User) -> User:
-        session = get_session()
-        session.add(user)
-        session.commit()
-        return self.get_one_by_username(username=user.username)
+        # the commit expires `user` and it is detached once the scope closes
+        username = user.username
+        with session_scope() as session:
+            session.add(user)
+            session.commit()
+        return self.get_one_by_username(username=username)
 
     def get_one_by_id(self, id: str) -> User:
-        session = get_session()
-        statement = select(User).where(User.id == id).limit(1)
-        results = session.exec(statement)
-        return results.first()
+        with session_scope() as session:
+            statement = select(User).where(User.id == id).limit(1)
+            results = session.exec(statement)
+            return results.first()
 
     def get_one_by_username(self, username: str) -> User:
-        session = get_session()
-        statement = select(User).where(User.username == username).limit(1)
-        results = session.exec(statement)
-        return results.first()
+        with session_scope() as session:
+            statement = select(User).where(User.username == username).limit(1)
+            results = session.exec(statement)
+            return results.first()
 
     def get_one_by_email_address(self, email_address: str) -> User:
-        session = get_session()
-        statement = select(User).where(User.email == email_address).limit(1)
-        results = session.exec(statement)
-        return results.first()
-
-    def mark_email_address_verified(self, email_address: str) -> User:
-        # first, mark user email address as verified
-        session = get_session()
-        statement = update(User).where(User.email == email_address).values(verified_email=True)
-        session.exec(statement)
-        session.commit()
-        # then, return the user from the database
-        return self.get_one_by_email_address(email_address=email_address)
+        with session_scope() as session:
+            statement = select(User).where(User.email == email_address).limit(1)
+            results = session.exec(statement)
+            return results.first()
+
+    def mark_email_address_verified(self, email_address: str) -> Optional[CachedUser]:
+        with session_scope() as session:
+            row = session.exec(verify_email_statement(email_address)).first()
+            session.commit()
+            if row is None:
+                # already verified (or unknown), nothing was written
+                row = session.exec(lookup_statement("email", email_address)).first()
+        return CachedUser.from_row(row) if row is not None else None
+
+
+insert_seconds = db_query_seconds.labels("user.insert")
+verify_email_seconds = db_query_seconds.labels("user.verify_email")
+update_password_seconds = db_query_seconds.labels("user.update_password")
+page_seconds = db_query_seconds.labels("user.page")
+directory_seconds = db_query_seconds.labels("user.directory")
+lookup_seconds = {key: db_query_seconds.labels(f"user.get_by_{key}") for key in UserCache.KEYS}
+
+
+class AsyncUserDao:
+    """
+        Async counterpart of UserDao for the request path.
+        Callers pass in the request's AsyncSession so nothing here blocks the event loop.
+        Lookups project the public columns into a CachedUser (no hashed_password); with a
+        UserCache they are served from memory when possible and writes update the cache,
+        and with a CacheInvalidator too, other nodes evict the users written here.
+    """
+    def __init__(self, cache: Optional[UserCache] = None, invalidator: Optional[CacheInvalidator] = None):
+        self.cache = cache
+        self.invalidator = invalidator
+
+    async def create_one(self, session: AsyncSession, user: User) -> User:
+        """
+            Single round trip INSERT ... RETURNING; the unique indexes on username and
+            email detect duplicates atomically, raised as UserConflictError
+        """
+        statement = insert(User).values(**user.model_dump()).returning(User)
+        started = time.perf_counter()
+        try:
+            user = (await session.exec(statement)).scalar_one()
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            raise UserConflictError(conflict_column(e)) from e
+        finally:
+            insert_seconds.observe(time.perf_counter() - started)
+        if self.cache is not None:
+            self.cache.put(user)
+        return user
+
+    async def get_one_by_id(self, session: AsyncSession, id: str, use_cache: bool = True) -> CachedUser:
+        return await self._get_one(session, "id", id, use_cache)
+
+    async def get_one_by_username(
+            self,
+            session: AsyncSession,
+            username: str,
+            use_cache: bool = True,
+            with_password: bool = False
+        ) -> Union[User, CachedUser]:
+        """
+            With with_password, the full User row for checking a login, never from the cache
+        """
+        return await self._get_one(session, "username", username, use_cache, with_password)
+
+    async def get_one_by_email_address(self, session: AsyncSession, email_address: str, use_cache: bool = True) -> CachedUser:
+        return await self._get_one(session, "email", email_address, use_cache)
+
+    async def mark_email_address_verified(self, session: AsyncSession, email_address: str) -> Optional[CachedUser]:
+        """
+            Single round trip UPDATE ... RETURNING of the public columns. Idempotent:
+            an already verified user is not written again, only read back.
+        """
+        started = time.perf_counter()
+        row = (await session.exec(verify_email_statement(email_address))).first()
+        await session.commit()
+        verify_email_seconds.observe(time.perf_counter() - started)
+        user = CachedUser.from_row(row) if row is not None else None
+        if user is None:
+            # already verified (or unknown), nothing was written
+            user = await self.get_one_by_email_address(session, email_address=email_address, use_cache=False)
+        if self.cache is not None:
+            if user is None:
+                self.cache.invalidate("email", email_address)
+            else:
+                self.cache.put(user)
+        if self.invalidator is not None:
+            if user is None:
+                await self.invalidator.publish("email", email_address)
+            else:
+                await self.invalidator.publish("username", user.username)
+        return user
+
+    async def page_after(self, session: AsyncSession, after: Optional[UUID], limit: int) -> list[dict]:
+        """
+            Keyset page of users without password hashes, see page_after_statement
+        """
+        started = time.perf_counter()
+        results = await session.exec(page_after_statement(after, limit))
+        page = [dict(row._mapping) for row in results]
+        page_seconds.observe(time.perf_counter() - started)
+        return page
+
+    async def directory(self, session: AsyncSession, limit: int, **filters) -> list[dict]:
+        """
+            One page of the admin user directory, see directory_statement for the filters
+        """
+        started = time.perf_counter()
+        results = await session.exec(directory_statement(limit=limit, **filters))
+        page = [dict(row._mapping) for row in results]
+        directory_seconds.observe(time.perf_counter() - started)
+        return page
+
+    async def update_password_hash(
+            self,
+            session: AsyncSession,
+            id: UUID,
+            current_hash: str,
+            new_hash: str
+        ) -> bool:
+        """
+            Compare-and-set of the stored hash, so a concurrent password change always wins
+            over a rehash computed from the old password. Cached users hold no hash.
+        """
+        statement = (
+            update(User)
+            .where(User.id == id, User.hashed_password == current_hash)
+            .values(hashed_password=new_hash, updated_at=datetime.utcnow())
+        )
+        started = time.perf_counter()
+        result = await session.exec(statement)
+        await session.commit()
+        update_password_seconds.observe(time.perf_counter() - started)
+        return result.rowcount == 1
 
+    async def _get_one(self, session: AsyncSession, key: str, value, use_cache: bool, with_password: bool = False):
+        # cached records carry no hash
+        use_cache = use_cache and self.cache is not None and not with_password
+        if use_cache:
+            cached = self.cache.get(key, value)
+            if cached is not None:
+                return cached
+        started = time.perf_counter()
+        results = await session.exec(lookup_statement(key, value, with_password))
+        if with_password:
+            user = results.first()
+        else:
+            row = results.first()
+            user = CachedUser.from_row(row) if row is not None else None
+        lookup_seconds[key].observe(time.perf_counter() - started)
+        if use_cache and user is not None:
+            return self.cache.put(user)
+        return user
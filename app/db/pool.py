@@ -0,0 +1,119 @@
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+@dataclass
+class PoolStats:
+    """
+        Counters for one engine's connection pool, exposed for monitoring
+    """
+    checkouts: int = 0
+    checkins: int = 0
+    connects: int = 0
+    timeouts: int = 0
+    waits: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record_wait(self, seconds: float):
+        self.waits += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+
+class WaitTimedPool:
+    """
+        Mixin timing how long each checkout waits on the pool,
+        including time spent opening overflow connections
+    """
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.timeouts += 1
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool, keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class WaitTimedQueuePool(WaitTimedPool, QueuePool):
+    pass
+
+
+class WaitTimedAsyncAdaptedQueuePool(WaitTimedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def is_memory_database(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, settings, is_async: bool = False) -> dict:
+    """
+        Pool keyword arguments for create_engine/create_async_engine from Settings.
+        In-memory SQLite keeps SQLAlchemy's single-connection pool.
+    """
+    if is_memory_database(url):
+        return {}
+    return {
+        "poolclass": WaitTimedAsyncAdaptedQueuePool if is_async else WaitTimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def instrument_pool(engine: Engine) -> PoolStats:
+    """
+        Attaches checkout/checkin/connect counters to a sync engine
+        (use AsyncEngine.sync_engine for async engines)
+    """
+    stats = PoolStats()
+    engine.pool.stats = stats
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        stats.checkins += 1
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    return stats
+
+
+def pool_status(engine: Engine, stats: PoolStats) -> dict:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__, **asdict(stats)}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return status
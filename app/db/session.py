@@ -1,11 +1,69 @@
+from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.config import settings
+from app.db.pool import engine_options, instrument_pool, pool_status
 
-engine = create_engine(settings.DATABASE_URL)
+# async drivers used in place of the sync ones in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-def get_session_generator():
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL)
+
+# sync engine, kept for scripts and migrations
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, settings))
+engine_pool_stats = instrument_pool(engine)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, settings, is_async=True)
+)
+async_engine_pool_stats = instrument_pool(async_engine.sync_engine)
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+@contextmanager
+def session_scope():
+    """
+        Sync session for scripts; always closed, returning its connection to the pool
+    """
     with Session(engine) as session:
         yield session
 
-def get_session():
-    return next(get_session_generator())
\ No newline at end of file
+def get_session_generator():
+    with session_scope() as session:
+        yield session
+
+async def get_async_session():
+    """
+        Request scoped session: FastAPI caches this dependency per request, so the
+        route and every dependency in that request share one session, closed at the end
+    """
+    async with async_session_maker() as session:
+        yield session
+
+def get_async_session_maker():
+    """
+        For responses that outlive the request session, e.g. streams opening a session per chunk
+    """
+    return async_session_maker
+
+def reset_after_fork():
+    """
+        Called in each forked worker: drops pooled connections inherited from the parent
+        without closing them, since the parent still owns the sockets
+    """
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+def get_pool_status() -> dict:
+    return {
+        "async": pool_status(async_engine.sync_engine, async_engine_pool_stats),
+        "sync": pool_status(engine, engine_pool_stats),
+    }
\ No newline at end of file
@@ -1,32 +1,94 @@
-import jwt
+import hashlib
+import time
+from datetime import datetime
+from uuid import UUID
 from jwt.exceptions import InvalidTokenError
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import Depends,  HTTPException, status
+from app.cache import TTLCache
+from app.cache.users import CachedUser
+from app.config import settings
 from app.db.dao import user_dao
+from app.db.session import get_async_session
+from app.metrics import jwt_seconds
+from app.revocation import revocation_list
+from app.signing import key_ring
 from app.models.users import User
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
-import logging
 from app.logger import logger
 import os
 
-# https://github.com/pyca/bcrypt/issues/684
-# suppresses error
-# passlib/handlers/bcrypt.py", line 620, in _load_backend_mixin
-# AttributeError: module 'bcrypt' has no attribute '__about__'
-logging.getLogger('passlib').setLevel(logging.ERROR)
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# SECRET_KEY via 'openssl rand -hex 32'
+# SECRET_KEY via 'openssl rand -hex 32'; tokens are signed and verified through key_ring,
+# which only uses it when JWT_ALGORITHM is HS256 or for legacy tokens
 SECRET_KEY = os.getenv('JWT_SECRET_KEY')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+jwt_encode_seconds = jwt_seconds.labels("encode")
+jwt_decode_seconds = jwt_seconds.labels("decode")
+
+# verified payloads keyed by a digest of the token, each entry dropped no later than the token's exp
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
+
+def decode_access_token(token: str) -> dict:
+    """
+        Verifies a bearer token, skipping the signature check and claim parsing
+        for tokens already verified by this process. Raises InvalidTokenError.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        started = time.perf_counter()
+        try:
+            payload = key_ring.decode(token)
+        finally:
+            jwt_decode_seconds.observe(time.perf_counter() - started)
+        token_cache.set(key, payload, expires_at=payload.get("exp"))
+    return payload
+
+def identity_claims(user: User) -> dict:
+    """
+        Claims embedded in access tokens in stateless mode, enough to serve
+        get_current_active_user and /api/users/me without loading the row
+    """
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "full_name": user.full_name,
+        "is_active": user.is_active,
+        "verified_email": user.verified_email,
+        "created_at": user.created_at.isoformat(),
+    }
+
+def user_from_claims(payload: dict) -> Optional[CachedUser]:
+    """
+        Rebuilds the user from a stateless token, or None when the token carries
+        no identity claims or they are older than the configured maximum staleness
+    """
+    claims = payload.get("usr")
+    issued_at = payload.get("iat")
+    if claims is None or issued_at is None:
+        return None
+    if time.time() - issued_at > settings.STATELESS_TOKEN_MAX_STALENESS_SECONDS:
+        return None
+    return CachedUser(
+        id=UUID(claims["id"]),
+        email=claims["email"],
+        username=payload["sub"]["username"],
+        full_name=claims["full_name"],
+        is_active=claims["is_active"],
+        verified_email=claims["verified_email"],
+        created_at=datetime.fromisoformat(claims["created_at"]),
+        updated_at=None,
+    )
+
 async def get_current_user(
-        token: Annotated[str, Depends(oauth2_scheme)]
+        token: Annotated[str, Depends(oauth2_scheme)],
+        session: Annotated[AsyncSession, Depends(get_async_session)]
     ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,13 +96,21 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload: dict = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload: dict = decode_access_token(token)
         username: str = payload.get("sub", {}).get("username")
         if username is None:
             raise credentials_exception
     except InvalidTokenError:
         raise credentials_exception
-    user = user_dao.get_one_by_username(username=username)
+    # a Bloom filter probe, no I/O, for tokens that were never revoked
+    jti = payload.get("jti")
+    if jti is not None and revocation_list.is_revoked(jti):
+        raise credentials_exception
+    if settings.STATELESS_ACCESS_TOKENS:
+        user = user_from_claims(payload)
+        if user is not None:
+            return user
+    user = await user_dao.get_one_by_username(session, username=username)
     if user is None:
         raise credentials_exception
     return user
@@ -51,4 +121,13 @@ async def get_current_active_user(
 ):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
+async def get_current_admin_user(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    # the bootstrapped admin account is the only administrator
+    if current_user.username != settings.ADMIN_USERNAME:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return current_user
\ No newline at end of file
@@ -0,0 +1,58 @@
+from typing import Annotated
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from app.config import settings
+from app.db.dao import cache_backend
+from app.metrics import rate_limited_total
+from app.models.users import EmailVerificationParameters
+from app.ratelimit import CacheSketchBackend, MemoryBackend, Rule, SlidingWindowLimiter
+import os
+
+rate_limit_backend = (
+    CacheSketchBackend(cache_backend) if settings.RATE_LIMIT_BACKEND == "cache" else MemoryBackend()
+)
+
+rate_limiter = SlidingWindowLimiter(
+    backend=rate_limit_backend,
+    rules=[
+        Rule.parse("login_ip", settings.LOGIN_RATE_LIMIT_PER_IP),
+        Rule.parse("login_username", settings.LOGIN_RATE_LIMIT_PER_USERNAME),
+        Rule.parse("register_ip", settings.REGISTER_RATE_LIMIT_PER_IP),
+        Rule.parse("email_resend_ip", settings.EMAIL_RESEND_RATE_LIMIT_PER_IP),
+        Rule.parse("email_resend_username", settings.EMAIL_RESEND_RATE_LIMIT_PER_USERNAME),
+    ],
+    width=settings.RATE_LIMIT_SKETCH_WIDTH,
+    depth=settings.RATE_LIMIT_SKETCH_DEPTH,
+    secret=os.getenv('JWT_SECRET_KEY', '').encode(),
+)
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+async def enforce(rule: str, key: str):
+    """
+        Counts the request against `rule` and rejects it with 429 once over the limit
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    allowed, retry_after = await rate_limiter.hit(rule, key)
+    if not allowed:
+        rate_limited_total.labels(rule).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+# route dependencies, so limited requests are turned away before any hashing, query or email
+
+async def limit_login(request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+    await enforce("login_ip", client_ip(request))
+    await enforce("login_username", form_data.username.lower())
+
+async def limit_register(request: Request):
+    await enforce("register_ip", client_ip(request))
+
+async def limit_email_resend(request: Request, params: EmailVerificationParameters):
+    await enforce("email_resend_ip", client_ip(request))
+    await enforce("email_resend_username", params.username.lower())
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator
+from uuid import UUID
+
+from app.db.dao.user import PUBLIC_COLUMNS
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_FIELDS = ["id"] + [column.name for column in PUBLIC_COLUMNS if column.name != "id"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def format_page(rows: list[dict], format: str, header: bool = False) -> str:
+    """
+        One page of users as NDJSON lines or CSV rows, with the CSV header when asked
+    """
+    if format == "ndjson":
+        return "".join(
+            json.dumps({name: export_value(row[name]) for name in EXPORT_FIELDS}) + "\n" for row in rows
+        )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([export_value(row[name]) for name in EXPORT_FIELDS] for row in rows)
+    return buffer.getvalue()
+
+
+def export_chunks(pages: Iterable[list[dict]], format: str) -> Iterator[str]:
+    # the CSV header goes out even for an empty table
+    yield format_page([], format, header=True)
+    for page in pages:
+        yield format_page(page, format)
+
+
+async def export_chunks_async(pages: AsyncIterator[list[dict]], format: str) -> AsyncIterator[str]:
+    yield format_page([], format, header=True)
+    async for page in pages:
+        yield format_page(page, format)
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.metrics import password_hashing_seconds
+
+# https://github.com/pyca/bcrypt/issues/684
+# suppresses error
+# passlib/handlers/bcrypt.py", line 620, in _load_backend_mixin
+# AttributeError: module 'bcrypt' has no attribute '__about__'
+logging.getLogger('passlib').setLevel(logging.ERROR)
+
+def build_context(
+        schemes: list[str],
+        bcrypt_rounds: Optional[int] = None,
+        argon2_time_cost: Optional[int] = None,
+        argon2_memory_cost: Optional[int] = None,
+        argon2_parallelism: Optional[int] = None
+    ) -> CryptContext:
+    """
+        The first scheme hashes new passwords, the others are deprecated and only verify.
+        Hashes from a deprecated scheme, or weaker than the configured cost, need an update.
+    """
+    options = {}
+    if bcrypt_rounds is not None:
+        # only weaker hashes count as stale, hashes above the configured cost are kept
+        options.update(bcrypt__default_rounds=bcrypt_rounds, bcrypt__min_rounds=bcrypt_rounds)
+    for name, value in (
+        ("time_cost", argon2_time_cost),
+        ("memory_cost", argon2_memory_cost),
+        ("parallelism", argon2_parallelism),
+    ):
+        if value is not None:
+            options[f"argon2__{name}"] = value
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+def describe_hash(context: CryptContext, hashed_password: str) -> tuple[str, bool]:
+    """
+        Scheme and cost parameters of a stored hash, and whether it is current under `context`
+    """
+    scheme = context.identify(hashed_password, required=False)
+    if scheme is None:
+        return "unrecognized", False
+    parsed = context.handler(scheme).from_string(hashed_password)
+    if scheme == "argon2":
+        parameters = f"t={parsed.rounds} m={parsed.memory_cost} p={parsed.parallelism}"
+    else:
+        parameters = f"rounds={parsed.rounds}"
+    return f"{scheme} {parameters}", not context.needs_update(hashed_password)
+
+
+pwd_context = build_context(
+    schemes=[scheme.strip() for scheme in settings.PASSWORD_SCHEMES.split(",")],
+    bcrypt_rounds=settings.BCRYPT_ROUNDS,
+    argon2_time_cost=settings.ARGON2_TIME_COST,
+    argon2_memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2_parallelism=settings.ARGON2_PARALLELISM,
+)
+
+
+# module level so they can be pickled into worker processes
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+def _verify_and_update(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+hash_seconds = password_hashing_seconds.labels("hash")
+verify_seconds = password_hashing_seconds.labels("verify")
+
+
+@dataclass
+class PasswordHasher:
+    """
+        Runs bcrypt hashing and verification on a bounded worker pool so
+        the ~250ms of CPU per call never blocks the event loop.
+        Once `workers + queue_depth` calls are in flight, new calls are
+        rejected with a 503 instead of queueing without bound.
+    """
+    executor_type: str = "process"
+    workers: Optional[int] = None
+    queue_depth: int = 64
+    retry_after_seconds: int = 1
+    _executor: Optional[Executor] = field(default=None, init=False, repr=False)
+    _in_flight: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.workers is None:
+            self.workers = os.cpu_count() or 1
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "thread":
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="hashing"
+                )
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_seconds, _hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_seconds, _verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """
+            Verifies, and when the hash is stale under the current policy also returns
+            a replacement hash of the password, computed in the same worker call
+        """
+        return await self._submit(verify_seconds, _verify_and_update, password, hashed_password)
+
+    async def _submit(self, histogram, fn, *args):
+        if self._in_flight >= self.capacity:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password hashing capacity exhausted, please retry",
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+        loop = asyncio.get_running_loop()
+        future = self.get_executor().submit(fn, *args)
+        self._in_flight += 1
+        # released when the job ends rather than when the caller stops waiting: a cancelled
+        # caller leaves its job running, and it still occupies the pool. Registered before
+        # wrap_future's callback, so the slot is free by the time the caller resumes.
+        future.add_done_callback(lambda _: self._release(loop))
+        started = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(future, loop=loop)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    def _release(self, loop: asyncio.AbstractEventLoop):
+        # called from the executor's thread; nothing is left to admit once the loop is closed
+        try:
+            loop.call_soon_threadsafe(self._decrement)
+        except RuntimeError:
+            pass
+
+    def _decrement(self):
+        self._in_flight -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.HASHING_EXECUTOR,
+    workers=settings.HASHING_WORKERS,
+    queue_depth=settings.HASHING_QUEUE_DEPTH,
+    retry_after_seconds=settings.HASHING_RETRY_AFTER_SECONDS,
+)
@@ -1,11 +1,19 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
-from app.routers import static_router, health_router, users_router, auth_router, email_router
+from app.routers import static_router, health_router, users_router, auth_router, email_router, metrics_router, jwks_router
+from app.metrics.middleware import MetricsMiddleware
 from app.logger import logger
 
 from app.scripts import bootstrap
+from app.config import settings
+from app.controllers import email_outbox_worker
+from app.db.dao import cache_backend, user_cache_invalidator
+from app.db.session import async_engine
+from app.hashing import password_hasher
+from app.revocation import revocation_list
+from app.warmup import warmup
 
 
 @asynccontextmanager
@@ -15,10 +23,27 @@ async def lifespan(app: FastAPI):
     #command.upgrade(alembic_cfg, "head")
     #SQLModel.metadata.create_all(engine)
 
-    bootstrap()
+    if settings.BOOTSTRAP_ON_STARTUP:
+        bootstrap()
+    if settings.WARMUP_ENABLED:
+        warmup.start()
+    if settings.EMAIL_OUTBOX_WORKER_ENABLED:
+        email_outbox_worker.start()
+    revocation_list.start()
+    if user_cache_invalidator is not None:
+        user_cache_invalidator.start()
     yield
+    await warmup.stop()
+    await revocation_list.stop()
+    if user_cache_invalidator is not None:
+        await user_cache_invalidator.stop()
+    await cache_backend.close()
+    await email_outbox_worker.stop(drain_seconds=settings.EMAIL_OUTBOX_DRAIN_SECONDS)
+    password_hasher.shutdown()
+    # close pooled connections, including those opened by the warm-up
+    await async_engine.dispose()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 @app.exception_handler(Exception)
 async def handle_exception(req: Request, e: Exception):
@@ -31,4 +56,9 @@ app.include_router(auth_router)
 app.include_router(static_router)
 app.include_router(health_router)
 app.include_router(users_router)
-app.include_router(email_router)
\ No newline at end of file
+app.include_router(email_router)
+app.include_router(jwks_router)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
\ No newline at end of file
@@ -0,0 +1,86 @@
+from app.metrics.registry import Registry, Counter, Histogram, CallbackMetric
+
+registry = Registry()
+
+# per-route latency, recorded by MetricsMiddleware
+http_request_seconds = registry.histogram(
+    "authfast_http_request_seconds",
+    "Request latency by route template, method and status code",
+    labelnames=("route", "method", "status"),
+)
+
+# bcrypt on the hashing pool, including time queued for a worker
+password_hashing_seconds = registry.histogram(
+    "authfast_password_hashing_seconds",
+    "Time awaiting bcrypt hash or verify on the hashing pool",
+    labelnames=("operation",),
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0, 10.0),
+)
+
+jwt_seconds = registry.histogram(
+    "authfast_jwt_seconds",
+    "Time spent signing or verifying JWTs (verified-token cache hits are not counted)",
+    labelnames=("operation",),
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+db_query_seconds = registry.histogram(
+    "authfast_db_query_seconds",
+    "User DAO query latency, including connection checkout",
+    labelnames=("query",),
+)
+
+email_send_seconds = registry.histogram(
+    "authfast_email_send_seconds",
+    "Email provider send latency by outcome",
+    labelnames=("outcome",),
+)
+
+# progress of moving stored hashes onto the current hashing policy
+password_logins_total = registry.counter(
+    "authfast_password_logins_total",
+    "Successful password verifications by whether the stored hash was current or stale",
+    labelnames=("hash",),
+)
+
+password_rehashes_total = registry.counter(
+    "authfast_password_rehashes_total",
+    "Stale hashes replaced on login, by result",
+    labelnames=("result",),
+)
+
+admission_total = registry.counter(
+    "authfast_admission_total",
+    "Requests admitted, queued or rejected by admission control, by lane",
+    labelnames=("lane", "result"),
+)
+
+rate_limited_total = registry.counter(
+    "authfast_rate_limited_total",
+    "Requests rejected by the brute force limiter, by rule",
+    labelnames=("rule",),
+)
+
+revocation_checks_total = registry.counter(
+    "authfast_revocation_checks_total",
+    "Access tokens passing the revocation Bloom filter, by whether the jti was revoked",
+    labelnames=("result",),
+)
+
+__all__ = [
+    'registry',
+    'Registry',
+    'Counter',
+    'Histogram',
+    'CallbackMetric',
+    'http_request_seconds',
+    'password_hashing_seconds',
+    'jwt_seconds',
+    'db_query_seconds',
+    'email_send_seconds',
+    'password_logins_total',
+    'password_rehashes_total',
+    'admission_total',
+    'rate_limited_total',
+    'revocation_checks_total',
+]
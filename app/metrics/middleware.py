@@ -0,0 +1,38 @@
+import time
+
+from app.metrics import http_request_seconds
+
+
+class MetricsMiddleware:
+    """
+        Plain ASGI middleware timing every HTTP request into http_request_seconds.
+        Requests are labelled by the matched route's path template (not the raw
+        path) so label cardinality stays bounded by the number of routes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # the router writes the matched route into the scope we passed down
+            route = scope.get("route")
+            template = route.path if route is not None else "unmatched"
+            http_request_seconds.labels(template, scope["method"], str(status_code)).observe(
+                time.perf_counter() - started
+            )
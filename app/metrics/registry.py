@@ -0,0 +1,190 @@
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional, Sequence
+
+# seconds, from a cache hit up to a slow external call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Samples = Iterable[tuple[Sequence[str], float]]
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class HistogramChild:
+    """
+        Observations land in fixed buckets; cumulative counts are only
+        computed when the registry is rendered
+    """
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # one slot per bucket plus +Inf
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    type = "untyped"
+    child_class = None
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+
+    def labels(self, *values: str):
+        """
+            Returns the child for these label values. Children live for the process,
+            so hot paths should bind them once instead of calling this per event.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self.new_child()
+        return child
+
+    def new_child(self):
+        return self.child_class()
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+    child_class = CounterChild
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{format_labels(self.labelnames, values)} {format_value(child.value)}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            help: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS
+        ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                labels = format_labels(self.labelnames, values, f'le="{format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class CallbackMetric(Metric):
+    """
+        Values read from `collect` at scrape time, for state that already
+        lives elsewhere (pool sizes, cache counters) and costs nothing to keep
+    """
+
+    def __init__(self, name: str, help: str, type: str, labelnames: Sequence[str], collect: Callable[[], Samples]):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for values, value in self.collect():
+            yield f"{self.name}{format_labels(self.labelnames, values)} {format_value(value)}"
+
+
+class Registry:
+    """
+        Process-wide set of metrics rendered in the Prometheus text format.
+        Updates are plain attribute writes without locks, so they are meant to
+        happen on the event loop thread, the same as TTLCache.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(
+            self,
+            name: str,
+            help: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS
+        ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(
+            self,
+            name: str,
+            help: str,
+            collect: Callable[[], Samples],
+            labelnames: Sequence[str] = (),
+            type: str = "gauge"
+        ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, type, labelnames, collect))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
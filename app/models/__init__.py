@@ -1,9 +1,15 @@
 from app.models.auth import Token, TokenData
+from app.models.email import OutboxEmail
+from app.models.refresh_token import RefreshToken
+from app.models.revoked_token import RevokedToken
 from app.models.users import User, UserBase, UserCreate, UserRead
 
 __all__ = [
     'Token',
     'TokenData',
+    'OutboxEmail',
+    'RefreshToken',
+    'RevokedToken',
     'User',
     'UserBase',
     'UserCreate',
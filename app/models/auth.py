@@ -4,6 +4,11 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Union[str, None] = None
+
+
+class RefreshTokenParameters(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
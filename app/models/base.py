@@ -1,7 +1,10 @@
-from inflect import engine as inflect_engine
 from sqlmodel import SQLModel
 
-inflect = inflect_engine()
+# plural table names as inflect spells them, precomputed because importing
+# inflect costs seconds at startup; unlisted models still fall back to it
+TABLE_NAMES = {
+    "user": "users",
+}
 
 class BaseSQLModel(SQLModel):
     """
@@ -11,4 +14,8 @@ class BaseSQLModel(SQLModel):
     @classmethod
     @property
     def __tablename__(cls) -> str:
-        return inflect.plural(cls.__name__.lower())
\ No newline at end of file
+        name = cls.__name__.lower()
+        if name not in TABLE_NAMES:
+            from inflect import engine as inflect_engine
+            TABLE_NAMES[name] = inflect_engine().plural(name)
+        return TABLE_NAMES[name]
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4, UUID
+
+from app.models.base import BaseSQLModel
+from sqlmodel import Field
+
+class OutboxEmail(BaseSQLModel, table=True):
+    """
+        Email waiting in the outbox for the background delivery worker
+    """
+    __tablename__ = "email_outbox"
+
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    to: str
+    subject: str
+    content: str
+    # pending -> sent, or failed once max attempts are exhausted
+    status: str = Field(default="pending", index=True)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
\ No newline at end of file
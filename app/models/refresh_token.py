@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4, UUID
+
+from app.models.base import BaseSQLModel
+from sqlmodel import Field
+
+class RefreshToken(BaseSQLModel, table=True):
+    """
+        Server side record of an issued refresh token. Only a SHA-256 of the token is
+        stored; every refresh rotates to a new token in the same family, and presenting
+        an already used token revokes the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    token_hash: str = Field(unique=True, index=True)
+    family_id: UUID = Field(index=True)
+    user_id: UUID = Field(foreign_key="users.id", index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+    # set once rotated; a second use of the same token is a replay
+    used_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
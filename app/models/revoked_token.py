@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from app.models.base import BaseSQLModel
+from sqlmodel import Field
+
+class RevokedToken(BaseSQLModel, table=True):
+    """
+        Access token revoked before its expiry, by jti. Rows are only needed until the
+        token would have expired anyway and are pruned after that.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti: str = Field(primary_key=True)
+    expires_at: datetime = Field(index=True)
+    # workers load new revocations incrementally by this column
+    revoked_at: datetime = Field(default_factory=datetime.utcnow, index=True)
@@ -2,6 +2,7 @@ from typing import Optional
 
 from pydantic import BaseModel, EmailStr
 from app.models.base import BaseSQLModel
+from sqlalchemy import Index
 from sqlmodel import Field
 from datetime import datetime
 from uuid import uuid4, UUID
@@ -13,6 +14,10 @@ class UserBase(BaseSQLModel):
     is_active: bool = Field(default=True)
 
 class User(UserBase, table=True):
+    # newest-first keyset order of the admin user directory; on Postgres the
+    # directory search also uses trigram indexes on lower(username/email/full_name)
+    # created in migration c3f1a9e27b54
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     hashed_password: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -26,6 +31,14 @@ class UserRead(UserBase):
     id: Optional[UUID]
     created_at: datetime
 
+class UserDirectoryEntry(UserRead):
+    verified_email: bool
+
+class UserDirectoryPage(BaseModel):
+    users: list[UserDirectoryEntry]
+    # pass back as ?cursor= for the next page, absent on the last page
+    next_cursor: Optional[str] = None
+
 class UserRegistrationParameters(BaseModel):
     username: str
     password: str
@@ -0,0 +1,10 @@
+from app.ratelimit.backends import SketchBackend, MemoryBackend, CacheSketchBackend
+from app.ratelimit.sketch import Rule, SlidingWindowLimiter
+
+__all__ = [
+    'SketchBackend',
+    'MemoryBackend',
+    'CacheSketchBackend',
+    'Rule',
+    'SlidingWindowLimiter',
+]
@@ -0,0 +1,99 @@
+import asyncio
+from array import array
+from typing import Protocol
+
+from app.cache.backends import CacheBackend
+
+
+class SketchBackend(Protocol):
+    """
+        Storage for sliding-window count-min sketches. A sketch is `buckets` sub-window slots
+        of `len(columns)` rows by `width` counters; a slot is reused once its epoch falls out
+        of the window.
+    """
+
+    async def add(self, sketch: str, width: int, buckets: int, epoch: int, columns: list[int], ttl: float) -> int:
+        """
+            Counts one hit at `columns` (one per row) in the slot for `epoch`, returns the
+            estimated number of hits over the last `buckets` epochs including this one.
+            `ttl` is the seconds until that slot leaves the window.
+        """
+        ...
+
+
+def conservative_rows(current: list[int]) -> list[int]:
+    # conservative update: only rows at the minimum grow, which keeps every row an upper
+    # bound for the key while adding far less collision noise than incrementing all of them
+    low = min(current)
+    return [row for row, count in enumerate(current) if count == low]
+
+
+class MemoryBackend:
+    """
+        Sketches in flat arrays of 32-bit counters, private to this process
+    """
+
+    def __init__(self):
+        self._counts: dict[str, array] = {}
+        self._epochs: dict[str, list[int]] = {}
+
+    async def add(self, sketch: str, width: int, buckets: int, epoch: int, columns: list[int], ttl: float) -> int:
+        depth = len(columns)
+        counts = self._counts.get(sketch)
+        if counts is None:
+            counts = self._counts[sketch] = array("I", bytes(4 * buckets * depth * width))
+            self._epochs[sketch] = [-buckets] * buckets
+        epochs = self._epochs[sketch]
+        slot = epoch % buckets
+        if epochs[slot] != epoch:
+            start = slot * depth * width
+            counts[start:start + depth * width] = array("I", bytes(4 * depth * width))
+            epochs[slot] = epoch
+        live = [s for s in range(buckets) if epoch - epochs[s] < buckets]
+
+        def cell(s: int, row: int) -> int:
+            return (s * depth + row) * width + columns[row]
+
+        current = [counts[cell(slot, row)] for row in range(depth)]
+        for row in conservative_rows(current):
+            counts[cell(slot, row)] += 1
+        return min(sum(counts[cell(s, row)] for s in live) for row in range(depth))
+
+    def clear(self):
+        self._counts.clear()
+        self._epochs.clear()
+
+
+class CacheSketchBackend:
+    """
+        Sketches as expiring counters on a shared CacheBackend, so every process using the
+        same backend (SQLite file or Redis-protocol server) shares the counts. A cell is one
+        key per (sketch, slot, row, column) and expires when its slot leaves the window, so
+        there are never more than buckets * depth * width keys per sketch.
+        Every row is incremented: conservative update would need the read and the writes to
+        be one atomic step, which separate backend calls are not.
+    """
+
+    def __init__(self, cache: CacheBackend, prefix: str = "ratelimit:"):
+        self.cache = cache
+        self.prefix = prefix
+
+    def _key(self, sketch: str, slot: int, row: int, col: int) -> str:
+        return f"{self.prefix}{sketch}:{slot}:{row}:{col}"
+
+    async def add(self, sketch: str, width: int, buckets: int, epoch: int, columns: list[int], ttl: float) -> int:
+        slot = epoch % buckets
+        # only cells of the slots still in the window are alive
+        others = [(row, self._key(sketch, s, row, col)) for row, col in enumerate(columns)
+                  for s in range(buckets) if s != slot]
+        counts, earlier = await asyncio.gather(
+            asyncio.gather(*(
+                self.cache.incr(self._key(sketch, slot, row, col), ttl=ttl) for row, col in enumerate(columns)
+            )),
+            self.cache.get_many([key for _, key in others]),
+        )
+        totals = list(counts)
+        for (row, _), value in zip(others, earlier):
+            if value is not None:
+                totals[row] += int(value)
+        return min(totals)
@@ -0,0 +1,80 @@
+import hashlib
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from app.ratelimit.backends import SketchBackend
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# sub-windows per window; the window slides in steps of window / WINDOW_BUCKETS
+WINDOW_BUCKETS = 6
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    limit: int
+    window_seconds: int
+
+    @classmethod
+    def parse(cls, name: str, value: str) -> "Rule":
+        """
+            Reads "<count>/<period>", e.g. "10/minute"
+        """
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(second|minute|hour|day)s?\s*", value)
+        if match is None:
+            raise ValueError(f"rate limit {name} must look like 10/minute, got {value!r}")
+        return cls(name=name, limit=int(match[1]), window_seconds=PERIODS[match[2]])
+
+    @property
+    def bucket_seconds(self) -> float:
+        return self.window_seconds / WINDOW_BUCKETS
+
+
+class SlidingWindowLimiter:
+    """
+        Counts requests per key with one count-min sketch per sub-window, kept in a ring of
+        WINDOW_BUCKETS sub-windows per rule. Memory is width * depth * WINDOW_BUCKETS counters
+        per rule however many distinct keys are seen; the price is that counts are only
+        ever overestimated, by roughly e / width of the traffic in the window.
+        Keys are hashed with a server secret, so colliding keys cannot be chosen from outside.
+    """
+
+    def __init__(
+            self,
+            backend: SketchBackend,
+            rules: list[Rule],
+            width: int,
+            depth: int,
+            secret: bytes,
+            clock: Callable[[], float] = time.time
+        ):
+        self.backend = backend
+        self.rules = {rule.name: rule for rule in rules}
+        self.width = width
+        self.depth = depth
+        self.clock = clock
+        self._key = hashlib.sha256(secret).digest()
+
+    def columns(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth, key=self._key).digest()
+        return [int.from_bytes(digest[4 * row:4 * row + 4], "little") % self.width for row in range(self.depth)]
+
+    async def hit(self, rule_name: str, key: str) -> tuple[bool, int]:
+        """
+            Counts one request for `key` under the rule. Returns whether it is within the
+            limit, and if not, seconds until the oldest sub-window drops out.
+        """
+        rule = self.rules[rule_name]
+        now = self.clock()
+        epoch = int(now // rule.bucket_seconds)
+        count = await self.backend.add(
+            rule.name, self.width, WINDOW_BUCKETS, epoch, self.columns(f"{rule.name}:{key}"),
+            ttl=(epoch + WINDOW_BUCKETS) * rule.bucket_seconds - now,
+        )
+        if count <= rule.limit:
+            return True, 0
+        return False, max(1, math.ceil((epoch + 1) * rule.bucket_seconds - now))
@@ -0,0 +1,29 @@
+import operator
+
+import orjson
+from fastapi.responses import Response
+
+from app.models.users import UserRead
+
+# UserRead's fields and a getter for all of them, built once instead of per response
+USER_READ_FIELDS = tuple(UserRead.model_fields)
+user_read_values = operator.attrgetter(*USER_READ_FIELDS)
+
+
+def dump_user_read(user) -> bytes:
+    """
+        UserRead JSON straight from a User or CachedUser without building and validating
+        a model; orjson writes the UUID and datetime fields itself
+    """
+    return orjson.dumps(dict(zip(USER_READ_FIELDS, user_read_values(user))))
+
+
+class UserReadResponse(Response):
+    """
+        Returned directly by routes declared with response_model=UserRead, so FastAPI
+        skips its own validation and encoding of the user
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dump_user_read(content)
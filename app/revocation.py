@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import heapq
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import settings
+from app.db.dao import revoked_token_dao
+from app.db.dao.revoked_token import RevokedTokenDao
+from app.db.session import async_session_maker
+from app.logger import logger
+from app.metrics import revocation_checks_total
+
+# revocations committed late or stamped by a node with a slower clock can land behind
+# the watermark; each refresh re-reads this far back, re-adding a jti is harmless
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+revoked_checks = revocation_checks_total.labels("revoked")
+false_positive_checks = revocation_checks_total.labels("false_positive")
+
+
+class BloomFilter:
+    """
+        Set membership in a fixed bit array: no false negatives, false positives at about
+        `error_rate` while it holds at most `capacity` keys. Positions come from one
+        blake2b digest split into two hashes (Kirsch-Mitzenmacher).
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+def epoch(value: datetime) -> float:
+    # stored datetimes are naive UTC
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+@dataclass
+class RevocationList:
+    """
+        Each worker's copy of the revoked, unexpired access token jtis: a Bloom filter in
+        front of the exact set, so a token that was never revoked costs one hash and no
+        I/O. A background task loads new revocations from the revoked_tokens table every
+        `refresh_seconds`, forgets expired ones and prunes their rows every `prune_seconds`.
+
+        Bits cannot be cleared, so expired jtis stay in the filter as stale keys that only
+        add false positives. The filter is rebuilt, in a thread, once live and stale keys
+        together outgrow the capacity it was sized for.
+    """
+    dao: RevokedTokenDao
+    session_maker: async_sessionmaker
+    refresh_seconds: float = 5.0
+    prune_seconds: float = 300.0
+    capacity: int = 100_000
+    error_rate: float = 0.001
+    clock: Callable[[], float] = time.time
+    # jti -> expiry as a unix timestamp
+    revoked: dict[str, float] = field(default_factory=dict, init=False, repr=False)
+    # (expiry, jti) min-heap, one entry per jti in `revoked`
+    _expiries: list[tuple[float, str]] = field(default_factory=list, init=False, repr=False)
+    _bloom: BloomFilter = field(init=False, repr=False)
+    _stale: int = field(default=0, init=False, repr=False)
+    # jtis added while a rebuild runs, for the filter it is building
+    _pending: Optional[list[str]] = field(default=None, init=False, repr=False)
+    _watermark: Optional[datetime] = field(default=None, init=False, repr=False)
+    _pruned_at: float = field(default=0.0, init=False, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            return False
+        if jti in self.revoked:
+            revoked_checks.inc()
+            return True
+        false_positive_checks.inc()
+        return False
+
+    def add(self, jti: str, expires_at: float):
+        if expires_at <= self.clock() or jti in self.revoked:
+            return
+        self.revoked[jti] = expires_at
+        heapq.heappush(self._expiries, (expires_at, jti))
+        self._bloom.add(jti)
+        if self._pending is not None:
+            self._pending.append(jti)
+
+    def needs_rebuild(self) -> bool:
+        # past capacity the false positive rate climbs above error_rate
+        return len(self.revoked) + self._stale > self.capacity
+
+    async def revoke(self, session: AsyncSession, jti: str, expires_at: datetime):
+        """
+            Records the revocation for every worker and applies it here straight away
+        """
+        await self.dao.revoke(session, jti=jti, expires_at=expires_at)
+        self.add(jti, epoch(expires_at))
+
+    async def refresh(self, session: AsyncSession):
+        """
+            Loads revocations recorded since the last refresh (all of them the first time)
+            and drops entries whose tokens have expired
+        """
+        since = self._watermark - REFRESH_OVERLAP if self._watermark is not None else None
+        rows = await self.dao.revoked_since(session, since=since, now=datetime.utcfromtimestamp(self.clock()))
+        for row in rows:
+            self.add(row.jti, epoch(row.expires_at))
+            if self._watermark is None or row.revoked_at > self._watermark:
+                self._watermark = row.revoked_at
+        if self._watermark is None:
+            # nothing revoked yet, later refreshes still only need the recent rows
+            self._watermark = datetime.utcfromtimestamp(self.clock())
+        self.expire()
+        if self.needs_rebuild():
+            await self.rebuild()
+
+    def expire(self):
+        now = self.clock()
+        while self._expiries and self._expiries[0][0] <= now:
+            _, jti = heapq.heappop(self._expiries)
+            del self.revoked[jti]
+            self._stale += 1
+
+    async def rebuild(self):
+        """
+            Hashes the live jtis into a fresh filter off the event loop, doubling the
+            capacity while they would fill more than half of it
+        """
+        while len(self.revoked) * 2 > self.capacity:
+            self.capacity *= 2
+        self._pending = []
+        try:
+            bloom = await asyncio.to_thread(self.build, list(self.revoked), self.capacity)
+            for jti in self._pending:
+                bloom.add(jti)
+        finally:
+            self._pending = None
+        self._bloom = bloom
+        self._stale = 0
+
+    def build(self, jtis: list[str], capacity: int) -> BloomFilter:
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom
+
+    async def prune(self, session: AsyncSession) -> int:
+        self._pruned_at = self.clock()
+        return await self.dao.prune(session, now=datetime.utcfromtimestamp(self._pruned_at))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                async with self.session_maker() as session:
+                    await self.refresh(session)
+                    if self.clock() - self._pruned_at >= self.prune_seconds:
+                        pruned = await self.prune(session)
+                        if pruned:
+                            logger.info(f'pruned {pruned} expired token revocations')
+            except Exception as e:
+                logger.warning(f'Token revocation refresh failed: {e}')
+            await asyncio.sleep(self.refresh_seconds)
+
+    def stats(self) -> dict:
+        return {"revoked": len(self.revoked), "stale": self._stale, "capacity": self.capacity, "bits": self._bloom.size}
+
+
+revocation_list = RevocationList(
+    dao=revoked_token_dao,
+    session_maker=async_session_maker,
+    refresh_seconds=settings.REVOCATION_REFRESH_SECONDS,
+    prune_seconds=settings.REVOCATION_PRUNE_SECONDS,
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+)
@@ -3,6 +3,8 @@ from app.routers.static import router as static_router
 from app.routers.health import router as health_router
 from app.routers.users import router as users_router
 from app.routers.email import router as email_router
+from app.routers.metrics import router as metrics_router
+from app.routers.jwks import router as jwks_router
 
 __all__ = [
     "auth_router",
@@ -10,4 +12,6 @@ __all__ = [
     "health_router",
     "users_router",
     'email_router',
+    'metrics_router',
+    'jwks_router',
 ]
@@ -1,33 +1,66 @@
 from typing import Annotated
 from fastapi import Depends, APIRouter, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from app.models.auth import Token
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.auth import Token, RefreshTokenParameters
 from app.controllers import user_controller, auth_controller
+from app.db.session import get_async_session
+from app.dependencies.auth import get_current_user, oauth2_scheme
+from app.dependencies.rate_limit import limit_login, limit_register, limit_email_resend
 from app.models.users import UserRead, UserRegistrationParameters, EmailVerificationParameters
+from app.responses import UserReadResponse
 
 router = APIRouter(prefix="/api/auth")
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(limit_login)])
 async def login_user(
-    form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    session: Annotated[AsyncSession, Depends(get_async_session)]
 ) -> Token:
-    user = user_controller.authenticate(username=form_data.username, password=form_data.password)
+    user = await user_controller.authenticate(session, username=form_data.username, password=form_data.password)
+    refresh_token, family_id = await auth_controller.issue_refresh_token(session, user=user)
     return Token(
-        access_token=user_controller.generate_access_token_for_user(user=user),
-        token_type="bearer"
+        access_token=user_controller.generate_access_token_for_user(user=user, family_id=family_id),
+        token_type="bearer",
+        refresh_token=refresh_token
     )
 
-@router.post("/register", status_code=status.HTTP_201_CREATED)
+@router.post("/refresh")
+async def refresh_access_token(
+    params: RefreshTokenParameters,
+    session: Annotated[AsyncSession, Depends(get_async_session)]
+) -> Token:
+    user, refresh_token, family_id = await auth_controller.refresh(session, token=params.refresh_token)
+    return Token(
+        access_token=user_controller.generate_access_token_for_user(user=user, family_id=family_id),
+        token_type="bearer",
+        refresh_token=refresh_token
+    )
+
+@router.post("/logout", dependencies=[Depends(get_current_user)], status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    # every worker rejects the token within REVOCATION_REFRESH_SECONDS, this one at once
+    await auth_controller.logout(session, token=token)
+
+@router.post("/register", dependencies=[Depends(limit_register)], status_code=status.HTTP_201_CREATED,
+             response_model=UserRead, response_class=UserReadResponse)
 async def register_user(
     params: UserRegistrationParameters,
-) -> UserRead:
-    user = user_controller.register(params=params)
-    user_controller.trigger_email_verification(user=user)
-    return user
+    session: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    user = await user_controller.register(session, params=params)
+    await user_controller.trigger_email_verification(session, user=user)
+    return UserReadResponse(user, status_code=status.HTTP_201_CREATED)
 
-@router.post("/resend_email_verification", status_code=status.HTTP_202_ACCEPTED)
-async def resend_email_verification(params: EmailVerificationParameters):
-    user = user_controller.user_dao.get_one_by_username(username=params.username)
+@router.post("/resend_email_verification", dependencies=[Depends(limit_email_resend)], status_code=status.HTTP_202_ACCEPTED)
+async def resend_email_verification(
+    params: EmailVerificationParameters,
+    session: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    user = await user_controller.user_dao.get_one_by_username(session, username=params.username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -37,10 +70,12 @@ async def resend_email_verification(params: EmailVerificationParameters):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
         )
-    user_controller.trigger_email_verification(user=user)
+    await user_controller.trigger_email_verification(session, user=user)
 
-@router.get("/verify_email")
+@router.get("/verify_email", response_model=UserRead, response_class=UserReadResponse)
 async def verify_email(
-    token: str
+    token: str,
+    session: Annotated[AsyncSession, Depends(get_async_session)]
 ):
-    return auth_controller.verify_email(token=token)
\ No newline at end of file
+    user = await auth_controller.verify_email(session, token=token)
+    return UserReadResponse(user)
\ No newline at end of file
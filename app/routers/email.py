@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated
+from fastapi import APIRouter, Depends, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.dependencies.auth import get_current_active_user
-from app.controllers import email_controller
+from app.controllers import email_outbox_worker
+from app.db.session import get_async_session
 
 from app.params import SendEmailParams
 
 router = APIRouter(prefix="/api/email")
 
-@router.post("", dependencies=[Depends(get_current_active_user)])
-async def send_email_to(params: SendEmailParams):
-    return email_controller.send_email(
+@router.post("", dependencies=[Depends(get_current_active_user)], status_code=status.HTTP_202_ACCEPTED)
+async def send_email_to(
+    params: SendEmailParams,
+    session: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    email = await email_outbox_worker.enqueue(
+        session,
         params=params
-    )
\ No newline at end of file
+    )
+    return {"id": email.id, "status": email.status}
\ No newline at end of file
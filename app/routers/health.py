@@ -1,8 +1,34 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.db.session import get_pool_status
+from app.db.dao import user_dao
+from app.dependencies.auth import token_cache
+from app.warmup import warmup
 
 router = APIRouter()
 
 
 @router.get("/health", tags=["health"])
 async def health():
+    # readiness: a worker still warming up is kept out of rotation
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
     return {"status": "ok"}
+
+
+@router.get("/health/warmup", tags=["health"])
+async def health_warmup():
+    return warmup.status()
+
+
+@router.get("/health/db", tags=["health"])
+async def health_db():
+    return get_pool_status()
+
+
+@router.get("/health/cache", tags=["health"])
+async def health_cache():
+    caches = {"tokens": token_cache.stats()}
+    if user_dao.cache is not None:
+        caches["users"] = user_dao.cache.stats()
+    return caches
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Request, Response, status
+from app.config import settings
+from app.signing import key_ring
+import hashlib
+
+router = APIRouter()
+
+JWKS_ETAG = '"' + hashlib.blake2b(key_ring.jwks, digest_size=8).hexdigest() + '"'
+
+
+@router.get("/.well-known/jwks.json", tags=["auth"])
+async def jwks(request: Request):
+    """
+        Public signing keys for verifying access tokens locally. The set only changes
+        on restart, so it is served pre-serialized with an ETag and a max-age.
+    """
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+        "ETag": JWKS_ETAG,
+    }
+    if request.headers.get("if-none-match") == JWKS_ETAG:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=key_ring.jwks, media_type="application/jwk-set+json", headers=headers)
@@ -0,0 +1,80 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.admission import login_admission
+from app.db.session import get_pool_status
+from app.db.dao import user_dao
+from app.dependencies.auth import token_cache
+from app.metrics import registry
+from app.revocation import revocation_list
+
+router = APIRouter()
+
+
+def pool_connections():
+    for engine, status in get_pool_status().items():
+        for state in ("size", "checked_in", "checked_out", "overflow"):
+            if state in status:
+                yield (engine, state), status[state]
+
+
+def pool_events():
+    for engine, status in get_pool_status().items():
+        for event in ("checkouts", "connects", "timeouts", "waits"):
+            yield (engine, event), status[event]
+
+
+def pool_wait_seconds():
+    for engine, status in get_pool_status().items():
+        yield (engine,), status["wait_seconds_total"]
+
+
+def cache_lookups():
+    caches = {"tokens": token_cache}
+    if user_dao.cache is not None:
+        caches["users"] = user_dao.cache
+    for name, cache in caches.items():
+        stats = cache.stats()
+        yield (name, "hit"), stats["hits"]
+        yield (name, "miss"), stats["misses"]
+
+
+def admission_requests():
+    for controller in (login_admission,):
+        yield (controller.lane, "active"), controller.active
+        yield (controller.lane, "queued"), controller.queued
+
+
+def revoked_tokens():
+    yield (), len(revocation_list.revoked)
+
+
+registry.callback(
+    "authfast_db_pool_connections", "Connection pool size and connections by state",
+    pool_connections, labelnames=("engine", "state"),
+)
+registry.callback(
+    "authfast_db_pool_events_total", "Connection pool checkouts, new connections, waits and timeouts",
+    pool_events, labelnames=("engine", "event"), type="counter",
+)
+registry.callback(
+    "authfast_db_pool_wait_seconds_total", "Total time spent waiting for a pooled connection",
+    pool_wait_seconds, labelnames=("engine",), type="counter",
+)
+registry.callback(
+    "authfast_cache_lookups_total", "In-process cache lookups by result",
+    cache_lookups, labelnames=("cache", "result"), type="counter",
+)
+registry.callback(
+    "authfast_admission_requests", "Requests running or waiting in each admission lane",
+    admission_requests, labelnames=("lane", "state"),
+)
+
+registry.callback(
+    "authfast_revoked_tokens", "Revoked, unexpired access tokens held by this worker",
+    revoked_tokens,
+)
+
+
+@router.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
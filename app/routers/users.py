@@ -1,13 +1,78 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends
-from app.models.users import User
-from app.dependencies.auth import get_current_active_user
+from datetime import datetime, timezone
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.controllers import user_controller
+from app.db.dao import user_dao
+from app.db.session import get_async_session, get_async_session_maker
+from app.exports import MEDIA_TYPES, export_chunks_async
+from app.models.users import User, UserDirectoryPage, UserRead
+from app.responses import UserReadResponse
+from app.dependencies.auth import get_current_active_user, get_current_admin_user
 
 router = APIRouter()
 
 
-@router.get("/api/users/me", tags=["users"])
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # created_at is a naive UTC timestamp: asyncpg refuses aware values for it and SQLite drops the offset
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/api/users/me", tags=["users"], response_model=UserRead, response_class=UserReadResponse)
 async def read_user_me(
     current_user: Annotated[User, Depends(get_current_active_user)]
-) -> User:
-    return current_user
+):
+    return UserReadResponse(current_user)
+
+
+@router.get("/api/users", tags=["users"], dependencies=[Depends(get_current_admin_user)])
+async def list_users(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    q: Annotated[Optional[str], Query(max_length=254, description="username, email or full name")] = None,
+    match: Literal["prefix", "substring"] = "prefix",
+    is_active: Optional[bool] = None,
+    verified_email: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+) -> UserDirectoryPage:
+    return await user_controller.list_users(
+        session,
+        cursor=cursor,
+        limit=limit,
+        q=q,
+        match=match,
+        is_active=is_active,
+        verified_email=verified_email,
+        created_after=naive_utc(created_after),
+        created_before=naive_utc(created_before),
+    )
+
+
+@router.get("/api/users/export", tags=["users"], dependencies=[Depends(get_current_admin_user)])
+async def export_users(
+    session_maker: Annotated[async_sessionmaker, Depends(get_async_session_maker)],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    page_size: Annotated[int, Query(ge=1, le=10000)] = 1000,
+):
+    async def pages():
+        # a short session per page: no connection or transaction is held between chunks
+        after = None
+        while True:
+            async with session_maker() as session:
+                page = await user_dao.page_after(session, after=after, limit=page_size)
+            if not page:
+                return
+            yield page
+            after = page[-1]["id"]
+
+    return StreamingResponse(
+        export_chunks_async(pages(), format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
@@ -1,30 +1,32 @@
-from app.db.session import engine
+from app.db.session import session_scope
 from app.models import User
-from sqlmodel import select, insert, Session
+from sqlmodel import select
 from app.config import settings
 import logging
-import os
 
 def inject_admin_user():
-    email=os.environ.get('ADMIN_EMAIL')
-    uname=os.environ.get('ADMIN_USERNAME'),
-    name=os.environ.get('ADMIN_FULL_NAME'),
-    hash_pass=os.environ.get('ADMIN_HASHED_PASSWORD'),
-    logging.info(f'{email=} {uname=} {name=} {hash_pass}')
+    """
+        Creates the configured admin user unless it exists; after the first start
+        this is a single indexed lookup
+    """
     try:
-        with Session(engine) as session:
+        with session_scope() as session:
+            statement = select(User.id).where(User.username == settings.ADMIN_USERNAME).limit(1)
+            if session.exec(statement).first() is not None:
+                return
+            logging.info(f'creating admin user {settings.ADMIN_USERNAME} <{settings.ADMIN_EMAIL}>')
             admin = User(
-                email=email,
-                username=uname,
+                email=settings.ADMIN_EMAIL,
+                username=settings.ADMIN_USERNAME,
                 is_active=True,
-                full_name=name,
-                hashed_password=hash_pass
+                full_name=settings.ADMIN_FULL_NAME,
+                hashed_password=settings.ADMIN_HASHED_PASSWORD
             )
             session.add(admin)
             session.commit()
     except Exception as e:
-        logging.warning(f'Failed to create admin user for {email}: {e}')
+        logging.warning(f'Failed to create admin user for {settings.ADMIN_EMAIL}: {e}')
 
 # bootstraps the application with configurable admin user
 def bootstrap():
-    inject_admin_user()
\ No newline at end of file
+    inject_admin_user()
@@ -0,0 +1,35 @@
+"""
+Full dump of the users table, without password hashes.
+
+    python -m app.scripts.export_users > users.ndjson
+    python -m app.scripts.export_users --format csv --output users.csv --page-size 5000
+
+Pages through users in id order (keyset pagination), so memory stays flat and every
+page is as cheap as the first however large the table.
+"""
+import argparse
+import sys
+
+from app.exports import EXPORT_FORMATS, export_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--output", help="defaults to stdout")
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.db.dao import UserDao
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        for chunk in export_chunks(UserDao().iter_pages(args.page_size), args.format):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
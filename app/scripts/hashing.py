@@ -0,0 +1,153 @@
+"""
+Password hashing maintenance.
+
+    python -m app.scripts.hashing calibrate --target-ms 250
+    python -m app.scripts.hashing calibrate --scheme argon2 --target-ms 250 --max-memory-mib 256
+    python -m app.scripts.hashing status
+
+`calibrate` measures verify latency on this host and prints the settings that hit the
+target; run it on production hardware. `status` reports how many stored hashes are on
+the current policy; stale ones are replaced as their users log in.
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, Optional
+
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.hashing import build_context, pwd_context
+
+CALIBRATION_PASSWORD = "calibration-password-1234"
+
+# OWASP minimums; calibration never suggests less
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MIN_MEMORY_KIB = 19 * 1024
+ARGON2_MIN_TIME_COST = 2
+
+
+def time_verify(context: CryptContext, samples: int = 5) -> float:
+    """
+        Median seconds for one verify under `context`
+    """
+    hashed_password = context.hash(CALIBRATION_PASSWORD)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.verify(CALIBRATION_PASSWORD, hashed_password)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt(
+        target_seconds: float,
+        measure: Callable[[CryptContext], float] = time_verify
+    ) -> tuple[dict, list[tuple[dict, float]]]:
+    """
+        Highest bcrypt cost whose verify stays within the target. Each round doubles the
+        work, so measuring stops at the first cost over the target.
+    """
+    measured = []
+    for rounds in range(BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS + 1):
+        elapsed = measure(build_context(["bcrypt"], bcrypt_rounds=rounds))
+        measured.append(({"BCRYPT_ROUNDS": rounds}, elapsed))
+        if elapsed > target_seconds:
+            break
+    return choose(measured, target_seconds), measured
+
+
+def calibrate_argon2(
+        target_seconds: float,
+        max_memory_kib: int,
+        parallelism: int = 1,
+        measure: Callable[[CryptContext], float] = time_verify
+    ) -> tuple[dict, list[tuple[dict, float]]]:
+    """
+        Grows memory first (the expensive resource for attackers) up to `max_memory_kib`,
+        then time cost, keeping the most expensive parameters within the target
+    """
+    measured = []
+    memory_cost, time_cost = ARGON2_MIN_MEMORY_KIB, ARGON2_MIN_TIME_COST
+    while True:
+        parameters = {
+            "ARGON2_TIME_COST": time_cost,
+            "ARGON2_MEMORY_COST": memory_cost,
+            "ARGON2_PARALLELISM": parallelism,
+        }
+        elapsed = measure(build_context(
+            ["argon2"], argon2_time_cost=time_cost, argon2_memory_cost=memory_cost, argon2_parallelism=parallelism
+        ))
+        measured.append((parameters, elapsed))
+        if elapsed > target_seconds:
+            break
+        if memory_cost * 2 <= max_memory_kib:
+            memory_cost *= 2
+        else:
+            time_cost += 1
+    return choose(measured, target_seconds), measured
+
+
+def choose(measured: list[tuple[dict, float]], target_seconds: float) -> dict:
+    within = [parameters for parameters, elapsed in measured if elapsed <= target_seconds]
+    # even the minimum cost is over budget: recommend the minimum rather than something weaker
+    return within[-1] if within else measured[0][0]
+
+
+def calibrate(args: argparse.Namespace):
+    target_seconds = args.target_ms / 1000
+    if args.scheme == "argon2":
+        if not build_context(["argon2"]).handler("argon2").has_backend():
+            raise SystemExit("argon2 needs the argon2-cffi package: poetry install -E argon2")
+        chosen, measured = calibrate_argon2(target_seconds, max_memory_kib=args.max_memory_mib * 1024)
+    else:
+        chosen, measured = calibrate_bcrypt(target_seconds)
+
+    print(f"{args.scheme} verify latency on this host (target {args.target_ms:.0f}ms):")
+    for parameters, elapsed in measured:
+        marker = "  <- chosen" if parameters == chosen else ""
+        described = " ".join(f"{name}={value}" for name, value in parameters.items())
+        print(f"  {described:<70} {elapsed * 1000:8.1f}ms  ~{1 / elapsed:6.1f}/s per worker{marker}")
+    print("\nsettings:")
+    schemes = [args.scheme] + [scheme for scheme in settings.PASSWORD_SCHEMES.split(",") if scheme.strip() != args.scheme]
+    print(f"  PASSWORD_SCHEMES={','.join(scheme.strip() for scheme in schemes)}")
+    for name, value in chosen.items():
+        print(f"  {name}={value}")
+    workers = settings.HASHING_WORKERS or os.cpu_count() or 1
+    elapsed = next(elapsed for parameters, elapsed in measured if parameters == chosen)
+    print(f"\nwith {workers} hashing workers that is about {workers / elapsed:.0f} logins/s at full load")
+
+
+def status(context: Optional[CryptContext] = None):
+    from app.db.dao import UserDao
+
+    context = context or pwd_context
+    counts = UserDao().count_password_hashes(context)
+    total = sum(counts.values())
+    current = sum(count for (_, is_current), count in counts.items() if is_current)
+    print(f"{'hash':<40} {'users':>10}  state")
+    for (description, is_current), count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"{description:<40} {count:>10}  {'current' if is_current else 'stale'}")
+    if total:
+        print(f"\n{current}/{total} hashes current ({current / total:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = commands.add_parser("calibrate", help="pick hashing costs for a target verify latency")
+    calibrate_parser.add_argument("--scheme", choices=("bcrypt", "argon2"), default="bcrypt")
+    calibrate_parser.add_argument("--target-ms", type=float, default=250.0)
+    calibrate_parser.add_argument("--max-memory-mib", type=int, default=256, help="argon2 memory ceiling per hash")
+    commands.add_parser("status", help="count stored hashes by scheme, cost and staleness")
+    args = parser.parse_args()
+    if args.command == "calibrate":
+        calibrate(args)
+    else:
+        status()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Bulk user import from CSV or JSON lines, without hashing anything.
+
+    python -m app.scripts.import_users users.csv
+    python -m app.scripts.import_users users.jsonl --batch-size 10000 --rejects rejects.jsonl
+    python -m app.scripts.import_users users.csv --checkpoint users.checkpoint
+
+Records need username, email and hashed_password, a hash in one of PASSWORD_SCHEMES;
+full_name, is_active, verified_email, id and created_at are optional. Stale hashes are
+upgraded on each user's first login. Batches are validated, staged into a temporary table
+(COPY on Postgres, executemany elsewhere) and moved into users skipping rows whose
+username, email or id already exist. Invalid and duplicate rows go to --rejects.
+
+With --checkpoint, progress is saved after every committed batch and the same command
+resumes after the last one. A batch committed just before a crash is replayed and its
+rows then report as duplicates.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, EmailStr, Field, ValidationError, field_validator
+from sqlalchemy import Column, Engine, MetaData, Table, delete, insert, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.hashing import pwd_context
+from app.models.users import User
+
+COLUMNS = (
+    "id", "email", "username", "full_name", "hashed_password",
+    "is_active", "verified_email", "created_at", "updated_at",
+)
+# COPY reads an unquoted empty CSV field as NULL and csv.writer leaves "" unquoted; no
+# staged value is NULL, so text columns are read as written (QUOTE_NOTNULL needs 3.12)
+TEXT_COLUMNS = ("email", "username", "full_name", "hashed_password")
+
+
+class ImportRecord(BaseModel):
+    email: EmailStr
+    username: str = Field(min_length=1)
+    full_name: str = ""
+    hashed_password: str
+    is_active: bool = True
+    verified_email: bool = False
+    id: UUID = Field(default_factory=uuid4)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
+
+    @field_validator("hashed_password")
+    @classmethod
+    def verifiable_hash(cls, value: str) -> str:
+        # plaintext or unknown hashes would lock the user out
+        if not pwd_context.identify(value, required=False):
+            raise ValueError("not a hash any configured password scheme can verify")
+        return value
+
+    def row(self) -> dict:
+        row = self.model_dump()
+        row["updated_at"] = row["updated_at"] or row["created_at"]
+        return row
+
+
+@dataclass
+class ImportStats:
+    records: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.records} records: {self.inserted} inserted, {self.duplicates} duplicates, "
+            f"{self.invalid} invalid in {self.seconds:.1f}s ({self.rate:.0f} records/s)"
+        )
+
+
+def read_records(path: str, format: Optional[str] = None) -> Iterator[tuple[int, dict]]:
+    """
+        Streams (record number, fields) from a CSV file with a header row or a JSON lines file
+    """
+    format = format or ("jsonl" if Path(path).suffix in (".jsonl", ".ndjson", ".json") else "csv")
+    with open(path, newline="") as source:
+        if format == "csv":
+            for number, fields in enumerate(csv.DictReader(source), start=1):
+                # empty cells take the model default
+                yield number, {name: value for name, value in fields.items() if value != ""}
+        else:
+            number = 0
+            for line in source:
+                if line.strip():
+                    number += 1
+                    yield number, json.loads(line)
+
+
+def batches(records: Iterable[tuple[int, dict]], size: int) -> Iterator[list[tuple[int, dict]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def staging_table() -> Table:
+    # same column types as users, so values bind exactly as the ORM would, but no constraints
+    columns = [Column(name, User.__table__.c[name].type) for name in COLUMNS]
+    return Table("users_import", MetaData(), *columns, prefixes=["TEMPORARY"])
+
+
+class UserImporter:
+    """
+        Loads batches of validated users through a temporary staging table. Postgres with
+        psycopg2 stages with COPY, other databases with a batched executemany.
+    """
+
+    def __init__(self, engine: Engine, rejects: Optional[TextIO] = None):
+        self.engine = engine
+        self.rejects = rejects
+        self.staging = staging_table()
+        self.use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+        self.dialect_insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+
+    def run(self, records: Iterable[tuple[int, dict]], batch_size: int, checkpoint: Optional[str] = None,
+            progress: Optional[TextIO] = None) -> ImportStats:
+        stats = load_checkpoint(checkpoint) if checkpoint else ImportStats()
+        resume_after = stats.records
+        started = time.perf_counter() - stats.seconds
+        with self.engine.connect() as connection:
+            # temporary tables live as long as the pooled connection, one may be left from a failed run
+            self.staging.create(connection, checkfirst=True)
+            connection.execute(delete(self.staging))
+            connection.commit()
+            try:
+                pending = ((number, fields) for number, fields in records if number > resume_after)
+                for batch in batches(pending, batch_size):
+                    self.load(connection, batch, stats)
+                    stats.records = batch[-1][0]
+                    stats.seconds = time.perf_counter() - started
+                    if checkpoint:
+                        save_checkpoint(checkpoint, stats)
+                    if progress:
+                        print(stats, file=progress, flush=True)
+            finally:
+                connection.rollback()
+                self.staging.drop(connection)
+                connection.commit()
+        return stats
+
+    def load(self, connection, batch: list[tuple[int, dict]], stats: ImportStats):
+        rows, numbers = [], {}
+        for number, fields in batch:
+            try:
+                record = ImportRecord.model_validate(fields)
+            except ValidationError as e:
+                stats.invalid += 1
+                errors = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                self.reject(number, fields, "invalid", errors)
+                continue
+            rows.append(record.row())
+            numbers[record.id] = number
+
+        if rows:
+            self.stage(connection, rows)
+            users = User.__table__
+            statement = self.dialect_insert(users).from_select(
+                COLUMNS, select(*(self.staging.c[name] for name in COLUMNS)).where(true())
+            ).on_conflict_do_nothing().returning(users.c.id)
+            inserted = set(connection.execute(statement).scalars())
+            connection.execute(delete(self.staging))
+            connection.commit()
+            stats.inserted += len(inserted)
+            for row in rows:
+                if row["id"] not in inserted:
+                    stats.duplicates += 1
+                    self.reject(numbers[row["id"]], row, "duplicate", "username, email or id already exists")
+
+    def stage(self, connection, rows: list[dict]):
+        if not self.use_copy:
+            connection.execute(insert(self.staging), rows)
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[name] for name in COLUMNS])
+        buffer.seek(0)
+        cursor = connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY users_import ({', '.join(COLUMNS)}) FROM STDIN"
+                f" WITH (FORMAT csv, FORCE_NOT_NULL ({', '.join(TEXT_COLUMNS)}))",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    def reject(self, number: int, fields: dict, reason: str, error: str):
+        if self.rejects is None:
+            return
+        # never echo password hashes into the rejects file
+        reject = {"record": number, "reason": reason, "error": error,
+                  "username": fields.get("username"), "email": fields.get("email")}
+        self.rejects.write(json.dumps(reject, default=str) + "\n")
+
+
+def load_checkpoint(path: str) -> ImportStats:
+    if not os.path.exists(path):
+        return ImportStats()
+    with open(path) as checkpoint:
+        return ImportStats(**json.load(checkpoint))
+
+
+def save_checkpoint(path: str, stats: ImportStats):
+    # written aside and renamed, so a crash never leaves a torn checkpoint
+    partial = f"{path}.partial"
+    with open(partial, "w") as checkpoint:
+        json.dump(asdict(stats), checkpoint)
+    os.replace(partial, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="CSV with a header row, or JSON lines")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="defaults from the file extension")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--checkpoint", help="file recording progress, resumed from when present")
+    parser.add_argument("--rejects", help="write invalid and duplicate records here as JSON lines")
+    args = parser.parse_args()
+
+    from app.db.session import engine
+
+    rejects = open(args.rejects, "a") if args.rejects else None
+    try:
+        importer = UserImporter(engine, rejects=rejects)
+        stats = importer.run(
+            read_records(args.source, args.format), args.batch_size, checkpoint=args.checkpoint, progress=sys.stderr
+        )
+    finally:
+        if rejects:
+            rejects.close()
+    print(f"done: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import base64
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+from jwt.exceptions import InvalidTokenError
+
+from app.config import settings
+
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "ES256", "RS256")
+LEGACY_ALGORITHM = "HS256"
+
+# RFC 7638 members hashed into a key's thumbprint, by key type
+THUMBPRINT_MEMBERS = {"OKP": ("crv", "kty", "x"), "EC": ("crv", "kty", "x", "y"), "RSA": ("e", "kty", "n")}
+
+
+def key_algorithm(key) -> str:
+    """
+        The JWS algorithm for a loaded private or public key
+    """
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) and isinstance(key.curve, ec.SECP256R1):
+        return "ES256"
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    raise ValueError(f"unsupported signing key type {type(key).__name__}, use Ed25519, P-256 or RSA")
+
+
+def jwk_thumbprint(jwk: dict) -> str:
+    members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk["kty"]]}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":"), sort_keys=True).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+@dataclass
+class SigningKey:
+    """
+        One key of the ring. Keys without a private half only verify,
+        e.g. the previous key kept around after a rotation.
+    """
+    kid: Optional[str]
+    algorithm: str
+    verify_key: Any
+    private_key: Any = None
+
+    @classmethod
+    def from_pem(cls, pem: bytes, kid: Optional[str] = None) -> "SigningKey":
+        """
+            Loads a private (signing) or public (verify only) PEM key. The algorithm
+            follows from the key type and the kid defaults to the RFC 7638 thumbprint.
+        """
+        if b"PRIVATE KEY" in pem:
+            private_key = load_pem_private_key(pem, password=None)
+            verify_key = private_key.public_key()
+        else:
+            private_key = None
+            verify_key = load_pem_public_key(pem)
+        algorithm = key_algorithm(verify_key)
+        jwk = jwt.get_algorithm_by_name(algorithm).to_jwk(verify_key, as_dict=True)
+        return cls(kid=kid or jwk_thumbprint(jwk), algorithm=algorithm, verify_key=verify_key, private_key=private_key)
+
+    @classmethod
+    def from_secret(cls, secret: str) -> "SigningKey":
+        # shared secret tokens carry no kid
+        return cls(kid=None, algorithm=LEGACY_ALGORITHM, verify_key=secret, private_key=secret)
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def public_jwk(self) -> dict:
+        jwk = jwt.get_algorithm_by_name(self.algorithm).to_jwk(self.verify_key, as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+@dataclass
+class KeyRing:
+    """
+        Signs every token with the active key and verifies with whichever key the
+        token's kid names, so tokens signed before a rotation stay valid for as long
+        as their key is listed. Each key only accepts its own algorithm.
+    """
+    active: SigningKey
+    verify_only: list[SigningKey] = field(default_factory=list)
+    _by_kid: dict = field(default=None, init=False, repr=False)
+    _jwks: bytes = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self._by_kid = {key.kid: key for key in [*self.verify_only, self.active]}
+        keys = [key.public_jwk() for key in self._by_kid.values() if key.is_asymmetric]
+        self._jwks = json.dumps({"keys": keys}, separators=(",", ":")).encode()
+
+    def encode(self, payload: dict) -> str:
+        headers = {"kid": self.active.kid} if self.active.kid is not None else None
+        return jwt.encode(payload, self.active.private_key, algorithm=self.active.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        """
+            Verifies `token` against the key named by its kid. Raises InvalidTokenError.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._by_kid.get(kid)
+        if key is None:
+            raise InvalidTokenError(f"unknown signing key {kid!r}")
+        return jwt.decode(token, key.verify_key, algorithms=[key.algorithm])
+
+    @property
+    def jwks(self) -> bytes:
+        """
+            Public keys as a serialized JWK set, built once since the ring does not change
+        """
+        return self._jwks
+
+
+def load_key_ring(
+        algorithm: str,
+        secret: str,
+        private_key_file: Optional[str] = None,
+        previous_key_files: Optional[str] = None,
+        verify_legacy: bool = True
+    ) -> KeyRing:
+    """
+        HS256 keeps signing with the shared secret. Otherwise the active key is read from
+        `private_key_file` and `previous_key_files` (comma separated PEM paths, public or
+        private, any supported algorithm) stay valid for verification through the
+        rotation overlap window.
+        With `verify_legacy`, HS256 tokens issued before switching still verify.
+    """
+    if algorithm == LEGACY_ALGORITHM:
+        return KeyRing(active=SigningKey.from_secret(secret))
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        raise ValueError(f"unsupported JWT algorithm {algorithm}, use one of HS256, {', '.join(ASYMMETRIC_ALGORITHMS)}")
+    if not private_key_file:
+        raise ValueError(f"JWT_PRIVATE_KEY_FILE is required for {algorithm}")
+    active = SigningKey.from_pem(Path(private_key_file).read_bytes())
+    if active.private_key is None or active.algorithm != algorithm:
+        raise ValueError(f"JWT_PRIVATE_KEY_FILE must hold a private {algorithm} key")
+    verify_only = [
+        SigningKey.from_pem(Path(path.strip()).read_bytes())
+        for path in (previous_key_files or "").split(",") if path.strip()
+    ]
+    if verify_legacy and secret:
+        verify_only.append(SigningKey.from_secret(secret))
+    return KeyRing(active=active, verify_only=verify_only)
+
+
+key_ring = load_key_ring(
+    algorithm=settings.JWT_ALGORITHM,
+    secret=settings.JWT_SECRET_KEY,
+    private_key_file=settings.JWT_PRIVATE_KEY_FILE,
+    previous_key_files=settings.JWT_PREVIOUS_KEY_FILES,
+    verify_legacy=settings.JWT_VERIFY_LEGACY_HS256,
+)
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.logger import logger
+
+
+@dataclass
+class WarmUp:
+    """
+        Runs a worker's first-request costs (connections, statement compilation, hashing
+        backend, templates) before traffic arrives. Each step is timed; a failing step is
+        logged and skipped rather than keeping the worker out of rotation. `ready` is false
+        only while a run is in progress.
+    """
+    steps: list[tuple[str, Callable[[], Awaitable]]]
+    state: str = "idle"
+    timings_ms: dict[str, float] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    _task: Optional[asyncio.Task] = field(default=None, init=False, repr=False)
+
+    @property
+    def ready(self) -> bool:
+        return self.state != "running"
+
+    def start(self) -> asyncio.Task:
+        # marked running before the task is scheduled, so no request can see a ready state early
+        self.state = "running"
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run(self):
+        self.state = "running"
+        started = time.perf_counter()
+        try:
+            for name, step in self.steps:
+                step_started = time.perf_counter()
+                try:
+                    await step()
+                except Exception as e:
+                    self.errors[name] = str(e)
+                    logger.warning(f'warm-up step {name} failed: {e}')
+                self.timings_ms[name] = (time.perf_counter() - step_started) * 1000
+                logger.info(f'warm-up step {name} took {self.timings_ms[name]:.1f}ms')
+        finally:
+            self.state = "done"
+        logger.info(f'warm-up finished in {(time.perf_counter() - started) * 1000:.1f}ms')
+
+    def status(self) -> dict:
+        return {"state": self.state, "timings_ms": self.timings_ms, "errors": self.errors}
+
+
+async def open_pool_connections():
+    from app.db.session import async_engine
+
+    # held together, so the pool has to open that many distinct connections
+    count = settings.WARMUP_DB_CONNECTIONS if settings.WARMUP_DB_CONNECTIONS is not None else settings.DB_POOL_SIZE
+    async with AsyncExitStack() as stack:
+        for _ in range(count):
+            connection = await stack.enter_async_context(async_engine.connect())
+            await connection.execute(text("SELECT 1"))
+
+
+async def compile_statements():
+    from app.db.dao import user_dao, refresh_token_dao
+    from app.db.session import async_session_maker
+
+    # lookups that match nothing, executed once to fill the engine's compiled statement cache
+    async with async_session_maker() as session:
+        await user_dao.get_one_by_username(session, username="", use_cache=False)
+        await user_dao.get_one_by_username(session, username="", with_password=True)
+        await user_dao.get_one_by_email_address(session, email_address="", use_cache=False)
+        await user_dao.get_one_by_id(session, id=UUID(int=0), use_cache=False)
+        await user_dao.page_after(session, after=UUID(int=0), limit=1)
+        await refresh_token_dao.get_by_hash(session, token_hash="")
+
+
+async def exercise_hashing():
+    from app.hashing import password_hasher
+
+    hashed_password = await password_hasher.hash("warm-up password")
+    # one verify per worker, so every process in the pool is started and has loaded bcrypt
+    await asyncio.gather(*(
+        password_hasher.verify("warm-up password", hashed_password) for _ in range(password_hasher.workers)
+    ))
+
+
+async def build_validators():
+    from app.models.auth import Token
+    from app.models.users import UserRead, UserRegistrationParameters
+
+    # the first EmailStr validation imports email-validator
+    UserRegistrationParameters(username="warmup", password="warmup", full_name="", email="warmup@example.com")
+    Token(access_token="", token_type="bearer")
+    UserRead(email="warmup@example.com", username="warmup", full_name="", id=UUID(int=0), created_at="2024-01-01T00:00:00")
+
+
+async def render_templates():
+    from app.routers.static import TEMPLATES_DIRECTORY, get_templates
+
+    environment = get_templates().env
+    for name in sorted(os.listdir(TEMPLATES_DIRECTORY)):
+        if name.endswith(".html"):
+            environment.get_template(name).render(request=None)
+
+
+warmup = WarmUp(steps=[
+    ("db_connections", open_pool_connections),
+    ("statements", compile_statements),
+    ("hashing", exercise_hashing),
+    ("validators", build_validators),
+    ("templates", render_templates),
+])
@@ -0,0 +1,5 @@
+from app.workers.email_outbox import EmailOutboxWorker
+
+__all__ = [
+    'EmailOutboxWorker',
+]
\ No newline at end of file
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.controllers.email import EmailController
+from app.db.dao.email_outbox import EmailOutboxDao
+from app.logger import logger
+from app.metrics import email_send_seconds
+from app.models.email import OutboxEmail
+from app.params import SendEmailParams
+
+
+sent_seconds = email_send_seconds.labels("sent")
+failed_seconds = email_send_seconds.labels("failed")
+
+
+@dataclass
+class EmailOutboxWorker:
+    """
+        Delivers queued emails in the background. Requests only enqueue; this worker
+        claims due emails in batches, sends them off the event loop, retries failures
+        with exponential backoff and drains what is due when the application stops.
+    """
+    outbox_dao: EmailOutboxDao
+    email_controller: EmailController
+    session_maker: async_sessionmaker
+    batch_size: int = 20
+    poll_seconds: float = 2.0
+    max_attempts: int = 8
+    backoff_seconds: float = 5.0
+    backoff_max_seconds: float = 3600.0
+    lease_seconds: float = 60.0
+    _task: Optional[asyncio.Task] = field(default=None, init=False, repr=False)
+    _wake: Optional[asyncio.Event] = field(default=None, init=False, repr=False)
+    _stopping: bool = field(default=False, init=False, repr=False)
+
+    async def enqueue(self, session: AsyncSession, params: SendEmailParams) -> OutboxEmail:
+        email = await self.outbox_dao.enqueue(session, params)
+        self.notify()
+        return email
+
+    def notify(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self, drain_seconds: float = 10.0):
+        """
+            Stops polling, then keeps sending whatever is already due for up to `drain_seconds`
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self.notify()
+        await self._task
+        self._task = None
+        deadline = time.monotonic() + drain_seconds
+        while time.monotonic() < deadline:
+            try:
+                if not await self.process_batch():
+                    break
+            except Exception as e:
+                logger.warning(f'Email outbox drain failed: {e}')
+                break
+
+    async def run(self):
+        while not self._stopping:
+            try:
+                sent = await self.process_batch()
+            except Exception as e:
+                logger.warning(f'Email outbox batch failed: {e}')
+                sent = 0
+            if sent < self.batch_size and not self._stopping:
+                # caught up, sleep until the next poll or an enqueue
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def process_batch(self) -> int:
+        """
+            Sends one batch of due emails concurrently, returning how many were claimed
+        """
+        async with self.session_maker() as session:
+            emails = await self.outbox_dao.claim_due(
+                session, limit=self.batch_size, lease=timedelta(seconds=self.lease_seconds)
+            )
+            if not emails:
+                return 0
+            results = await asyncio.gather(
+                *(self.send(email) for email in emails),
+                return_exceptions=True,
+            )
+            for email, result in zip(emails, results):
+                if isinstance(result, BaseException):
+                    await self.outbox_dao.mark_attempt_failed(
+                        session, email, error=repr(result), retry_at=self.retry_at(email)
+                    )
+                else:
+                    await self.outbox_dao.mark_sent(session, email)
+            return len(emails)
+
+    async def send(self, email: OutboxEmail):
+        # timed here on the event loop rather than inside the sending thread
+        started = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(self.email_controller.send_email, self.params_for(email))
+        except Exception:
+            failed_seconds.observe(time.perf_counter() - started)
+            raise
+        sent_seconds.observe(time.perf_counter() - started)
+        return result
+
+    def retry_at(self, email: OutboxEmail) -> Optional[datetime]:
+        attempt = email.attempts + 1
+        if attempt >= self.max_attempts:
+            return None
+        delay = min(self.backoff_seconds * 2 ** (attempt - 1), self.backoff_max_seconds)
+        return datetime.utcnow() + timedelta(seconds=delay)
+
+    @staticmethod
+    def params_for(email: OutboxEmail) -> SendEmailParams:
+        return SendEmailParams(to=email.to, subject=email.subject, content=email.content)
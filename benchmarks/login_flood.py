@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Measures /api/users/me latency on its own and while a flood of concurrent
+logins is running, to show bcrypt work no longer stalls the event loop.
+
+    python benchmarks/login_flood.py --logins 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'authfast_bench.db'}")
+os.environ.setdefault("JWT_SECRET_KEY", "bench_secret_key")
+os.environ.setdefault("ADMIN_EMAIL", "admin@bench.com")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_FULL_NAME", "Bench Admin")
+os.environ.setdefault("ADMIN_PASSWORD", "benchpassword")
+os.environ.setdefault("ADMIN_HASHED_PASSWORD", "hashed_bench_password")
+os.environ.setdefault("SENDGRID_API_KEY", "bench_sendgrid_key")
+os.environ.setdefault("APPLICATION_HOSTNAME", "http://localhost:5001")
+os.environ.setdefault("EMAIL_TRANSPORT", "fake")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from sqlmodel import SQLModel, update
+
+from app.main import app
+from app.db.session import async_engine, async_session_maker
+from app.hashing import password_hasher
+from app.models.users import User
+
+USERNAME = "benchuser"
+PASSWORD = "benchpassword123"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label: str, samples: list[float]):
+    print(
+        f"{label:<28} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * 1000:7.2f}ms "
+        f"p95={percentile(samples, 95) * 1000:7.2f}ms "
+        f"p99={percentile(samples, 99) * 1000:7.2f}ms "
+        f"mean={statistics.mean(samples) * 1000:7.2f}ms"
+    )
+
+
+async def setup(client: httpx.AsyncClient) -> str:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    response = await client.post("/api/auth/register", json={
+        "username": USERNAME,
+        "email": "bench@example.com",
+        "full_name": "Bench User",
+        "password": PASSWORD,
+    })
+    response.raise_for_status()
+    async with async_session_maker() as session:
+        await session.exec(update(User).where(User.username == USERNAME).values(verified_email=True))
+        await session.commit()
+    response = await client.post("/api/auth/login", data={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def sample_me(client: httpx.AsyncClient, token: str, stop: asyncio.Event, samples: list[float]):
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/users/me", headers=headers)
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+        await asyncio.sleep(0.005)
+
+
+async def login_flood(client: httpx.AsyncClient, logins: int, concurrency: int) -> dict[int, int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    status_codes: dict[int, int] = {}
+
+    async def login():
+        async with semaphore:
+            response = await client.post("/api/auth/login", data={"username": USERNAME, "password": PASSWORD})
+            status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return status_codes
+
+
+async def main(args: argparse.Namespace):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = await setup(client)
+
+        idle_samples: list[float] = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_me(client, token, stop, idle_samples))
+        await asyncio.sleep(args.idle_seconds)
+        stop.set()
+        await sampler
+
+        flood_samples: list[float] = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_me(client, token, stop, flood_samples))
+        started = time.perf_counter()
+        status_codes = await login_flood(client, args.logins, args.concurrency)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    print(f"hashing pool: {password_hasher.executor_type} x{password_hasher.workers}, "
+          f"queue depth {password_hasher.queue_depth}")
+    print(f"login flood: {args.logins} logins at concurrency {args.concurrency} in {elapsed:.2f}s, "
+          f"status codes {status_codes}")
+    summarize("/api/users/me idle", idle_samples)
+    summarize("/api/users/me during flood", flood_samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    asyncio.run(main(parser.parse_args()))
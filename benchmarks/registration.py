@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Compares registrations per second for the old check-then-insert flow (username
+lookup, email lookup, INSERT, re-read) against the single INSERT ... RETURNING
+used by AsyncUserDao.create_one. Password hashing is left out on purpose so the
+numbers reflect database round trips only.
+
+    python benchmarks/registration.py --users 2000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'authfast_bench.db'}")
+os.environ.setdefault("JWT_SECRET_KEY", "bench_secret_key")
+os.environ.setdefault("ADMIN_EMAIL", "admin@bench.com")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_FULL_NAME", "Bench Admin")
+os.environ.setdefault("ADMIN_PASSWORD", "benchpassword")
+os.environ.setdefault("ADMIN_HASHED_PASSWORD", "hashed_bench_password")
+os.environ.setdefault("SENDGRID_API_KEY", "bench_sendgrid_key")
+os.environ.setdefault("APPLICATION_HOSTNAME", "http://localhost:5001")
+os.environ.setdefault("EMAIL_TRANSPORT", "fake")
+
+from sqlmodel import SQLModel, select
+
+from app.db.dao import AsyncUserDao
+from app.db.session import async_engine, async_session_maker
+from app.models.users import User
+
+
+def make_user(prefix: str, i: int) -> User:
+    return User(
+        email=f"{prefix}{i}@example.com",
+        username=f"{prefix}{i}",
+        full_name="Bench User",
+        hashed_password="hashed_bench_password",
+    )
+
+
+async def legacy_register(session, user: User) -> User:
+    if (await session.exec(select(User).where(User.username == user.username).limit(1))).first():
+        raise ValueError("username taken")
+    if (await session.exec(select(User).where(User.email == user.email).limit(1))).first():
+        raise ValueError("email taken")
+    session.add(user)
+    await session.commit()
+    return (await session.exec(select(User).where(User.username == user.username).limit(1))).first()
+
+
+async def run(label: str, register, prefix: str, users: int):
+    start = time.perf_counter()
+    async with async_session_maker() as session:
+        for i in range(users):
+            await register(session, make_user(prefix, i))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {users / elapsed:9.1f} registrations/s  ({elapsed * 1000 / users:.3f}ms each)")
+
+
+async def main(args: argparse.Namespace):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    dao = AsyncUserDao()
+    await run("check then insert", legacy_register, "legacy", args.users)
+    await run("INSERT ... RETURNING", lambda session, user: dao.create_one(session, user=user), "single", args.users)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
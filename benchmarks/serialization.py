@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compares the per-request cost of rendering a user as UserRead JSON the way FastAPI
+does for `-> UserRead` routes (validate into the model, serialize, json.dumps) against
+the precompiled orjson serializer behind UserReadResponse, and the cost of loading a
+user as a full ORM row against the public column projection.
+
+    python benchmarks/serialization.py --iterations 100000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "bench_secret_key")
+os.environ.setdefault("ADMIN_EMAIL", "admin@bench.com")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_FULL_NAME", "Bench Admin")
+os.environ.setdefault("ADMIN_PASSWORD", "benchpassword")
+os.environ.setdefault("ADMIN_HASHED_PASSWORD", "hashed_bench_password")
+os.environ.setdefault("SENDGRID_API_KEY", "bench_sendgrid_key")
+os.environ.setdefault("APPLICATION_HOSTNAME", "http://localhost:5001")
+os.environ.setdefault("EMAIL_TRANSPORT", "fake")
+
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.cache.users import CachedUser
+from app.db.dao.user import lookup_statement
+from app.hashing import pwd_context
+from app.models.users import User, UserRead
+from app.responses import UserReadResponse
+
+USER = User(
+    email="bench@example.com",
+    username="benchuser",
+    full_name="Bench User",
+    hashed_password=pwd_context.hash("benchpassword"),
+)
+
+
+def per_request(fn, iterations: int) -> float:
+    return timeit.timeit(fn, number=iterations) / iterations * 1e6
+
+
+def serialization(iterations: int):
+    field = create_model_field(name="Response_read_user_me", type_=UserRead, mode="serialization")
+
+    def fastapi_default(user):
+        # the body of fastapi.routing.serialize_response, without an event loop around it
+        value, errors = field.validate(user, {}, loc=("response",))
+        assert not errors
+        return JSONResponse(field.serialize(value, mode="json", by_alias=True)).body
+
+    for name, user in (("User row", USER), ("CachedUser", CachedUser.from_user(USER))):
+        assert fastapi_default(user) == UserReadResponse(user).body
+        default = per_request(lambda: fastapi_default(user), iterations)
+        fast = per_request(lambda: UserReadResponse(user).body, iterations)
+        print(f"{name:10} response_model + JSONResponse {default:8.2f}us/request")
+        print(f"{name:10} UserReadResponse              {fast:8.2f}us/request  ({default / fast:.1f}x faster)")
+
+
+async def lookups(iterations: int):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add(User(**USER.model_dump()))
+        await session.commit()
+
+    for name, with_password in (("full row", True), ("projected", False)):
+        statement = lookup_statement("username", USER.username, with_password)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            # a fresh session per lookup, as each request gets
+            async with AsyncSession(engine) as session:
+                results = await session.exec(statement)
+                user = results.first() if with_password else CachedUser.from_row(results.first())
+        print(f"lookup {name:10}   {(time.perf_counter() - started) / iterations * 1e6:8.2f}us/request  {type(user).__name__}")
+    await engine.dispose()
+
+
+def main(args: argparse.Namespace):
+    serialization(args.iterations)
+    asyncio.run(lookups(args.iterations // 20))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Cold start time: importing app.main plus running the lifespan startup, each run in a
+fresh interpreter as an autoscaled pod would. Exits 1 when the median goes over
+--budget-ms, so CI can hold the line.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --budget-ms 1500
+    python -X importtime -c "import app.main" 2>&1 | sort -t'|' -k2 -n | tail -30   # to find out why
+
+Run from the repository root.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# runs in the child: time the import, then lifespan startup and shutdown
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def lifespan():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+    return ready
+
+ready = asyncio.run(lifespan())
+print(json.dumps({"import_ms": (imported - started) * 1000, "lifespan_ms": (ready - imported) * 1000}))
+"""
+
+
+def environment(database_url: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("JWT_SECRET_KEY", "bench_secret_key")
+    env.setdefault("ADMIN_EMAIL", "admin@bench.com")
+    env.setdefault("ADMIN_USERNAME", "admin")
+    env.setdefault("ADMIN_FULL_NAME", "Bench Admin")
+    env.setdefault("ADMIN_PASSWORD", "benchpassword")
+    env.setdefault("ADMIN_HASHED_PASSWORD", "hashed_bench_password")
+    env.setdefault("SENDGRID_API_KEY", "bench_sendgrid_key")
+    env.setdefault("APPLICATION_HOSTNAME", "http://localhost:5001")
+    env.setdefault("EMAIL_TRANSPORT", "fake")
+    env.setdefault("EMAIL_OUTBOX_WORKER_ENABLED", "false")
+    # warm-up runs in the background after startup, it is not part of the time to start serving
+    env.setdefault("WARMUP_ENABLED", "false")
+    env["DATABASE_URL"] = database_url
+    return env
+
+
+def measure(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(args: argparse.Namespace) -> int:
+    env = environment(args.database_url)
+    # schema and admin row in place first, so runs measure a restart rather than a first boot
+    subprocess.run(
+        [sys.executable, "-c", "from sqlmodel import SQLModel; from app.db.session import engine; "
+                               "import app.models; SQLModel.metadata.create_all(engine)"],
+        cwd=ROOT, env=env, check=True,
+    )
+    measure(env)
+
+    runs = [measure(env) for _ in range(args.runs)]
+    totals = [run["import_ms"] + run["lifespan_ms"] for run in runs]
+    print(f"import   median {statistics.median(run['import_ms'] for run in runs):8.1f}ms")
+    print(f"lifespan median {statistics.median(run['lifespan_ms'] for run in runs):8.1f}ms")
+    print(f"total    median {statistics.median(totals):8.1f}ms  max {max(totals):8.1f}ms  budget {args.budget_ms:.0f}ms")
+    if statistics.median(totals) > args.budget_ms:
+        print("over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2000.0, help="median import + lifespan time allowed")
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'authfast_startup.db'}"),
+    )
+    sys.exit(main(parser.parse_args()))
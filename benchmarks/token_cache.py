@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Compares the per-request cost of verifying a bearer token with a full
+jwt.decode against the verified-token cache used by get_current_user.
+
+    python benchmarks/token_cache.py --iterations 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "bench_secret_key")
+os.environ.setdefault("ADMIN_EMAIL", "admin@bench.com")
+os.environ.setdefault("ADMIN_USERNAME", "admin")
+os.environ.setdefault("ADMIN_FULL_NAME", "Bench Admin")
+os.environ.setdefault("ADMIN_PASSWORD", "benchpassword")
+os.environ.setdefault("ADMIN_HASHED_PASSWORD", "hashed_bench_password")
+os.environ.setdefault("SENDGRID_API_KEY", "bench_sendgrid_key")
+os.environ.setdefault("APPLICATION_HOSTNAME", "http://localhost:5001")
+os.environ.setdefault("EMAIL_TRANSPORT", "fake")
+
+import jwt
+
+from app.dependencies.auth import SECRET_KEY, ALGORITHM, decode_access_token, token_cache
+
+
+def main(args: argparse.Namespace):
+    token = jwt.encode(
+        {"sub": {"username": "benchuser"}, "exp": int(time.time()) + 3600},
+        SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+
+    uncached = timeit.timeit(
+        lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), number=args.iterations
+    )
+    token_cache.clear()
+    cached = timeit.timeit(lambda: decode_access_token(token), number=args.iterations)
+
+    per_uncached = uncached / args.iterations * 1e6
+    per_cached = cached / args.iterations * 1e6
+    print(f"jwt.decode           {per_uncached:8.2f}us/request")
+    print(f"decode_access_token  {per_cached:8.2f}us/request  ({per_uncached / per_cached:.1f}x faster)")
+    print(f"cache stats          {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    main(parser.parse_args())
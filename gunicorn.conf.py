@@ -0,0 +1,55 @@
+"""
+Production launcher: gunicorn supervising uvicorn workers.
+
+    gunicorn app.main:app                        # picks up this file from the working directory
+    WEB_CONCURRENCY=8 gunicorn app.main:app
+
+The app is imported once in the arbiter and workers are forked from it, so imports are
+paid once and shared copy-on-write. Each worker's lifespan only sets up what belongs to
+its process: the engine pool, hashing pool, outbox worker and warm-up. The admin user is
+bootstrapped once in the arbiter before the first fork.
+
+Workers are replaced after MAX_REQUESTS (+ up to MAX_REQUESTS_JITTER, so they do not all
+restart together) to bound memory growth. Signals to the arbiter:
+
+    HUP     start new workers, then stop the old ones once they drain (same code, since it is preloaded)
+    USR2    start a new arbiter on the new code beside the old one; then WINCH and QUIT the old
+            arbiter, or QUIT the new one to roll back. Zero-downtime code reloads in place
+    TERM    stop accepting, let in-flight requests finish within GRACEFUL_TIMEOUT, exit
+"""
+import multiprocessing
+import os
+
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '5001')}")
+preload_app = True
+
+max_requests = int(os.environ.get("MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", 1000))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.environ.get("WORKER_TIMEOUT", 60))
+keepalive = int(os.environ.get("KEEPALIVE", 5))
+
+accesslog = "-"
+errorlog = "-"
+
+# read by app.config when the app is preloaded below: the arbiter bootstraps once, and the
+# cores are shared between web workers rather than each starting a hashing process per core
+os.environ.setdefault("BOOTSTRAP_ON_STARTUP", "false")
+os.environ.setdefault("HASHING_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+
+
+def on_starting(server):
+    from app.db.session import engine
+    from app.scripts import bootstrap
+
+    bootstrap()
+    # nothing pooled in the arbiter for workers to inherit
+    engine.dispose()
+
+
+def post_fork(server, worker):
+    from app.db.session import reset_after_fork
+
+    reset_after_fork()
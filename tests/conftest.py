@@ -3,15 +3,21 @@ import asyncio
 from typing import Generator
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
 from sqlmodel import SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.main import app
 from app.config import settings
-from app.db.session import get_session_generator
+from app.db.dao import user_dao
+from app.dependencies.rate_limit import rate_limit_backend
+from app.db.session import get_session_generator, get_async_session, get_async_session_maker
 
 # Test database URL - using in-memory SQLite for tests
 TEST_DATABASE_URL = "sqlite:///./test.db"
+# Same database through the aiosqlite driver for the async request path
+TEST_ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -40,8 +46,24 @@ def client(db_session: Session):
     """Create a test client with database session override."""
     def get_session_override():
         yield db_session
+
+    # NullPool so connections never outlive the TestClient's event loop
+    async_engine = create_async_engine(TEST_ASYNC_DATABASE_URL, poolclass=NullPool)
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
     
     app.dependency_overrides[get_session_generator] = get_session_override
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    app.dependency_overrides[get_async_session_maker] = lambda: async_sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    # each test starts from an empty database, so drop cached users too
+    if user_dao.cache is not None:
+        user_dao.cache.clear()
+    # and forget earlier tests' attempts, they all come from the same client address
+    rate_limit_backend.clear()
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
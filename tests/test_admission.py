@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.admission import AdmissionController, login_admission
+
+
+async def hold(controller: AdmissionController, release: asyncio.Event, started: list):
+    async with controller.admit():
+        started.append(True)
+        await release.wait()
+
+
+class TestAdmissionController:
+    """Test concurrency limiting, queueing and rejection."""
+
+    @pytest.mark.asyncio
+    async def test_queues_beyond_limit_in_order(self):
+        """Test that requests over the limit wait and are admitted as slots free up."""
+        controller = AdmissionController(lane="test", max_concurrency=1, queue_depth=2)
+        release, started = asyncio.Event(), []
+        tasks = [asyncio.create_task(hold(controller, release, started)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        assert (controller.active, controller.queued, len(started)) == (1, 2, 1)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert (controller.active, controller.queued, len(started)) == (0, 0, 3)
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejected_with_429(self):
+        """Test that a request finding the queue full is rejected at once with Retry-After."""
+        controller = AdmissionController(lane="test", max_concurrency=1, queue_depth=1, retry_after_seconds=3)
+        release, started = asyncio.Event(), []
+        tasks = [asyncio.create_task(hold(controller, release, started)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as e:
+            async with controller.admit():
+                pass
+        assert e.value.status_code == 429
+        assert e.value.headers["Retry-After"] == "3"
+        release.set()
+        await asyncio.gather(*tasks)
+
+    @pytest.mark.asyncio
+    async def test_wait_past_deadline_rejected_with_503(self):
+        """Test that a queued request gives up with 503 at the deadline and frees its queue slot."""
+        controller = AdmissionController(lane="test", max_concurrency=1, queue_timeout_seconds=0.05)
+        release, started = asyncio.Event(), []
+        task = asyncio.create_task(hold(controller, release, started))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as e:
+            async with controller.admit():
+                pass
+        assert e.value.status_code == 503
+        assert "Retry-After" in e.value.headers
+        assert controller.queued == 0
+        release.set()
+        await task
+        assert controller.active == 0
+
+    @pytest.mark.asyncio
+    async def test_estimated_wait_over_deadline_rejected_up_front(self):
+        """Test that once service time is known, a wait that cannot meet the deadline is refused without queueing."""
+        controller = AdmissionController(lane="test", max_concurrency=1, queue_timeout_seconds=1.0)
+        controller._record(2.0)
+        release, started = asyncio.Event(), []
+        task = asyncio.create_task(hold(controller, release, started))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as e:
+            async with controller.admit():
+                pass
+        assert e.value.status_code == 503
+        assert e.value.headers["Retry-After"] == "2"
+        assert controller.queued == 0
+        release.set()
+        await task
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        """Test that a waiter cancelled (client gone) leaves the queue without taking a slot."""
+        controller = AdmissionController(lane="test", max_concurrency=1)
+        release, started = asyncio.Event(), []
+        first = asyncio.create_task(hold(controller, release, started))
+        second = asyncio.create_task(hold(controller, release, started))
+        await asyncio.sleep(0)
+
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        release.set()
+        await first
+        assert (controller.active, controller.queued, len(started)) == (0, 0, 1)
+
+    @pytest.mark.asyncio
+    async def test_timeout_racing_release_rejected_with_503(self):
+        """Test that a waiter skipped by a release after it timed out still gets a 503."""
+        controller = AdmissionController(lane="test", max_concurrency=1)
+        await controller._acquire()
+
+        async def timed_out(waiter, timeout):
+            # the timeout cancels the waiter, then the holder finishes before we resume
+            waiter.cancel()
+            controller._release()
+            raise asyncio.TimeoutError
+
+        with patch("app.admission.asyncio.wait_for", timed_out):
+            with pytest.raises(HTTPException) as e:
+                await controller._acquire()
+        assert e.value.status_code == 503
+        assert (controller.active, controller.queued) == (0, 0)
+
+
+def test_login_shed_while_other_routes_served(client: TestClient):
+    """Test that a saturated login lane rejects logins but leaves health and pages alone."""
+    with patch.object(login_admission, "_active", login_admission.max_concurrency), \
+            patch.object(login_admission, "queue_depth", 0):
+        response = client.post("/api/auth/login", data={"username": "anyone", "password": "anything"})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"]
+
+        assert client.get("/health").status_code == 200
+        assert client.get("/").status_code == 200
@@ -1,10 +1,12 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock, ANY
 from sqlmodel import Session
 
 from app.models.users import User
-from app.controllers import user_controller
+from app.controllers import user_controller, auth_controller
+from app.metrics import registry
+from app.signing import key_ring
 
 
 class TestAuthRegistration:
@@ -41,6 +43,7 @@ class TestAuthRegistration:
             
             response = client.post("/api/auth/register", json=duplicate_data)
             assert response.status_code == 400
+            assert response.json()["detail"] == f"username {test_user_data['username']} already taken"
     
     def test_register_user_duplicate_email(self, client: TestClient, test_user_data: dict):
         """Test registration with duplicate email."""
@@ -54,6 +57,7 @@ class TestAuthRegistration:
             
             response = client.post("/api/auth/register", json=duplicate_data)
             assert response.status_code == 400
+            assert response.json()["detail"] == f"user with email {test_user_data['email']} already exists"
     
     def test_register_user_invalid_email(self, client: TestClient, test_user_data: dict):
         """Test registration with invalid email format."""
@@ -127,6 +131,25 @@ class TestAuthLogin:
         response = client.post("/api/auth/login", data={})
         assert response.status_code == 422
 
+    def test_login_rehashes_stale_hash(self, client: TestClient, db_session: Session):
+        """Test that a successful login persists the replacement for a stale hash."""
+        user = User(
+            email="stale@example.com", username="stale", full_name="Stale Hash",
+            hashed_password="stale-hash", verified_email=True,
+        )
+        db_session.add(user)
+        db_session.commit()
+        rehashes = registry.get("authfast_password_rehashes_total").labels("updated")
+        before = rehashes.value
+
+        with patch.object(user_controller.password_hasher, 'verify_and_update', AsyncMock(return_value=(True, "new-hash"))):
+            response = client.post("/api/auth/login", data={"username": "stale", "password": "password"})
+
+        assert response.status_code == 200
+        db_session.refresh(user)
+        assert user.hashed_password == "new-hash"
+        assert rehashes.value == before + 1
+
 
 class TestEmailVerification:
     """Test email verification functionality."""
@@ -153,15 +176,55 @@ class TestEmailVerification:
         assert response.status_code == 400
         assert "not found" in response.json()["detail"]
     
+    def test_verify_email_link_is_single_use(self, client: TestClient, test_user_data: dict):
+        """Test that a replayed verification link is answered without touching the database."""
+        with patch.object(user_controller, 'trigger_email_verification'):
+            client.post("/api/auth/register", json=test_user_data)
+        link = user_controller.generate_email_verification_link(user=User(email=test_user_data["email"]))
+        path = link[link.index("/api/"):]
+
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.json()["username"] == test_user_data["username"]
+
+        with patch.object(auth_controller.user_dao, 'mark_email_address_verified') as mock_verify:
+            replay = client.get(path)
+
+        assert replay.status_code == 200
+        assert replay.json() == response.json()
+        mock_verify.assert_not_called()
+        # the replay answer is held without the password hash
+        jti = key_ring.decode(path.split("token=", 1)[1])["jti"]
+        assert not hasattr(auth_controller.consumed_verification_tokens.get(jti), "hashed_password")
+
+    def test_new_link_for_verified_address(self, client: TestClient, test_user_data: dict):
+        """Test that a fresh link for an already verified address returns the user without the hash."""
+        with patch.object(user_controller, 'trigger_email_verification'):
+            client.post("/api/auth/register", json=test_user_data)
+        links = [
+            user_controller.generate_email_verification_link(user=User(email=test_user_data["email"]))
+            for _ in range(2)
+        ]
+        assert client.get(links[0][links[0].index("/api/"):]).status_code == 200
+
+        response = client.get(links[1][links[1].index("/api/"):])
+
+        assert response.status_code == 200
+        assert response.json()["username"] == test_user_data["username"]
+        assert "hashed_password" not in response.json()
+
     @patch('app.controllers.auth_controller.verify_email')
     def test_verify_email_success(self, mock_verify, client: TestClient):
         """Test successful email verification."""
-        mock_verify.return_value = {"message": "Email verified successfully"}
+        mock_verify.return_value = User(
+            email="verified@example.com", username="verified", full_name="Verified User",
+            hashed_password="hash", verified_email=True,
+        )
         
         response = client.get("/api/auth/verify_email?token=valid_token")
         
         assert response.status_code == 200
-        mock_verify.assert_called_once_with(token="valid_token")
+        mock_verify.assert_called_once_with(ANY, token="valid_token")
     
     @patch('app.controllers.auth_controller.verify_email')
     def test_verify_email_invalid_token(self, mock_verify, client: TestClient):
@@ -172,4 +235,4 @@ class TestEmailVerification:
         
         # The endpoint should handle the exception appropriately
         # This depends on how the auth_controller.verify_email handles errors
-        mock_verify.assert_called_once_with(token="invalid_token") 
\ No newline at end of file
+        mock_verify.assert_called_once_with(ANY, token="invalid_token") 
\ No newline at end of file
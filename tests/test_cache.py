@@ -0,0 +1,206 @@
+import time
+import jwt
+import pytest
+from jwt.exceptions import InvalidTokenError
+
+from app.cache import TTLCache
+from app.cache.users import UserCache
+from app.models.users import User
+from app.dependencies.auth import SECRET_KEY, ALGORITHM, decode_access_token, token_cache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    """Test the bounded TTL + LRU cache."""
+
+    def test_get_and_set(self):
+        """Test basic lookups and hit/miss counters."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.hit_ratio == 0.5
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the ttl."""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.set("a", 1)
+
+        clock.now += 4.9
+        assert cache.get("a") == 1
+        clock.now += 0.1
+        assert cache.get("a") is None
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_explicit_expiry_capped_by_ttl(self):
+        """Test that the earlier of expires_at and the ttl wins."""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+        cache.set("soon", 1, expires_at=clock.now + 1)
+        cache.set("late", 2, expires_at=clock.now + 3600)
+
+        clock.now += 30
+        assert cache.get("soon") is None
+        assert cache.get("late") == 2
+        clock.now += 30
+        assert cache.get("late") is None
+
+    def test_on_evict_called_for_eviction_and_expiry(self):
+        """Test that entries dropped by the cache itself are reported, explicit pops are not."""
+        clock = FakeClock()
+        dropped = []
+        cache = TTLCache(maxsize=2, ttl=5, clock=clock, on_evict=lambda key, value: dropped.append(key))
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        cache.pop("b")
+
+        clock.now += 5
+        cache.get("c")
+
+        assert dropped == ["a", "c"]
+
+    def test_zero_size_disables_cache(self):
+        """Test that a cache with no capacity never stores anything."""
+        cache = TTLCache(maxsize=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+
+class TestUserCache:
+    """Test the user lookup cache."""
+
+    def test_put_indexes_every_key(self):
+        """Test that a cached user is reachable by id, username and email."""
+        cache = UserCache(maxsize=10)
+        user = User(email="test@example.com", username="testuser", full_name="Test User", hashed_password="hash")
+        record = cache.put(user)
+
+        assert cache.get("id", user.id) is record
+        assert cache.get("username", "testuser") is record
+        assert cache.get("email", "test@example.com") is record
+        assert not hasattr(record, "__dict__")
+
+    def test_invalidate_drops_every_key(self):
+        """Test that invalidating by one key evicts the user under all keys."""
+        cache = UserCache(maxsize=10)
+        user = User(email="test@example.com", username="testuser", full_name="Test User", hashed_password="hash")
+        cache.put(user)
+
+        cache.invalidate("email", "test@example.com")
+
+        assert cache.get("id", user.id) is None
+        assert cache.get("username", "testuser") is None
+
+    def test_eviction_drops_whole_user(self):
+        """Test that the least recently used user leaves under every key at once."""
+        cache = UserCache(maxsize=2)
+        users = [
+            User(email=f"{name}@example.com", username=name, full_name="Test User", hashed_password="hash")
+            for name in ("first", "second", "third")
+        ]
+        cache.put(users[0])
+        cache.put(users[1])
+        cache.get("username", "first")
+
+        cache.put(users[2])
+
+        assert cache.get("id", users[1].id) is None
+        assert cache.get("email", "second@example.com") is None
+        assert cache.get("email", "first@example.com") is not None
+        assert len(cache.aliases) == 4
+
+        cache.invalidate("username", "first")
+
+        assert cache.get("id", users[0].id) is None
+        assert cache.get("email", "first@example.com") is None
+
+    def test_id_accepted_as_string(self):
+        """Test that ids match whether given as a UUID or its string form."""
+        cache = UserCache(maxsize=10)
+        user = User(email="test@example.com", username="testuser", full_name="Test User", hashed_password="hash")
+        record = cache.put(user)
+
+        assert cache.get("id", str(user.id)) is record
+        assert cache.get("id", "not-a-uuid") is None
+
+        cache.invalidate("id", str(user.id))
+
+        assert cache.get("username", "testuser") is None
+        assert cache.aliases == {}
+
+    def test_changed_username_stops_resolving(self):
+        """Test that re-caching a user under a new username drops the old alias."""
+        cache = UserCache(maxsize=10)
+        user = User(email="test@example.com", username="before", full_name="Test User", hashed_password="hash")
+        cache.put(user)
+
+        user.username = "after"
+        record = cache.put(user)
+
+        assert cache.get("username", "before") is None
+        assert cache.get("username", "after") is record
+
+
+class TestTokenCache:
+    """Test the verified token cache used by get_current_user."""
+
+    def setup_method(self):
+        token_cache.clear()
+
+    def test_decode_is_cached(self):
+        """Test that a verified token is served from the cache on repeat use."""
+        token = jwt.encode({"sub": {"username": "testuser"}, "exp": int(time.time()) + 60}, SECRET_KEY, algorithm=ALGORITHM)
+        hits = token_cache.hits
+
+        assert decode_access_token(token)["sub"]["username"] == "testuser"
+        assert decode_access_token(token)["sub"]["username"] == "testuser"
+        assert token_cache.hits == hits + 1
+
+    def test_entry_expires_with_token(self):
+        """Test that cached payloads never outlive the token's exp."""
+        token = jwt.encode({"sub": {"username": "testuser"}, "exp": int(time.time()) + 60}, SECRET_KEY, algorithm=ALGORITHM)
+        decode_access_token(token)
+
+        clock = token_cache.clock
+        expirations = token_cache.expirations
+        token_cache.clock = lambda: clock() + 61
+        try:
+            decode_access_token(token)
+        finally:
+            token_cache.clock = clock
+
+        assert token_cache.expirations == expirations + 1
+
+    def test_invalid_tokens_are_not_cached(self):
+        """Test that tokens failing verification are never stored."""
+        with pytest.raises(InvalidTokenError):
+            decode_access_token("malformed.token.here")
+
+        assert len(token_cache) == 0
@@ -0,0 +1,206 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.cache import MemoryCacheBackend, RespCacheBackend, SQLiteCacheBackend
+from app.cache.invalidation import CacheInvalidator
+from app.cache.resp import RespError
+from app.cache.resp_server import RespServer
+from app.cache.users import CachedUser, UserCache
+from app.db.dao import AsyncUserDao
+from app.models.users import User
+
+
+@pytest_asyncio.fixture
+async def resp_server():
+    server = RespServer()
+    port = await server.start(port=0)
+    yield f"redis://127.0.0.1:{port}/0"
+    await server.stop()
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(params=["memory", "sqlite", "resp"])
+async def backend(request, tmp_path, resp_server):
+    if request.param == "memory":
+        backend = MemoryCacheBackend()
+    elif request.param == "sqlite":
+        backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), poll_seconds=0.01)
+    else:
+        backend = RespCacheBackend(resp_server)
+    yield backend
+    await backend.close()
+
+
+async def subscribed(backend, channel: str):
+    # start iterating, so the subscription exists before anything is published
+    subscription = backend.subscribe(channel)
+    waiting = asyncio.ensure_future(subscription.__anext__())
+    await asyncio.sleep(0.05)
+    return subscription, waiting
+
+
+class TestCacheBackends:
+    """Test the operations every shared cache backend provides."""
+
+    @pytest.mark.asyncio
+    async def test_get_and_set_many(self, backend):
+        """Test that multi-key writes are read back in key order, missing keys as None."""
+        await backend.set_many({"a": b"1", "b": b"2"})
+
+        assert await backend.get_many(["b", "missing", "a"]) == [b"2", None, b"1"]
+        assert await backend.delete("a", "missing") == 1
+        assert await backend.get_many(["a"]) == [None]
+
+    @pytest.mark.asyncio
+    async def test_ttl(self, backend):
+        """Test that entries written with a TTL disappear once it passes."""
+        await backend.set_many({"short": b"x"}, ttl=0.05)
+        await backend.set_many({"long": b"y"}, ttl=60)
+
+        await asyncio.sleep(0.1)
+
+        assert await backend.get_many(["short", "long"]) == [None, b"y"]
+
+    @pytest.mark.asyncio
+    async def test_counters_are_atomic(self, backend):
+        """Test that concurrent increments are all counted and the TTL comes from the first."""
+        results = await asyncio.gather(*(backend.incr("hits", ttl=60) for _ in range(50)))
+
+        assert sorted(results) == list(range(1, 51))
+        assert await backend.get_many(["hits"]) == [b"50"]
+        assert await backend.incr("hits", amount=5) == 55
+
+    @pytest.mark.asyncio
+    async def test_counter_restarts_after_ttl(self, backend):
+        """Test that a counter whose TTL passed starts again from zero."""
+        await backend.incr("window", amount=3, ttl=0.05)
+        await asyncio.sleep(0.1)
+
+        assert await backend.incr("window", ttl=0.05) == 1
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_subscribers(self, backend):
+        """Test that a message published on a channel reaches its subscriber only."""
+        subscription, waiting = await subscribed(backend, "invalidate")
+
+        await backend.publish("other", b"ignored")
+        await backend.publish("invalidate", b"alice")
+
+        assert await asyncio.wait_for(waiting, timeout=2) == b"alice"
+        await subscription.aclose()
+
+
+class TestRespServer:
+    """Test the bundled stand-in Redis server."""
+
+    @pytest.mark.asyncio
+    async def test_pipelined_commands(self, resp_server):
+        """Test that pipelined commands get their replies in order, errors included."""
+        client = RespCacheBackend(resp_server)
+        replies = await client.execute(("PING",), ("SET", "k", "v", "PX", 60000), ("GET", "k"), ("PTTL", "nope"))
+        assert replies == ["PONG", "OK", b"v", -2]
+        with pytest.raises(Exception, match="unknown command"):
+            await client.execute(("NOSUCHCOMMAND",))
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_password_required(self):
+        """Test that with a password only clients whose URL carries it are served."""
+        server = RespServer(password="secret")
+        port = await server.start(port=0)
+        anonymous = RespCacheBackend(f"redis://127.0.0.1:{port}/0")
+        wrong = RespCacheBackend(f"redis://:guess@127.0.0.1:{port}/0")
+        client = RespCacheBackend(f"redis://:secret@127.0.0.1:{port}/1")
+
+        with pytest.raises(RespError, match="NOAUTH"):
+            await anonymous.get_many(["k"])
+        with pytest.raises(RespError, match="WRONGPASS"):
+            await wrong.get_many(["k"])
+        await client.set_many({"k": b"v"})
+        assert await client.get_many(["k"]) == [b"v"]
+        for backend in (anonymous, wrong, client):
+            await backend.close()
+        await server.stop()
+
+
+class TestRespCacheBackend:
+    """Test the client for Redis protocol servers."""
+
+    @pytest.mark.asyncio
+    async def test_cancelled_call_does_not_leak_replies(self, resp_server):
+        """Test that a call cancelled before reading its replies leaves none for the next call."""
+        client = RespCacheBackend(resp_server)
+        await client.set_many({"a": b"1", "b": b"2"})
+
+        call = asyncio.ensure_future(client.get_many(["a"]))
+        # sent, now waiting for the reply
+        await asyncio.sleep(0)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+        assert await client.get_many(["b"]) == [b"2"]
+        await client.close()
+
+
+class TestSQLiteCacheBackend:
+    """Test the backend shared by the worker processes of one host."""
+
+    def test_reconnects_after_fork(self, tmp_path):
+        """Test that a worker forked from a preloaded app does not reuse the parent's connection."""
+        backend = SQLiteCacheBackend(str(tmp_path / "cache.db"))
+        parent = backend._connection()
+
+        with patch("app.cache.backends.os.getpid", return_value=-1):
+            child = backend._connection()
+
+        assert child is not parent
+        assert backend._incr("k", 1, None) == 1
+
+
+class TestCacheInvalidation:
+    """Test that user writes on one node evict the user on the others."""
+
+    @pytest.mark.asyncio
+    async def test_write_evicts_user_on_other_nodes(self, resp_server, async_session):
+        """Test that verifying an email on node A drops the stale copy cached on node B."""
+        nodes = []
+        for _ in range(2):
+            cache = UserCache(maxsize=10)
+            invalidator = CacheInvalidator(backend=RespCacheBackend(resp_server), cache=cache, channel="users")
+            invalidator.start()
+            nodes.append((AsyncUserDao(cache=cache, invalidator=invalidator), cache, invalidator))
+        (first, first_cache, _), (second, second_cache, _) = nodes
+        await first.create_one(async_session, user=User(
+            email="node@example.com", username="node", full_name="Node User", hashed_password="hash",
+        ))
+        assert (await second.get_one_by_username(async_session, username="node")).verified_email is False
+        await asyncio.sleep(0.05)
+
+        await first.mark_email_address_verified(async_session, email_address="node@example.com")
+        for _ in range(100):
+            if second_cache.get("username", "node") is None:
+                break
+            await asyncio.sleep(0.01)
+
+        assert second_cache.get("username", "node") is None
+        assert isinstance(first_cache.get("username", "node"), CachedUser)
+        assert (await second.get_one_by_username(async_session, username="node")).verified_email is True
+        for _, _, invalidator in nodes:
+            await invalidator.stop()
+            await invalidator.backend.close()
@@ -0,0 +1,192 @@
+import pytest
+import pytest_asyncio
+from contextlib import contextmanager
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.cache.users import CachedUser, UserCache
+from app.db.dao import AsyncUserDao, UserConflictError, UserDao
+from app.db.session import to_async_url
+from app.models.users import User
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    """Create an aiosqlite session on a fresh in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.fixture
+def sync_sessions(monkeypatch):
+    """Point UserDao's session_scope at a fresh in-memory database."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    @contextmanager
+    def session_scope():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr("app.db.dao.user.session_scope", session_scope)
+    yield
+    engine.dispose()
+
+
+def make_user(**overrides) -> User:
+    fields = {
+        "email": "test@example.com",
+        "username": "testuser",
+        "full_name": "Test User",
+        "hashed_password": "hashed_password_here",
+    }
+    fields.update(overrides)
+    return User(**fields)
+
+
+class TestAsyncUserDao:
+    """Test the async user data access layer."""
+
+    @pytest.mark.asyncio
+    async def test_create_and_lookup(self, async_session: AsyncSession):
+        """Test creating a user and reading it back by each key."""
+        dao = AsyncUserDao()
+        created = await dao.create_one(async_session, user=make_user())
+
+        assert created.username == "testuser"
+        assert (await dao.get_one_by_id(async_session, id=created.id)).username == "testuser"
+        assert (await dao.get_one_by_username(async_session, username="testuser")).id == created.id
+        assert (await dao.get_one_by_email_address(async_session, email_address="test@example.com")).id == created.id
+        assert await dao.get_one_by_username(async_session, username="nobody") is None
+
+    @pytest.mark.asyncio
+    async def test_mark_email_address_verified(self, async_session: AsyncSession):
+        """Test marking an email address as verified."""
+        dao = AsyncUserDao()
+        await dao.create_one(async_session, user=make_user())
+
+        user = await dao.mark_email_address_verified(async_session, email_address="test@example.com")
+
+        assert user.verified_email is True
+        # only the public columns come back from the update
+        assert not hasattr(user, "hashed_password")
+
+    @pytest.mark.asyncio
+    async def test_mark_email_address_verified_is_idempotent(self, async_session: AsyncSession):
+        """Test that verifying an already verified address returns the user without writing."""
+        dao = AsyncUserDao()
+        await dao.create_one(async_session, user=make_user())
+        first = await dao.mark_email_address_verified(async_session, email_address="test@example.com")
+
+        second = await dao.mark_email_address_verified(async_session, email_address="test@example.com")
+
+        assert second.verified_email is True
+        assert second.updated_at == first.updated_at
+        assert await dao.mark_email_address_verified(async_session, email_address="nobody@example.com") is None
+
+    @pytest.mark.asyncio
+    async def test_create_duplicate_username(self, async_session: AsyncSession):
+        """Test that a duplicate username is reported by the insert itself."""
+        dao = AsyncUserDao()
+        await dao.create_one(async_session, user=make_user())
+
+        with pytest.raises(UserConflictError) as e:
+            await dao.create_one(async_session, user=make_user(email="other@example.com"))
+
+        assert e.value.column == "username"
+
+    @pytest.mark.asyncio
+    async def test_create_duplicate_email(self, async_session: AsyncSession):
+        """Test that a duplicate email is reported by the insert itself."""
+        dao = AsyncUserDao()
+        await dao.create_one(async_session, user=make_user())
+
+        with pytest.raises(UserConflictError) as e:
+            await dao.create_one(async_session, user=make_user(username="otheruser"))
+
+        assert e.value.column == "email"
+        # the session is usable again after the rollback
+        assert (await dao.get_one_by_username(async_session, username="testuser")) is not None
+
+
+class TestUserDao:
+    """Test the sync user data access layer used by scripts."""
+
+    def test_create_one(self, sync_sessions):
+        """Test that the created user is returned once its session has closed."""
+        user = UserDao().create_one(make_user())
+
+        assert user.username == "testuser"
+        assert user.id is not None
+
+    def test_mark_email_address_verified(self, sync_sessions):
+        """Test that the verified user is readable on the first and repeated verification."""
+        dao = UserDao()
+        dao.create_one(make_user())
+
+        first = dao.mark_email_address_verified(email_address="test@example.com")
+        second = dao.mark_email_address_verified(email_address="test@example.com")
+
+        assert first.verified_email is True and first.username == "testuser"
+        assert not hasattr(first, "hashed_password")
+        assert second.verified_email is True
+        assert dao.mark_email_address_verified(email_address="nobody@example.com") is None
+
+
+def test_to_async_url():
+    """Test that sync database URLs map onto async drivers."""
+    assert to_async_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert to_async_url("postgresql+asyncpg://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+class TestCachedUserDao:
+    """Test user lookups served through the UserCache."""
+
+    @pytest.mark.asyncio
+    async def test_lookups_hit_cache(self, async_session: AsyncSession):
+        """Test that repeat lookups by any key are served from the cache."""
+        cache = UserCache(maxsize=10)
+        dao = AsyncUserDao(cache=cache)
+        created = await dao.create_one(async_session, user=make_user())
+
+        by_username = await dao.get_one_by_username(async_session, username="testuser")
+        by_email = await dao.get_one_by_email_address(async_session, email_address="test@example.com")
+        by_id = await dao.get_one_by_id(async_session, id=created.id)
+
+        assert isinstance(by_username, CachedUser)
+        assert by_username is by_email is by_id
+        assert not hasattr(by_username, "hashed_password")
+        assert cache.stats()["hits"] == 3
+
+    @pytest.mark.asyncio
+    async def test_only_password_lookup_reads_hash(self, async_session: AsyncSession):
+        """Test that lookups leave the hash in the database unless asked for it."""
+        dao = AsyncUserDao(cache=UserCache(maxsize=10))
+        await dao.create_one(async_session, user=make_user())
+
+        uncached = await dao.get_one_by_username(async_session, username="testuser", use_cache=False)
+        user = await dao.get_one_by_username(async_session, username="testuser", with_password=True)
+
+        assert isinstance(uncached, CachedUser) and not hasattr(uncached, "hashed_password")
+        assert isinstance(user, User)
+        assert user.hashed_password == "hashed_password_here"
+
+    @pytest.mark.asyncio
+    async def test_verification_updates_cache(self, async_session: AsyncSession):
+        """Test that marking an email verified writes through to every cache key."""
+        dao = AsyncUserDao(cache=UserCache(maxsize=10))
+        await dao.create_one(async_session, user=make_user())
+        assert (await dao.get_one_by_username(async_session, username="testuser")).verified_email is False
+
+        await dao.mark_email_address_verified(async_session, email_address="test@example.com")
+
+        assert (await dao.get_one_by_username(async_session, username="testuser")).verified_email is True
+        assert (await dao.get_one_by_email_address(async_session, email_address="test@example.com")).verified_email is True
@@ -0,0 +1,133 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.controllers.email import EmailController, FakeEmailClient
+from app.db.dao.email_outbox import EmailOutboxDao
+from app.models.email import OutboxEmail
+from app.params import SendEmailParams
+from app.workers import EmailOutboxWorker
+
+
+class FlakyEmailClient(FakeEmailClient):
+    """Fails the first `failures` sends, then records messages."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def send(self, message):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("provider unavailable")
+        return super().send(message)
+
+
+@pytest_asyncio.fixture
+async def session_maker():
+    """Create an aiosqlite session factory on a fresh in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def make_worker(session_maker, client, **overrides) -> EmailOutboxWorker:
+    options = dict(batch_size=10, max_attempts=3, backoff_seconds=60, poll_seconds=0.01)
+    options.update(overrides)
+    return EmailOutboxWorker(
+        outbox_dao=EmailOutboxDao(),
+        email_controller=EmailController(client=client, from_email="admin@example.com"),
+        session_maker=session_maker,
+        **options,
+    )
+
+
+async def all_emails(session_maker) -> list[OutboxEmail]:
+    async with session_maker() as session:
+        return (await session.exec(select(OutboxEmail))).all()
+
+
+class TestEmailOutboxWorker:
+    """Test background delivery of queued emails."""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_then_deliver_batch(self, session_maker):
+        """Test that enqueued emails are only sent by the worker."""
+        client = FakeEmailClient()
+        worker = make_worker(session_maker, client)
+        async with session_maker() as session:
+            for i in range(3):
+                await worker.enqueue(session, SendEmailParams(to=f"user{i}@example.com", subject="hi", content="hello"))
+
+        assert client.sent == []
+        assert await worker.process_batch() == 3
+        assert len(client.sent) == 3
+        assert {email.status for email in await all_emails(session_maker)} == {"sent"}
+        assert await worker.process_batch() == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_send_is_retried_with_backoff(self, session_maker):
+        """Test that a failed send is rescheduled with exponential backoff."""
+        client = FlakyEmailClient(failures=1)
+        worker = make_worker(session_maker, client)
+        async with session_maker() as session:
+            await worker.enqueue(session, SendEmailParams(to="user@example.com"))
+
+        before = datetime.utcnow()
+        await worker.process_batch()
+        [email] = await all_emails(session_maker)
+
+        assert email.status == "pending"
+        assert email.attempts == 1
+        assert "provider unavailable" in email.last_error
+        assert email.next_attempt_at >= before + timedelta(seconds=60)
+        # not due yet, so the next batch leaves it alone
+        assert await worker.process_batch() == 0
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self, session_maker):
+        """Test that an email is marked failed once attempts are exhausted."""
+        client = FlakyEmailClient(failures=10)
+        worker = make_worker(session_maker, client, max_attempts=2, backoff_seconds=0)
+        async with session_maker() as session:
+            await worker.enqueue(session, SendEmailParams(to="user@example.com"))
+
+        await worker.process_batch()
+        await worker.process_batch()
+        [email] = await all_emails(session_maker)
+
+        assert email.status == "failed"
+        assert email.attempts == 2
+        assert await worker.process_batch() == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_due_emails(self, session_maker):
+        """Test that stopping the worker still delivers emails already due."""
+        client = FakeEmailClient()
+        worker = make_worker(session_maker, client, poll_seconds=60)
+        worker.start()
+        worker._stopping = True
+        async with session_maker() as session:
+            await worker.outbox_dao.enqueue(session, SendEmailParams(to="user@example.com"))
+
+        await worker.stop(drain_seconds=5)
+
+        assert len(client.sent) == 1
+
+
+def test_register_enqueues_verification_email(client: TestClient, db_session: Session, test_user_data: dict):
+    """Test that registration returns without sending, leaving the email in the outbox."""
+    response = client.post("/api/auth/register", json=test_user_data)
+
+    assert response.status_code == 201
+    [email] = db_session.exec(select(OutboxEmail)).all()
+    assert email.to == test_user_data["email"]
+    assert email.status == "pending"
+    assert "/api/auth/verify_email?token=" in email.content
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+
+from app.hashing import PasswordHasher, build_context, describe_hash
+from app.scripts.hashing import calibrate_bcrypt
+
+
+class TestPasswordHasher:
+    """Test the bounded password hashing pool."""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify_round_trip(self):
+        """Test that a hash produced by the pool verifies against the original password."""
+        hasher = PasswordHasher(executor_type="thread", workers=1, queue_depth=1)
+        try:
+            hashed = await hasher.hash("testpassword123")
+
+            assert hashed != "testpassword123"
+            assert await hasher.verify("testpassword123", hashed) is True
+            assert await hasher.verify("wrongpassword", hashed) is False
+            assert hasher.in_flight == 0
+        finally:
+            hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_process_pool_round_trip(self):
+        """Test hashing in worker processes."""
+        hasher = PasswordHasher(executor_type="process", workers=1, queue_depth=1)
+        try:
+            hashed = await hasher.hash("testpassword123")
+            assert await hasher.verify("testpassword123", hashed) is True
+        finally:
+            hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_rejects_with_503(self):
+        """Test that calls beyond workers + queue depth fail fast."""
+        hasher = PasswordHasher(executor_type="thread", workers=1, queue_depth=1, retry_after_seconds=2)
+        try:
+            in_flight = [asyncio.ensure_future(hasher.hash("password")) for _ in range(2)]
+            await asyncio.sleep(0)
+
+            with pytest.raises(HTTPException) as exc_info:
+                await hasher.hash("password")
+
+            assert exc_info.value.status_code == 503
+            assert exc_info.value.headers["Retry-After"] == "2"
+            await asyncio.gather(*in_flight)
+            assert hasher.in_flight == 0
+        finally:
+            hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_keeps_slot_until_job_ends(self):
+        """Test that a job whose caller was cancelled still counts against capacity while it runs."""
+        hasher = PasswordHasher(executor_type="thread", workers=1, queue_depth=0)
+        release = threading.Event()
+        try:
+            with patch("app.hashing._hash", lambda password: release.wait()):
+                call = asyncio.ensure_future(hasher.hash("password"))
+                await asyncio.sleep(0.05)
+                call.cancel()
+                await asyncio.gather(call, return_exceptions=True)
+
+                assert hasher.in_flight == 1
+                with pytest.raises(HTTPException) as exc_info:
+                    await hasher.hash("password")
+                assert exc_info.value.status_code == 503
+
+                release.set()
+                for _ in range(100):
+                    if hasher.in_flight == 0:
+                        break
+                    await asyncio.sleep(0.01)
+                assert hasher.in_flight == 0
+        finally:
+            release.set()
+            hasher.shutdown()
+
+    def test_workers_default_to_cpu_count(self):
+        """Test that the pool is sized to the machine when workers is not configured."""
+        hasher = PasswordHasher()
+
+        assert hasher.workers >= 1
+        assert hasher.capacity == hasher.workers + hasher.queue_depth
+
+
+class TestHashPolicy:
+    """Test hash cost policy, staleness and calibration."""
+
+    def test_weaker_bcrypt_hashes_need_update(self):
+        """Test that hashes below the configured rounds are stale and stronger ones are kept."""
+        context = build_context(["bcrypt"], bcrypt_rounds=5)
+
+        assert context.needs_update(build_context(["bcrypt"], bcrypt_rounds=4).hash("password"))
+        assert not context.needs_update(context.hash("password"))
+        assert not context.needs_update(build_context(["bcrypt"], bcrypt_rounds=6).hash("password"))
+
+    def test_describe_hash(self):
+        """Test that stored hashes are described by scheme and cost."""
+        context = build_context(["bcrypt"], bcrypt_rounds=5)
+
+        assert describe_hash(context, context.hash("password")) == ("bcrypt rounds=5", True)
+        assert describe_hash(context, build_context(["bcrypt"], bcrypt_rounds=4).hash("password")) == ("bcrypt rounds=4", False)
+        assert describe_hash(context, "not-a-hash") == ("unrecognized", False)
+
+    @pytest.mark.asyncio
+    async def test_verify_and_update_returns_replacement(self):
+        """Test that verifying a stale hash also returns a current replacement."""
+        context = build_context(["bcrypt"], bcrypt_rounds=5)
+        stale = build_context(["bcrypt"], bcrypt_rounds=4).hash("password")
+        hasher = PasswordHasher(executor_type="thread", workers=1, queue_depth=1)
+        try:
+            with patch("app.hashing.pwd_context", context):
+                valid, new_hash = await hasher.verify_and_update("password", stale)
+                assert await hasher.verify_and_update("password", new_hash) == (True, None)
+                assert await hasher.verify_and_update("wrong", stale) == (False, None)
+        finally:
+            hasher.shutdown()
+
+        assert valid is True
+        assert describe_hash(context, new_hash) == ("bcrypt rounds=5", True)
+
+    def test_calibrate_bcrypt_picks_highest_rounds_within_target(self):
+        """Test that calibration stops past the target and keeps the last cost within it."""
+        def measure(context):
+            # ~0.1ms per unit of work, doubling per round
+            return 2 ** context.handler("bcrypt").default_rounds * 0.0001
+
+        chosen, measured = calibrate_bcrypt(target_seconds=0.25, measure=measure)
+
+        assert chosen == {"BCRYPT_ROUNDS": 11}
+        assert [parameters["BCRYPT_ROUNDS"] for parameters, _ in measured] == [10, 11, 12]
+
+    def test_calibrate_never_goes_below_minimum(self):
+        """Test that an over-budget host still gets the minimum cost, not something weaker."""
+        chosen, _ = calibrate_bcrypt(target_seconds=0.001, measure=lambda context: 1.0)
+
+        assert chosen == {"BCRYPT_ROUNDS": 10}
@@ -0,0 +1,171 @@
+import csv
+import io
+import json
+import re
+import sqlite3
+from uuid import UUID
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+from app.hashing import pwd_context
+from app.models.users import User
+from app.scripts.import_users import UserImporter, load_checkpoint, read_records
+
+HASH = pwd_context.hash("importedpassword")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+class CopyCursor:
+    """
+        sqlite3 cursor that also takes psycopg2's copy_expert, reading the CSV the way
+        Postgres does: an unquoted empty field is NULL unless its column is FORCE_NOT_NULL
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def copy_expert(self, sql: str, file: io.StringIO):
+        match = re.fullmatch(r"COPY (\w+) \(([^)]*)\) FROM STDIN WITH \(FORMAT csv(?:, FORCE_NOT_NULL \(([^)]*)\))?\)", sql)
+        table, columns = match[1], match[2].split(", ")
+        not_null = set(match[3].split(", ")) if match[3] else set()
+        data = file.read()
+        rows = []
+        # test values never hold commas, so a plain split shows which fields were quoted
+        for line, values in zip(data.splitlines(), csv.reader(io.StringIO(data))):
+            raw = line.split(",")
+            rows.append([
+                None if raw[i] == "" and column not in not_null else sqlite_value(column, values[i])
+                for i, column in enumerate(columns)
+            ])
+        self.cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows
+        )
+
+
+class CopyConnection:
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def cursor(self, *args):
+        return CopyCursor(self.connection.cursor(*args))
+
+
+def sqlite_value(column: str, value: str):
+    # stored the way SQLAlchemy binds these types on SQLite
+    if column == "id":
+        return UUID(value).hex
+    if column in ("is_active", "verified_email"):
+        return int(value == "True")
+    return value
+
+
+def write_csv(path, rows: list[dict]) -> str:
+    header = ["username", "email", "full_name", "hashed_password", "verified_email"]
+    lines = [",".join(header)] + [",".join(str(row.get(name, "")) for name in header) for row in rows]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def user_rows(count: int, prefix: str = "imported") -> list[dict]:
+    return [
+        {"username": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "full_name": "Imported User",
+         "hashed_password": HASH, "verified_email": "true"}
+        for i in range(count)
+    ]
+
+
+class TestUserImport:
+    """Test bulk importing users with pre-hashed passwords."""
+
+    def test_import_csv(self, engine, tmp_path):
+        """Test that every valid record lands in users with its hash untouched."""
+        source = write_csv(tmp_path / "users.csv", user_rows(25))
+
+        stats = UserImporter(engine).run(read_records(source), batch_size=10)
+
+        assert (stats.records, stats.inserted, stats.duplicates, stats.invalid) == (25, 25, 0, 0)
+        with Session(engine) as session:
+            users = session.exec(select(User)).all()
+        assert len(users) == 25
+        assert all(user.verified_email and user.hashed_password == HASH for user in users)
+        assert pwd_context.verify("importedpassword", users[0].hashed_password)
+
+    def test_import_jsonl_rejects_invalid_and_duplicates(self, engine, tmp_path):
+        """Test that bad rows and clashes with existing users are skipped and reported without hashes."""
+        with Session(engine) as session:
+            session.add(User(username="taken", email="taken@example.com", full_name="", hashed_password=HASH))
+            session.commit()
+        rows = user_rows(3) + [
+            {"username": "taken", "email": "other@example.com", "hashed_password": HASH},
+            {"username": "plain", "email": "plain@example.com", "hashed_password": "hunter2"},
+            {"username": "bademail", "email": "not-an-email", "hashed_password": HASH},
+            {"username": "imported0", "email": "again@example.com", "hashed_password": HASH},
+        ]
+        source = tmp_path / "users.jsonl"
+        source.write_text("".join(json.dumps(row) + "\n" for row in rows))
+        rejects = io.StringIO()
+
+        stats = UserImporter(engine, rejects=rejects).run(read_records(str(source)), batch_size=100)
+
+        assert (stats.inserted, stats.duplicates, stats.invalid) == (3, 2, 2)
+        reported = [json.loads(line) for line in rejects.getvalue().splitlines()]
+        assert {(reject["username"], reject["reason"]) for reject in reported} == {
+            ("taken", "duplicate"), ("imported0", "duplicate"), ("plain", "invalid"), ("bademail", "invalid"),
+        }
+        assert "hunter2" not in rejects.getvalue() and HASH not in rejects.getvalue()
+
+    def test_resume_from_checkpoint(self, engine, tmp_path):
+        """Test that a rerun skips batches recorded in the checkpoint."""
+        source = write_csv(tmp_path / "users.csv", user_rows(30))
+        checkpoint = str(tmp_path / "users.checkpoint")
+
+        def interrupted():
+            for number, fields in read_records(source):
+                if number > 20:
+                    raise KeyboardInterrupt
+                yield number, fields
+
+        with pytest.raises(KeyboardInterrupt):
+            UserImporter(engine).run(interrupted(), batch_size=10, checkpoint=checkpoint)
+        assert load_checkpoint(checkpoint).records == 20
+
+        stats = UserImporter(engine).run(read_records(source), batch_size=10, checkpoint=checkpoint)
+
+        assert (stats.records, stats.inserted, stats.duplicates) == (30, 30, 0)
+        with Session(engine) as session:
+            assert len(session.exec(select(User)).all()) == 30
+
+    def test_copy_keeps_empty_full_name(self, tmp_path):
+        """Test that COPY staging loads a record without a full name as "" rather than NULL."""
+        path = tmp_path / "copy.db"
+        engine = create_engine(f"sqlite:///{path}", creator=lambda: CopyConnection(sqlite3.connect(path)))
+        SQLModel.metadata.create_all(engine)
+        rows = user_rows(3)
+        del rows[0]["full_name"]
+        importer = UserImporter(engine)
+        importer.use_copy = True
+
+        stats = importer.run(read_records(write_csv(tmp_path / "users.csv", rows)), batch_size=10)
+
+        assert (stats.inserted, stats.duplicates, stats.invalid) == (3, 0, 0)
+        with Session(engine) as session:
+            users = {user.username: user for user in session.exec(select(User))}
+        assert users["imported0"].full_name == ""
+        assert users["imported1"].full_name == "Imported User"
+        assert users["imported1"].verified_email is True
+        engine.dispose()
@@ -0,0 +1,87 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.controllers import user_controller
+from app.metrics import registry
+from app.metrics.registry import Registry
+
+
+class TestRegistry:
+    """Test the in-process metrics registry and its text format."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that observations land in the first bucket they fit and render cumulatively."""
+        metrics = Registry()
+        histogram = metrics.histogram("stage_seconds", "Stage latency", labelnames=("stage",), buckets=(0.1, 1.0))
+        child = histogram.labels("parse")
+        for value in (0.05, 0.1, 0.5, 5.0):
+            child.observe(value)
+
+        text = metrics.render()
+
+        assert '# TYPE stage_seconds histogram' in text
+        assert 'stage_seconds_bucket{stage="parse",le="0.1"} 2' in text
+        assert 'stage_seconds_bucket{stage="parse",le="1.0"} 3' in text
+        assert 'stage_seconds_bucket{stage="parse",le="+Inf"} 4' in text
+        assert 'stage_seconds_count{stage="parse"} 4' in text
+        assert 'stage_seconds_sum{stage="parse"} 5.65' in text
+
+    def test_labels_return_the_same_child(self):
+        """Test that label children are created once and reused."""
+        metrics = Registry()
+        counter = metrics.counter("events_total", "Events", labelnames=("kind",))
+
+        counter.labels("a").inc()
+        counter.labels("a").inc(2)
+
+        assert counter.labels("a") is counter.labels("a")
+        assert 'events_total{kind="a"} 3' in metrics.render()
+        with pytest.raises(ValueError):
+            counter.labels("a", "b")
+
+    def test_callback_metrics_read_at_render(self):
+        """Test that callback metrics are collected when rendered and label values escaped."""
+        metrics = Registry()
+        values = {"size": 1}
+        metrics.callback("pool", "Pool", lambda: [(('say "hi"',), values["size"])], labelnames=("name",))
+        values["size"] = 7
+
+        assert 'pool{name="say \\"hi\\""} 7' in metrics.render()
+
+    def test_duplicate_names_rejected(self):
+        """Test that a metric name can only be registered once."""
+        metrics = Registry()
+        metrics.counter("events_total", "Events")
+        with pytest.raises(ValueError):
+            metrics.counter("events_total", "Events")
+
+
+class TestMetricsEndpoint:
+    """Test the /metrics endpoint and request instrumentation."""
+
+    def test_requests_labelled_by_route_template(self, client: TestClient):
+        """Test that requests are recorded under their route template, not the raw path."""
+        histogram = registry.get("authfast_http_request_seconds")
+        child = histogram.labels("/health", "GET", "200")
+        before = sum(child.counts)
+
+        client.get("/health")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert sum(child.counts) == before + 1
+        assert 'authfast_http_request_seconds_count{route="/health",method="GET",status="200"}' in response.text
+
+    def test_stage_metrics_and_pool_gauges(self, client: TestClient, test_user_data: dict):
+        """Test that a registration records hashing, query and JWT timings next to the pool gauges."""
+        with patch.object(user_controller, 'trigger_email_verification'):
+            client.post("/api/auth/register", json=test_user_data)
+
+        text = client.get("/metrics").text
+
+        assert 'authfast_password_hashing_seconds_count{operation="hash"}' in text
+        assert 'authfast_db_query_seconds_count{query="user.insert"}' in text
+        assert 'authfast_db_pool_connections{engine="async",state="checked_out"}' in text
+        assert 'authfast_cache_lookups_total{cache="tokens",result="hit"}' in text
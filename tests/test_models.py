@@ -8,6 +8,8 @@ from app.models.users import (
     EmailVerificationParameters
 )
 from app.models.auth import Token
+from app.cache.users import CachedUser
+from app.responses import dump_user_read
 
 
 class TestUserModels:
@@ -90,6 +92,18 @@ class TestUserModels:
         assert user_read.is_active is True
         assert user_read.id == "123e4567-e89b-12d3-a456-426614174000"
         assert isinstance(user_read.created_at, datetime)
+
+    def test_dump_user_read_matches_model(self):
+        """Test that the fast UserRead serializer writes what the model would, without the hash."""
+        user = User(
+            email="test@example.com", username="testuser", full_name="Test User",
+            hashed_password="hashed_password_here", created_at=datetime(2024, 1, 2, 3, 4, 5, 678901),
+        )
+        expected = UserRead.model_validate(user, from_attributes=True).model_dump_json().encode()
+
+        assert dump_user_read(user) == expected
+        assert dump_user_read(CachedUser.from_user(user)) == expected
+        assert b"hashed_password" not in dump_user_read(user)
     
     def test_user_registration_parameters(self):
         """Test UserRegistrationParameters model."""
@@ -0,0 +1,155 @@
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.cache import RespCacheBackend, SQLiteCacheBackend
+from app.cache.resp_server import RespServer
+from app.dependencies.rate_limit import rate_limiter
+from app.hashing import password_hasher
+from app.ratelimit import CacheSketchBackend, MemoryBackend, Rule, SlidingWindowLimiter
+from app.ratelimit.sketch import WINDOW_BUCKETS
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def limiter(backend, clock: Clock, limit: int = 3, width: int = 1024) -> SlidingWindowLimiter:
+    return SlidingWindowLimiter(
+        backend=backend,
+        rules=[Rule("login", limit=limit, window_seconds=60)],
+        width=width,
+        depth=4,
+        secret=b"test",
+        clock=clock,
+    )
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest_asyncio.fixture(params=["memory", "sqlite", "resp"])
+async def backend(request, tmp_path, clock):
+    if request.param == "memory":
+        yield MemoryBackend()
+        return
+    # the caches expire cells on the limiter's clock
+    server = RespServer(clock=clock)
+    if request.param == "sqlite":
+        cache = SQLiteCacheBackend(str(tmp_path / "cache.db"), clock=clock)
+    else:
+        cache = RespCacheBackend(f"redis://127.0.0.1:{await server.start(port=0)}/0")
+    yield CacheSketchBackend(cache)
+    await cache.close()
+    await server.stop()
+
+
+class TestSlidingWindowLimiter:
+    """Test the sketch-backed sliding window."""
+
+    def test_parse_rule(self):
+        """Test reading limits from settings strings."""
+        assert Rule.parse("login", "10/minute") == Rule("login", limit=10, window_seconds=60)
+        assert Rule.parse("login", "3 / hours").window_seconds == 3600
+        with pytest.raises(ValueError):
+            Rule.parse("login", "10 per minute")
+
+    @pytest.mark.asyncio
+    async def test_limit_per_key(self, backend, clock):
+        """Test that each key gets its own budget and the excess is rejected with a retry hint."""
+        rate_limiter = limiter(backend, clock)
+
+        assert [(await rate_limiter.hit("login", "alice"))[0] for _ in range(4)] == [True, True, True, False]
+        assert await rate_limiter.hit("login", "bob") == (True, 0)
+        allowed, retry_after = await rate_limiter.hit("login", "alice")
+        assert not allowed
+        assert 1 <= retry_after <= 60 / WINDOW_BUCKETS
+
+    @pytest.mark.asyncio
+    async def test_window_slides(self, backend, clock):
+        """Test that hits age out one sub-window at a time, rejected ones included."""
+        clock.now = 0.0
+        rate_limiter = limiter(backend, clock, limit=2)
+        await rate_limiter.hit("login", "alice")
+        clock.now = 30.0
+        await rate_limiter.hit("login", "alice")
+
+        clock.now = 59.0
+        assert not (await rate_limiter.hit("login", "alice"))[0]
+        clock.now = 91.0
+        assert (await rate_limiter.hit("login", "alice"))[0]
+
+    @pytest.mark.asyncio
+    async def test_memory_is_fixed(self):
+        """Test that a flood of distinct keys neither grows memory nor blocks a quiet key."""
+        backend = MemoryBackend()
+        rate_limiter = limiter(backend, Clock(), limit=5, width=4096)
+        size = None
+        for i in range(20_000):
+            await rate_limiter.hit("login", f"attacker{i}")
+            if size is None:
+                size = backend._counts["login"].buffer_info()[1]
+
+        assert backend._counts["login"].buffer_info()[1] == size == 4096 * 4 * WINDOW_BUCKETS
+        assert (await rate_limiter.hit("login", "alice"))[0]
+
+    @pytest.mark.asyncio
+    async def test_cache_shared_between_workers(self, tmp_path, clock):
+        """Test that two limiters on one shared cache see each other's hits."""
+        path = str(tmp_path / "cache.db")
+        first = limiter(CacheSketchBackend(SQLiteCacheBackend(path, clock=clock)), clock)
+        second = limiter(CacheSketchBackend(SQLiteCacheBackend(path, clock=clock)), clock)
+
+        await first.hit("login", "alice")
+        await first.hit("login", "alice")
+        await second.hit("login", "alice")
+
+        assert not (await second.hit("login", "alice"))[0]
+
+    @pytest.mark.asyncio
+    async def test_cache_cells_expire_with_their_slot(self, tmp_path, clock):
+        """Test that a slot's cells are gone once it leaves the window, so keys stay bounded."""
+        cache = SQLiteCacheBackend(str(tmp_path / "cache.db"), clock=clock)
+        backend = CacheSketchBackend(cache)
+        rate_limiter = limiter(backend, clock)
+        await rate_limiter.hit("login", "alice")
+        keys = [backend._key("login", int(clock.now // 10) % WINDOW_BUCKETS, row, col)
+                for row, col in enumerate(rate_limiter.columns("login:alice"))]
+
+        clock.now += 59.0 - clock.now % 10
+        assert await cache.get_many(keys) == [b"1"] * 4
+        clock.now += 1.0
+        assert await cache.get_many(keys) == [None] * 4
+
+
+class TestRateLimitedRoutes:
+    """Test that limited requests are turned away before any expensive work."""
+
+    def test_login_rejected_before_hashing(self, client: TestClient):
+        """Test that logins past the per-username limit get 429 without a bcrypt verify."""
+        with patch.dict(rate_limiter.rules, {"login_username": Rule("login_username", limit=2, window_seconds=60)}):
+            for _ in range(2):
+                client.post("/api/auth/login", data={"username": "victim", "password": "guess"})
+            with patch.object(password_hasher, "verify_and_update") as mock_verify:
+                response = client.post("/api/auth/login", data={"username": "Victim", "password": "guess"})
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"]
+        mock_verify.assert_not_called()
+
+    def test_resend_verification_limited(self, client: TestClient):
+        """Test that verification emails cannot be re-requested without bound."""
+        statuses = [
+            client.post("/api/auth/resend_email_verification", json={"username": "someone"}).status_code
+            for _ in range(4)
+        ]
+
+        assert statuses[:3] == [400, 400, 400]
+        assert statuses[3] == 429
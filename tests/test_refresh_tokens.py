@@ -0,0 +1,106 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+from unittest.mock import patch
+
+from app.controllers import auth_controller
+from app.hashing import password_hasher, pwd_context
+from app.models.refresh_token import RefreshToken
+from app.models.users import User
+
+PASSWORD = "testpassword123"
+
+
+@pytest.fixture
+def verified_user(db_session: Session) -> User:
+    user = User(
+        email="refresh@example.com",
+        username="refresher",
+        full_name="Refresh User",
+        hashed_password=pwd_context.hash(PASSWORD),
+        verified_email=True,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def login(client: TestClient, user: User) -> dict:
+    response = client.post("/api/auth/login", data={"username": user.username, "password": PASSWORD})
+    assert response.status_code == 200
+    return response.json()
+
+
+def refresh(client: TestClient, token: str):
+    return client.post("/api/auth/refresh", json={"refresh_token": token})
+
+
+class TestRefreshTokens:
+    """Test rotating refresh tokens."""
+
+    def test_login_issues_refresh_token(self, client: TestClient, db_session: Session, verified_user: User):
+        """Test that login returns a refresh token and stores only its hash."""
+        tokens = login(client, verified_user)
+
+        [record] = db_session.exec(select(RefreshToken)).all()
+        assert tokens["refresh_token"]
+        assert record.token_hash == auth_controller.hash_refresh_token(tokens["refresh_token"])
+        assert record.token_hash != tokens["refresh_token"]
+        assert record.user_id == verified_user.id
+
+    def test_refresh_rotates_without_bcrypt(self, client: TestClient, verified_user: User):
+        """Test that refreshing returns a working access token and a new refresh token without hashing."""
+        tokens = login(client, verified_user)
+
+        with patch.object(password_hasher, "verify") as mock_verify:
+            response = refresh(client, tokens["refresh_token"])
+
+        assert response.status_code == 200
+        refreshed = response.json()
+        assert refreshed["refresh_token"] != tokens["refresh_token"]
+        mock_verify.assert_not_called()
+        me = client.get("/api/users/me", headers={"Authorization": f"Bearer {refreshed['access_token']}"})
+        assert me.json()["username"] == verified_user.username
+
+    def test_reuse_revokes_family(self, client: TestClient, db_session: Session, verified_user: User):
+        """Test that replaying a rotated token revokes every token of its family."""
+        first = login(client, verified_user)["refresh_token"]
+        second = refresh(client, first).json()["refresh_token"]
+
+        assert refresh(client, first).status_code == 401
+        assert refresh(client, second).status_code == 401
+        assert all(record.revoked_at is not None for record in db_session.exec(select(RefreshToken)).all())
+
+    def test_other_families_survive_reuse(self, client: TestClient, verified_user: User):
+        """Test that revoking one login's family leaves other logins alone."""
+        first = login(client, verified_user)["refresh_token"]
+        other = login(client, verified_user)["refresh_token"]
+        refresh(client, first)
+        refresh(client, first)
+
+        assert refresh(client, other).status_code == 200
+
+    def test_expired_and_unknown_tokens_rejected(self, client: TestClient, db_session: Session, verified_user: User):
+        """Test that expired and unknown refresh tokens are rejected."""
+        token = login(client, verified_user)["refresh_token"]
+        [record] = db_session.exec(select(RefreshToken)).all()
+        record.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.add(record)
+        db_session.commit()
+
+        assert refresh(client, token).status_code == 401
+        assert refresh(client, "not-a-token").status_code == 401
+
+    def test_logout_revokes_refresh_family(self, client: TestClient, verified_user: User):
+        """Test that logging out also ends the login's refresh tokens, leaving other logins alone."""
+        first = login(client, verified_user)
+        other = login(client, verified_user)
+        rotated = refresh(client, first["refresh_token"]).json()
+
+        response = client.post("/api/auth/logout", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+
+        assert response.status_code == 204
+        assert refresh(client, rotated["refresh_token"]).status_code == 401
+        assert refresh(client, other["refresh_token"]).status_code == 200
@@ -0,0 +1,180 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.controllers import user_controller
+from app.db.dao import RevokedTokenDao
+from app.dependencies.auth import decode_access_token
+from app.hashing import pwd_context
+from app.models.revoked_token import RevokedToken
+from app.models.users import User
+from app.revocation import BloomFilter, RevocationList, epoch
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest_asyncio.fixture
+async def session_maker():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def revocation_list(session_maker, clock: Clock) -> RevocationList:
+    return RevocationList(dao=RevokedTokenDao(), session_maker=session_maker, capacity=100, clock=clock)
+
+
+def expiry(clock: Clock, seconds: float) -> datetime:
+    return datetime.utcfromtimestamp(clock.now + seconds)
+
+
+class TestBloomFilter:
+    """Test the Bloom filter in front of the exact revoked set."""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        """Test that every added key is found and unseen keys rarely are."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"revoked-{i}")
+
+        assert all(f"revoked-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+class TestRevocationList:
+    """Test loading, expiring and pruning revoked token jtis."""
+
+    @pytest.mark.asyncio
+    async def test_revocation_reaches_other_workers(self, session_maker):
+        """Test that a jti revoked by one worker is picked up by another's refresh."""
+        clock = Clock()
+        first, second = revocation_list(session_maker, clock), revocation_list(session_maker, clock)
+        async with session_maker() as session:
+            await second.refresh(session)
+            await first.revoke(session, jti="abc", expires_at=expiry(clock, 600))
+
+        assert first.is_revoked("abc")
+        assert not second.is_revoked("abc")
+        async with session_maker() as session:
+            await second.refresh(session)
+        assert second.is_revoked("abc")
+        assert not second.is_revoked("def")
+
+    @pytest.mark.asyncio
+    async def test_expired_revocations_dropped_and_pruned(self, session_maker):
+        """Test that entries leave memory and the table once their tokens expire."""
+        clock = Clock()
+        revocations = revocation_list(session_maker, clock)
+        async with session_maker() as session:
+            await revocations.revoke(session, jti="short", expires_at=expiry(clock, 60))
+            await revocations.revoke(session, jti="long", expires_at=expiry(clock, 600))
+
+            clock.now += 120
+            await revocations.refresh(session)
+            assert not revocations.is_revoked("short")
+            assert revocations.is_revoked("long")
+
+            assert await revocations.prune(session) == 1
+            remaining = (await session.exec(select(RevokedToken.jti))).all()
+        assert remaining == ["long"]
+
+    @pytest.mark.asyncio
+    async def test_filter_grows_past_capacity(self):
+        """Test that revoking more than the capacity keeps every jti revoked and the rebuild sizes the filter up."""
+        clock = Clock()
+        revocations = revocation_list(None, clock)
+        for i in range(250):
+            revocations.add(f"jti-{i}", clock.now + 600)
+        assert all(revocations.is_revoked(f"jti-{i}") for i in range(250))
+        assert revocations.needs_rebuild()
+
+        await revocations.rebuild()
+
+        assert revocations.capacity == 800
+        assert not revocations.needs_rebuild()
+        assert all(revocations.is_revoked(f"jti-{i}") for i in range(250))
+
+    @pytest.mark.asyncio
+    async def test_expired_jtis_rebuild_only_past_capacity(self, session_maker):
+        """Test that expired jtis stay in the filter as stale keys until they outgrow its capacity."""
+        clock = Clock()
+        revocations = revocation_list(session_maker, clock)
+        for i in range(60):
+            revocations.add(f"short-{i}", clock.now + 60)
+        for i in range(10):
+            revocations.add(f"long-{i}", clock.now + 600)
+        bloom = revocations._bloom
+
+        clock.now += 120
+        async with session_maker() as session:
+            await revocations.refresh(session)
+        assert revocations._bloom is bloom
+        assert revocations.stats()["stale"] == 60
+        assert not any(revocations.is_revoked(f"short-{i}") for i in range(60))
+
+        for i in range(40):
+            revocations.add(f"new-{i}", clock.now + 600)
+        async with session_maker() as session:
+            await revocations.refresh(session)
+
+        assert revocations._bloom is not bloom
+        assert revocations.stats() == {"revoked": 50, "stale": 0, "capacity": 100, "bits": bloom.size}
+        assert all(revocations.is_revoked(f"new-{i}") for i in range(40))
+
+    @pytest.mark.asyncio
+    async def test_jti_added_during_rebuild_is_kept(self):
+        """Test that a jti revoked while the filter is rebuilt in a thread lands in the new filter."""
+        clock = Clock()
+        revocations = revocation_list(None, clock)
+        revocations.add("before", clock.now + 600)
+
+        rebuild = asyncio.create_task(revocations.rebuild())
+        await asyncio.sleep(0)
+        revocations.add("during", clock.now + 600)
+        await rebuild
+
+        assert revocations.is_revoked("before") and revocations.is_revoked("during")
+
+
+class TestLogout:
+    """Test revoking access tokens through the API."""
+
+    def test_logout_revokes_access_token(self, client: TestClient, db_session: Session):
+        """Test that a token stops working after logout and the revocation is stored."""
+        user = User(
+            email="logout@example.com", username="leaving", full_name="Leaving User",
+            hashed_password=pwd_context.hash("testpassword123"), verified_email=True,
+        )
+        db_session.add(user)
+        db_session.commit()
+        token = user_controller.generate_access_token_for_user(user=user)
+        other_token = user_controller.generate_access_token_for_user(user=user)
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/users/me", headers=headers).status_code == 200
+
+        response = client.post("/api/auth/logout", headers=headers)
+
+        assert response.status_code == 204
+        assert client.get("/api/users/me", headers=headers).status_code == 401
+        assert client.post("/api/auth/logout", headers=headers).status_code == 401
+        # other sessions of the same user keep working
+        assert client.get("/api/users/me", headers={"Authorization": f"Bearer {other_token}"}).status_code == 200
+        payload = decode_access_token(token)
+        stored = db_session.exec(select(RevokedToken)).one()
+        assert stored.jti == payload["jti"]
+        assert epoch(stored.expires_at) == payload["exp"]
@@ -0,0 +1,97 @@
+import pytest
+from typing import Annotated
+from types import SimpleNamespace
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, text
+from sqlmodel import create_engine
+
+from app.db.pool import WaitTimedQueuePool, engine_options, instrument_pool, pool_status
+from app.db.session import get_async_session
+
+
+def pool_settings(**overrides):
+    fields = dict(
+        DB_POOL_SIZE=1,
+        DB_MAX_OVERFLOW=0,
+        DB_POOL_TIMEOUT=0.05,
+        DB_POOL_PRE_PING=True,
+        DB_POOL_RECYCLE=1800,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+class TestPoolTelemetry:
+    """Test connection pool configuration and counters."""
+
+    def test_engine_options_from_settings(self):
+        """Test that pool settings are applied to file-backed databases."""
+        options = engine_options("postgresql://u:p@db/app", pool_settings(DB_POOL_SIZE=20))
+
+        assert options["poolclass"] is WaitTimedQueuePool
+        assert options["pool_size"] == 20
+        assert options["max_overflow"] == 0
+        assert options["pool_pre_ping"] is True
+
+    def test_engine_options_in_memory_sqlite(self):
+        """Test that in-memory SQLite keeps its default single connection pool."""
+        assert engine_options("sqlite://", pool_settings()) == {}
+
+    def test_checkout_counters_and_timeouts(self, tmp_path):
+        """Test checkout, checkin, wait and timeout counters."""
+        url = f"sqlite:///{tmp_path / 'pool.db'}"
+        engine = create_engine(url, **engine_options(url, pool_settings()))
+        stats = instrument_pool(engine)
+
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+            status = pool_status(engine, stats)
+            assert status["checked_out"] == 1
+
+        status = pool_status(engine, stats)
+        assert status["checkouts"] == 1
+        assert status["checkins"] == 1
+        assert status["connects"] == 1
+        assert status["timeouts"] == 1
+        assert status["waits"] == 2
+        assert status["wait_seconds_max"] >= 0.05
+        assert status["checked_out"] == 0
+
+        # stats survive engine.dispose() recreating the pool
+        engine.dispose()
+        with engine.connect():
+            pass
+        assert pool_status(engine, stats)["checkouts"] == 2
+        engine.dispose()
+
+
+def test_one_session_per_request(client: TestClient):
+    """Test that every dependency in a request shares the same session."""
+    app = FastAPI()
+    app.dependency_overrides = client.app.dependency_overrides
+
+    async def dependency(session=Depends(get_async_session)):
+        return session
+
+    @app.get("/sessions")
+    async def sessions(
+        first: Annotated[object, Depends(dependency)],
+        second=Depends(get_async_session),
+    ):
+        return {"shared": first is second}
+
+    response = TestClient(app).get("/sessions")
+
+    assert response.json() == {"shared": True}
+
+
+def test_health_db_reports_pool_status(client: TestClient):
+    """Test the pool telemetry endpoint."""
+    response = client.get("/health/db")
+
+    assert response.status_code == 200
+    assert {"async", "sync"} <= set(response.json())
+    assert "checkouts" in response.json()["async"]
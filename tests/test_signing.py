@@ -0,0 +1,127 @@
+import json
+import time
+from pathlib import Path
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from fastapi.testclient import TestClient
+from jwt.exceptions import InvalidTokenError
+
+from app.signing import KeyRing, SigningKey, load_key_ring
+
+SECRET = "test_secret_key_for_testing"
+
+GENERATORS = {
+    "EdDSA": lambda: ed25519.Ed25519PrivateKey.generate(),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+}
+
+
+def write_key(tmp_path, name: str, algorithm: str, public: bool = False) -> str:
+    key = GENERATORS[algorithm]()
+    if public:
+        pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    else:
+        pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    path = tmp_path / f"{name}.pem"
+    path.write_bytes(pem)
+    return str(path)
+
+
+def claims() -> dict:
+    return {"sub": {"username": "testuser"}, "exp": int(time.time()) + 60}
+
+
+class TestKeyRing:
+    """Test signing and verifying tokens through the key ring."""
+
+    @pytest.mark.parametrize("algorithm", ["EdDSA", "ES256", "RS256"])
+    def test_asymmetric_round_trip(self, tmp_path, algorithm: str):
+        """Test that tokens carry the active kid and verify with the public key alone."""
+        ring = load_key_ring(algorithm, SECRET, private_key_file=write_key(tmp_path, "active", algorithm))
+
+        token = ring.encode(claims())
+
+        header = jwt.get_unverified_header(token)
+        assert header["alg"] == algorithm
+        assert header["kid"] == ring.active.kid
+        assert ring.decode(token)["sub"] == {"username": "testuser"}
+
+    def test_hs256_default_has_no_kid(self):
+        """Test that HS256 mode keeps signing with the shared secret and publishes no keys."""
+        ring = load_key_ring("HS256", SECRET)
+
+        token = ring.encode(claims())
+
+        assert "kid" not in jwt.get_unverified_header(token)
+        assert jwt.decode(token, SECRET, algorithms=["HS256"])["sub"] == {"username": "testuser"}
+        assert json.loads(ring.jwks) == {"keys": []}
+
+    def test_rotation_overlap(self, tmp_path):
+        """Test that tokens from the previous key verify while it is listed, and not after."""
+        old_key = write_key(tmp_path, "old", "RS256")
+        new_key = write_key(tmp_path, "new", "EdDSA")
+        old_token = load_key_ring("RS256", SECRET, private_key_file=old_key).encode(claims())
+
+        during = load_key_ring("EdDSA", SECRET, private_key_file=new_key, previous_key_files=old_key)
+        after = load_key_ring("EdDSA", SECRET, private_key_file=new_key)
+
+        assert during.decode(old_token)["sub"] == {"username": "testuser"}
+        assert {key["kid"] for key in json.loads(during.jwks)["keys"]} == {during.active.kid, during.verify_only[0].kid}
+        with pytest.raises(InvalidTokenError):
+            after.decode(old_token)
+
+    def test_legacy_hs256_tokens(self, tmp_path):
+        """Test that HS256 tokens from before the switch verify only while allowed."""
+        key_file = write_key(tmp_path, "active", "ES256")
+        legacy_token = jwt.encode(claims(), SECRET, algorithm="HS256")
+
+        assert load_key_ring("ES256", SECRET, private_key_file=key_file).decode(legacy_token)
+        with pytest.raises(InvalidTokenError):
+            load_key_ring("ES256", SECRET, private_key_file=key_file, verify_legacy=False).decode(legacy_token)
+
+    def test_algorithm_confusion_rejected(self, tmp_path):
+        """Test that a token naming an asymmetric kid cannot be signed with another algorithm."""
+        public_file = write_key(tmp_path, "public", "RS256", public=True)
+        public_key = SigningKey.from_pem(Path(public_file).read_bytes())
+        ring = KeyRing(active=SigningKey.from_secret(SECRET), verify_only=[public_key])
+        kid = ring.verify_only[0].kid
+        forged = jwt.encode(claims(), SECRET, algorithm="HS256", headers={"kid": kid})
+
+        with pytest.raises(InvalidTokenError):
+            ring.decode(forged)
+
+    def test_public_key_cannot_sign(self, tmp_path):
+        """Test that the active key file must hold a private key of the configured algorithm."""
+        with pytest.raises(ValueError):
+            load_key_ring("EdDSA", SECRET, private_key_file=write_key(tmp_path, "public", "EdDSA", public=True))
+        with pytest.raises(ValueError):
+            load_key_ring("ES256", SECRET, private_key_file=write_key(tmp_path, "rsa", "RS256"))
+
+    def test_downstream_verification_from_jwks(self, tmp_path):
+        """Test that another service can verify tokens using only the published JWK set."""
+        ring = load_key_ring("EdDSA", SECRET, private_key_file=write_key(tmp_path, "active", "EdDSA"))
+        token = ring.encode(claims())
+
+        jwk_set = jwt.PyJWKSet.from_json(ring.jwks.decode())
+        signing_key = jwk_set[jwt.get_unverified_header(token)["kid"]]
+
+        assert jwt.decode(token, signing_key.key, algorithms=["EdDSA"])["sub"] == {"username": "testuser"}
+
+
+def test_jwks_endpoint_is_cacheable(client: TestClient):
+    """Test that the JWK set is served with caching headers and honours If-None-Match."""
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert "keys" in response.json()
+    assert "max-age" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    assert client.get("/.well-known/jwks.json", headers={"If-None-Match": etag}).status_code == 304
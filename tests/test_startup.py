@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+def test_import_leaves_heavy_modules_unloaded():
+    """Test that importing the app does not load inflect, the SendGrid SDK or Jinja."""
+    code = "import sys, app.main; print(' '.join(m for m in ('inflect', 'sendgrid', 'jinja2') if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True, text=True, check=True,
+    )
+
+    assert result.stdout.strip() == ""
+
+
+def test_table_names_match_inflect():
+    """Test that the precomputed table names are what inflect would have produced."""
+    from inflect import engine
+    from app.models.base import TABLE_NAMES
+
+    assert all(engine().plural(name) == table for name, table in TABLE_NAMES.items())
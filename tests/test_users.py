@@ -1,3 +1,5 @@
+import csv
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch
@@ -84,4 +86,181 @@ class TestUsersEndpoints:
         headers = {"Authorization": "InvalidFormat token_here"}
         response = client.get("/api/users/me", headers=headers)
         
-        assert response.status_code == 401 
\ No newline at end of file
+        assert response.status_code == 401 
+
+class TestStatelessAccessTokens:
+    """Test serving authenticated requests from access token claims."""
+
+    def make_user(self) -> User:
+        return User(
+            email="stateless@example.com",
+            username="stateless",
+            full_name="Stateless User",
+            hashed_password="hash",
+            verified_email=True,
+        )
+
+    def test_me_served_from_token_claims(self, client: TestClient):
+        """Test that /api/users/me needs no users row when the claims are fresh."""
+        from app.controllers import user_controller
+        from app.config import settings
+
+        user = self.make_user()
+        with patch.object(settings, "STATELESS_ACCESS_TOKENS", True):
+            token = user_controller.generate_access_token_for_user(user=user)
+            response = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == str(user.id)
+        assert data["username"] == "stateless"
+        assert data["email"] == "stateless@example.com"
+        assert "hashed_password" not in data
+
+    def test_stale_claims_fall_back_to_database(self, client: TestClient):
+        """Test that claims older than the maximum staleness are not trusted."""
+        from app.controllers import user_controller
+        from app.config import settings
+
+        with patch.object(settings, "STATELESS_ACCESS_TOKENS", True), \
+                patch.object(settings, "STATELESS_TOKEN_MAX_STALENESS_SECONDS", -1):
+            token = user_controller.generate_access_token_for_user(user=self.make_user())
+            response = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+
+        # no users row exists, so the database path rejects the token
+        assert response.status_code == 401
+
+    def test_claims_ignored_when_mode_disabled(self, client: TestClient):
+        """Test that tokens are always checked against the database by default."""
+        from app.controllers import user_controller
+        from app.config import settings
+
+        with patch.object(settings, "STATELESS_ACCESS_TOKENS", True):
+            token = user_controller.generate_access_token_for_user(user=self.make_user())
+        response = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 401
+
+
+class TestUserExport:
+    """Test the admin user export stream."""
+
+    @pytest.fixture
+    def users(self, db_session) -> list[User]:
+        from app.config import settings
+
+        users = [
+            User(email=f"export{i}@example.com", username=f"export{i}", full_name="Export, User",
+                 hashed_password="secret-hash", verified_email=True)
+            for i in range(5)
+        ]
+        users.append(User(email="admin@example.com", username=settings.ADMIN_USERNAME,
+                          full_name="Admin", hashed_password="secret-hash", verified_email=True))
+        db_session.add_all(users)
+        db_session.commit()
+        return users
+
+    def headers(self, user: User) -> dict:
+        from app.controllers import user_controller
+
+        return {"Authorization": f"Bearer {user_controller.generate_access_token_for_user(user=user)}"}
+
+    def test_ndjson_export_pages_through_every_user(self, client: TestClient, users: list[User]):
+        """Test that small pages still yield each user exactly once, in id order, without hashes."""
+        response = client.get("/api/users/export?page_size=2", headers=self.headers(users[-1]))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == sorted(str(user.id) for user in users)
+        assert all("hashed_password" not in row for row in rows)
+        assert "secret-hash" not in response.text
+
+    def test_csv_export(self, client: TestClient, users: list[User]):
+        """Test that CSV output has a header and quotes values as needed."""
+        response = client.get("/api/users/export?format=csv", headers=self.headers(users[-1]))
+
+        rows = list(csv.DictReader(response.text.splitlines()))
+        assert len(rows) == len(users)
+        assert "hashed_password" not in rows[0]
+        assert {row["full_name"] for row in rows} == {"Export, User", "Admin"}
+
+    def test_export_is_admin_only(self, client: TestClient, users: list[User]):
+        """Test that other users cannot export."""
+        response = client.get("/api/users/export", headers=self.headers(users[0]))
+
+        assert response.status_code == 403
+
+
+class TestUserDirectory:
+    """Test the admin user directory."""
+
+    @pytest.fixture
+    def users(self, db_session) -> list[User]:
+        from datetime import datetime, timedelta
+        from app.config import settings
+
+        start = datetime(2024, 1, 1)
+        users = [
+            User(email=f"{name}@example.com", username=name, full_name=f"{name.title()} Example",
+                 hashed_password="secret-hash", verified_email=i % 2 == 0, is_active=i != 3,
+                 created_at=start + timedelta(days=i))
+            for i, name in enumerate(["alice", "alfred", "bob", "carol", "mal_colm", "malcolm"])
+        ]
+        users.append(User(email="root@example.com", username=settings.ADMIN_USERNAME, full_name="Admin",
+                          hashed_password="secret-hash", verified_email=True, created_at=start - timedelta(days=1)))
+        db_session.add_all(users)
+        db_session.commit()
+        return users
+
+    def get(self, client: TestClient, admin: User, **params):
+        from app.controllers import user_controller
+
+        token = user_controller.generate_access_token_for_user(user=admin)
+        return client.get("/api/users", params=params, headers={"Authorization": f"Bearer {token}"})
+
+    def usernames(self, response) -> list[str]:
+        return [user["username"] for user in response.json()["users"]]
+
+    def test_cursor_pages_newest_first(self, client: TestClient, users: list[User]):
+        """Test that following next_cursor walks every user once, newest first."""
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            page = self.get(client, users[-1], **params).json()
+            seen += [user["username"] for user in page["users"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == [user.username for user in sorted(users, key=lambda user: user.created_at, reverse=True)]
+
+    def test_prefix_and_substring_search(self, client: TestClient, users: list[User]):
+        """Test case-insensitive prefix and substring matches, with LIKE wildcards taken literally."""
+        assert self.usernames(self.get(client, users[-1], q="AL")) == ["alfred", "alice"]
+        assert self.usernames(self.get(client, users[-1], q="lco", match="substring")) == ["malcolm"]
+        assert self.usernames(self.get(client, users[-1], q="l_c", match="substring")) == ["mal_colm"]
+        assert self.usernames(self.get(client, users[-1], q="carol example")) == ["carol"]
+
+    def test_filters(self, client: TestClient, users: list[User]):
+        """Test filtering on activity, verification and creation time."""
+        response = self.get(client, users[-1], is_active=False)
+        assert self.usernames(response) == ["carol"]
+        assert response.json()["users"][0]["verified_email"] is False
+        assert self.usernames(self.get(
+            client, users[-1], verified_email=True, created_after="2024-01-01T00:00:00", created_before="2024-01-05T00:00:00"
+        )) == ["bob", "alice"]
+
+    def test_created_filters_with_offsets(self, client: TestClient, users: list[User]):
+        """Test that creation time bounds with a UTC offset are compared in UTC."""
+        assert self.usernames(self.get(
+            client, users[-1], verified_email=True,
+            created_after="2024-01-01T02:00:00+02:00", created_before="2024-01-05T00:00:00Z",
+        )) == ["bob", "alice"]
+        assert self.usernames(self.get(client, users[-1], created_before="2023-12-31T19:00:00-05:00")) == [users[-1].username]
+
+    def test_rejects_bad_requests(self, client: TestClient, users: list[User]):
+        """Test that short substrings, bad cursors and non-admins are refused."""
+        assert self.get(client, users[-1], q="al", match="substring").status_code == 400
+        assert self.get(client, users[-1], cursor="not-a-cursor").status_code == 400
+        assert self.get(client, users[0]).status_code == 403
@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.warmup import WarmUp, build_validators, render_templates
+
+
+class TestWarmUp:
+    """Test the startup warm-up stage."""
+
+    @pytest.mark.asyncio
+    async def test_steps_timed_and_failures_skipped(self):
+        """Test that every step runs and is timed, and a failing one does not stop the rest."""
+        ran = []
+
+        async def ok():
+            ran.append("ok")
+
+        async def broken():
+            raise RuntimeError("database unavailable")
+
+        warm_up = WarmUp(steps=[("broken", broken), ("ok", ok)])
+        await warm_up.run()
+
+        assert ran == ["ok"]
+        assert warm_up.state == "done" and warm_up.ready
+        assert set(warm_up.timings_ms) == {"broken", "ok"}
+        assert warm_up.errors == {"broken": "database unavailable"}
+
+    @pytest.mark.asyncio
+    async def test_validators_and_templates(self):
+        """Test the steps that need no database or hashing pool."""
+        await build_validators()
+        await render_templates()
+
+    def test_health_not_ready_while_warming(self, client: TestClient):
+        """Test that /health reports 503 until the warm-up has finished."""
+        warm_up = WarmUp(steps=[])
+        with patch("app.routers.health.warmup", warm_up):
+            warm_up.state = "running"
+            assert client.get("/health").status_code == 503
+            assert client.get("/health/warmup").json()["state"] == "running"
+            warm_up.state = "done"
+            assert client.get("/health").json() == {"status": "ok"}